@@ -5,7 +5,7 @@ import platform
 import click
 
 from cid.common import Cid
-from cid.utils import get_parameters, set_parameters, get_latest_tool_version, cid_print
+from cid.utils import get_parameters, set_parameters, get_latest_tool_version, cid_print, buffer_output
 from cid._version import __version__
 from cid.exceptions import CidCritical, CidError
 
@@ -69,6 +69,10 @@ def cid_command(func):
 @click.option('--log_filename', help='log file name', default='cid.log')
 @click.option('-v', '--verbose', count=True)
 @click.option('-y', '--yes', help='confirm all', is_flag=True, default=False)
+@click.option('--no-cache', help='Do not use local caches (Athena metadata, compiled resource files and downloaded files)', is_flag=True, default=False)
+@click.option('--offline', help='Use only locally cached copies of remote resources', is_flag=True, default=False)
+@click.option('--profile-report', help='Write timings of AWS API calls and Athena queries as json to a file at exit (- for stdout)', default=None)
+@click.option('--buffer-output', help='Buffer standard output instead of writing it line by line', is_flag=True, default=False)
 @click.pass_context
 def main(ctx, **kwargs):
 
@@ -76,6 +80,8 @@ def main(ctx, **kwargs):
     if platform.system() == "Windows":
         os.system('color') #nosec B605, B607
 
+    if kwargs.get('buffer_output'):
+        buffer_output()
     ctx.obj = Cid(**kwargs)
 
 @click.option('-v', '--verbose', count=True)
@@ -174,6 +180,24 @@ def export(ctx, **kwargs):
 
 
 @click.option('--dashboard-id', help='QuickSight dashboard id', default=None)
+@click.option('--all', help='Refresh datasets of all deployed dashboards', is_flag=True, default=False)
+@click.option('--wait', help='Wait for ingestions to finish and report rows and duration', is_flag=True, default=False)
+@click.option('-v', '--verbose', count=True)
+@click.option('-y', '--yes', help='confirm all', is_flag=True, default=False)
+@cid_command
+def refresh(ctx, dashboard_id, **kwargs):
+    """Refresh datasets of dashboards. Datasets shared by dashboards are refreshed once
+
+    \b
+    Command options:
+     --max-ingestions INTEGER              Max number of concurrent SPICE ingestions (default 5)
+    """
+    ctx.obj.refresh(dashboard_id, **kwargs)
+
+
+@click.option('--dashboard-id', help='QuickSight dashboard id', default=None)
+@click.option('--all', help='Show status of all deployed dashboards without interaction', is_flag=True, default=False)
+@click.option('--format', help='Output format', default=None, type=click.Choice(['table', 'json']))
 @click.option('-v', '--verbose', count=True)
 @click.option('-y', '--yes', help='confirm all', is_flag=True, default=False)
 @cid_command
@@ -1,6 +1,8 @@
 import os
 import json
+import atexit
 import urllib
+import hashlib
 import logging
 import functools
 import webbrowser
@@ -18,20 +20,24 @@ from botocore.exceptions import ClientError, NoCredentialsError, CredentialRetri
 from cid import utils
 from cid.base import CidBase
 from cid.plugin import Plugin
-from cid.utils import get_parameter, get_parameters, set_parameters, unset_parameter, get_yesno_parameter, cid_print, isatty, merge_objects, IsolatedParameters, set_defaults
+from cid.utils import get_parameter, get_parameters, set_parameters, unset_parameter, get_yesno_parameter, cid_print, isatty, merge_objects, IsolatedParameters, set_defaults, yaml_load
 from cid.helpers.account_map import AccountMap
 from cid.helpers.parameter_store import ParametersController
-from cid.helpers import Athena, S3, IAM, CUR, ProxyCUR, Glue, QuickSight, Dashboard, Dataset, Datasource, csv2view, Organizations, CFN
+from cid.helpers.cache import DiskCache, json_dumps, json_loads
+from cid.helpers.http import HttpClient
+from cid.helpers import Athena, S3, IAM, CUR, ProxyCUR, Glue, QuickSight, Dashboard, Dataset, Datasource, csv2view, Organizations, CFN, DependencyGraph
 from cid.helpers.quicksight.template import Template as CidQsTemplate
 from cid._version import __version__
 from cid.export import export_analysis
 from cid.logger import set_cid_logger
+from cid.profiler import profiler
 from cid.exceptions import CidError, CidCritical
 from cid.commands import InitQsCommand
 
 logger = logging.getLogger(__name__)
 
 class Cid():
+    _compiled_resources = DiskCache('compiled-resources', ttl=7*24*3600) # parsed yaml files
 
     def __init__(self, **kwargs) -> None:
         self.base: CidBase = None
@@ -40,7 +46,9 @@ class Cid():
         self.dashboards = dict()
         self.plugins = self.__loadPlugins()
         self._clients = dict()
-        self._visited_views = [] # Views updated in the current session
+        self._visited_views = set() # Views updated in the current session
+        self._text_files = {} # content of files by resolved source path
+        self.http = HttpClient()
         self.qs_url = 'https://{region}.quicksight.{domain}/sn/dashboards/{dashboard_id}'
         self.all_yes = kwargs.get('yes')
         self.verbose = kwargs.get('verbose')
@@ -68,7 +76,11 @@ class Cid():
 
         print('Checking AWS environment...')
         try:
-            self.base = CidBase(session=utils.get_boto_session(**params))
+            session = utils.get_boto_session(**params)
+            if get_parameters().get('profile-report'):
+                profiler.register(session)
+                atexit.register(profiler.write_report, get_parameters().get('profile-report'))
+            self.base = CidBase(session=session)
             if self.base.session.profile_name:
                 print(f'\tprofile name: {self.base.session.profile_name}')
                 logger.info(f'AWS profile name: {self.base.session.profile_name}')
@@ -131,6 +143,10 @@ class Cid():
         """ get/create parameters_controller """
         return ParametersController(self.athena)
 
+    def get_cur_by_version(self, cur_version: str):
+        """ get cur1 or cur2 """
+        return self.cur2 if str(cur_version) == '2' else self.cur1
+
     def get_cur(self, target_cur_version=None):
         """ get a cur """
         cur_version = self.cur.version
@@ -312,7 +328,7 @@ class Cid():
             logger.debug(f"Issue logging action {action}  for dashboard {dashboard_id} , due to a urllib3 exception {str(e)} . This issue will be ignored")
 
     def get_page(self, source):
-        resp = requests.get(source, timeout=10, headers={'User-Agent': 'cid'})
+        resp = self.http.session.get(source, timeout=10)
         resp.raise_for_status()
         return resp
 
@@ -345,25 +361,61 @@ class Cid():
         return source
 
 
+    def get_file_version(self, source) -> str:
+        ''' returns a version of a local file (mtime and size) '''
+        stat = os.stat(source)
+        return f'{stat.st_mtime_ns}:{stat.st_size}'
+
     def load_text_file(self, source, parent_source=None):
-        ''' return a text from local or remote file
+        ''' return a text from local or remote file. Files are read once per session (local ones once per version),
+        as several resources can share a file.
         '''
         source = self.resolve_relative_path(source, parent_source)
         if source.startswith('https://'):
-            return self.get_page(source).text
+            key = source
+            if key not in self._text_files:
+                self._text_files[key] = self.http.get_text(source)
         else:
-            with open(source, encoding='utf-8') as file_:
-                return file_.read()
+            key = (source, self.get_file_version(source))
+            if key not in self._text_files:
+                with open(source, encoding='utf-8') as file_:
+                    self._text_files[key] = file_.read()
+        return self._text_files[key]
 
 
+    def load_yaml_file(self, source, parent_source=None):
+        ''' return parsed yaml from a local or remote file.
+        Parsed content is cached on disk as json keyed by the file version (mtime and size for local files, content hash for remote ones)
+        '''
+        source = self.resolve_relative_path(source, parent_source)
+        text = None
+        if source.startswith('https://'):
+            text = self.load_text_file(source, parent_source)
+            version = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        else:
+            version = self.get_file_version(source)
+        compiled = self._compiled_resources.get(source, version)
+        if compiled is not None:
+            return json_loads(compiled)
+        if text is None:
+            text = self.load_text_file(source, parent_source)
+        data = yaml_load(text)
+        try:
+            compiled = json_dumps(data)
+            if json_loads(compiled) == data: # some yaml (ex: non string keys) cannot be represented in json
+                self._compiled_resources.invalidate(source) # keep only one version per file
+                self._compiled_resources.set(source, version, compiled)
+        except TypeError as exc:
+            logger.debug(f'Cannot cache {source}: {exc}')
+        return data
+
     def load_resource_file(self, source, parent_source=None):
         ''' load additional resources from resource file
         '''
         logger.debug(f'Loading resources from {source} from {parent_source}')
         resources = {}
         try:
-            text = self.load_text_file(source, parent_source)
-            resources = yaml.safe_load(text)
+            resources = self.load_yaml_file(source, parent_source)
         except Exception as exc:
             logger.warning(f'Failed to load resources from {source}: {exc}')
             return
@@ -378,12 +430,18 @@ class Cid():
         ''' load additional resources from catalog
         '''
         try:
-            text = self.load_text_file(catalog_url, os.getcwd())
-            catalog = yaml.safe_load(text)
+            catalog = self.load_yaml_file(catalog_url, os.getcwd())
         except (requests.exceptions.RequestException, yaml.error.MarkedYAMLError) as exc:
             logger.warning(f'Failed to load a catalog url: {exc}')
             logger.debug(exc, exc_info=True)
             return
+        # download all remote resource files at once, then load them in the order of the catalog
+        urls = [
+            urllib.parse.urljoin(catalog_url, resource_ref.get("Url"))
+            for resource_ref in catalog.get('Resources', [])
+            if catalog_url.startswith('https://') or resource_ref.get("Url", '').startswith('https://')
+        ]
+        self._text_files.update(self.http.prefetch([url for url in urls if url.startswith('https://') and url not in self._text_files]))
         for resource_ref in catalog.get('Resources', []):
             self.load_resource_file(resource_ref.get("Url"), catalog_url)
 
@@ -412,10 +470,9 @@ class Cid():
                         raise CidCritical(f'Failed fetching parameter {prefix}{key}: parameter with type Athena must have query value.')
                     query = Template(value['query']).safe_substitute(params|others)
                     try:
-                        res_list = self.athena.query(query)
+                        options = ['-'.join(res) for res in self.athena.query_iter(query)]
                     except (self.athena.client.exceptions.ClientError, CidError, CidCritical) as exc:
                         raise CidCritical(f'Failed fetching parameter {prefix}{key}: {exc}.') from exc
-                    options = ['-'.join(res) for res in (res_list or [])]
                     params[key] = self.generic_tags_json(
                         param_name=key,
                         options=options,
@@ -428,15 +485,14 @@ class Cid():
                         raise CidCritical(f'Failed fetching parameter {prefix}{key}: parameter with type Athena must have query value.')
                     query = value['query']
                     try:
-                        res_list = self.athena.query(query)
+                        options = ['-'.join(res) for res in self.athena.query_iter(query)]
                     except (self.athena.client.exceptions.ClientError, CidError, CidCritical) as exc:
                         raise CidCritical(f'Failed fetching parameter {prefix}{key}: {exc}.') from exc
-                    if not res_list:
+                    if not options:
                         raise CidCritical(f'Failed fetching parameter {prefix}{key}, {value}. Athena returns empty results. {value.get("error")}')
-                    elif len(res_list) == 1:
-                        params[key] = '-'.join(res_list[0])
+                    elif len(options) == 1:
+                        params[key] = options[0]
                     else:
-                        options = ['-'.join(res) for res in res_list]
                         default = value.get('default')
                         params[key] = get_parameter(
                             param_name=prefix + key,
@@ -516,6 +572,8 @@ class Cid():
             non_standard_categories = [cat for cat in all_categories if cat not in standard_categories]
             categories =  standard_categories + sorted(non_standard_categories)
             dashboard_options = {}
+            if self.qs._dashboards is None:
+                self.qs.discover_dashboards(lazy=True) # we only need ids here
             for category in categories:
                 if category_filter and category.upper() not in category_filter:
                     continue
@@ -590,7 +648,7 @@ class Cid():
                 data = yaml.safe_dump(data, width=100000) # dump without line breaks
             params = self.get_template_parameters(dashboard_definition.get('parameters', dict()))
             data = Template(data).safe_substitute(params)
-            dashboard_definition['definition'] = yaml.safe_load(data)
+            dashboard_definition['definition'] = yaml_load(data)
         else:
             raise CidCritical('Definition of dashboard resource must contain data or template_id')
 
@@ -638,6 +696,8 @@ class Cid():
                 # This is not ideal as there can be several with the same name,
                 # but if dataset is created manually we cannot use id.
                 matching_datasets = []
+                if dashboard_definition.get('templateId'): # columns will be needed
+                    self.qs.hydrate_datasets([ds.id for ds in self.qs.datasets.values() if ds.name == dataset_name])
                 for ds in self.qs.datasets.values():
                     if not isinstance(ds, Dataset) or ds.name != dataset_name:
                         continue
@@ -746,9 +806,65 @@ class Cid():
 
         return dashboard_id
 
+    @command
+    def refresh(self, dashboard_id, **kwargs):
+        """Refresh datasets of one or all deployed dashboards"""
+        if kwargs.get('all'):
+            dashboards = list((self.qs.dashboards or {}).values())
+        else:
+            dashboard_id = dashboard_id or self.qs.select_dashboard(force=True)
+            if not dashboard_id:
+                print('No dashboard selected')
+                return
+            dashboards = [self.qs.discover_dashboard(dashboard_id)]
+        dataset_names = {}
+        for dashboard in dashboards:
+            if not dashboard:
+                continue
+            for name, dataset_id in dashboard.datasets.items():
+                dataset_names[dataset_id] = name
+        if not dataset_names:
+            print('No datasets found')
+            return
+        wait = bool(kwargs.get('wait'))
+        cid_print(f'Refreshing <BOLD>{len(dataset_names)}<END> datasets of {len(dashboards)} dashboard(s){" and waiting for completion" if wait else ""}')
+        results = self.qs.refresh_datasets(list(dataset_names.keys()), wait=wait)
+        for dataset_id, result in sorted(results.items(), key=lambda item: dataset_names[item[0]]):
+            status = result.get('status')
+            color = {'COMPLETED': 'GREEN', 'FAILED': 'RED', 'CANCELLED': 'RED'}.get(status, 'BLUE')
+            details = ''
+            if result.get('duration_s') is not None:
+                details = f"{result.get('rows')} rows in {result['duration_s']}s ({result.get('rows_per_s') or 0} rows/s)"
+            if result.get('reused'):
+                details += ' (already in progress)'
+            if result.get('error'):
+                details += f" {result['error']}"
+            cid_print(f'    {dataset_names[dataset_id]: <36} <{color}>{status}<END> {details}')
+        return results
+
+    def status_snapshot(self, dashboard_id: str=None, output_format: str='table') -> list:
+        """ Show status of one or all deployed dashboards at once, without interaction """
+        if dashboard_id:
+            dashboards = [self.qs.discover_dashboard(dashboard_id)]
+            if not dashboards[0]:
+                raise CidCritical(f'Dashboard {dashboard_id} is not deployed')
+        else:
+            dashboards = list((self.qs.dashboards or {}).values())
+        snapshots = self.qs.get_status_snapshots(dashboards)
+        if output_format == 'json':
+            print(json.dumps(snapshots, indent=2, default=str))
+        else:
+            if not dashboards:
+                print('No deployed dashboards found')
+            for dashboard, snapshot in zip(dashboards, snapshots):
+                dashboard.display_status(snapshot)
+        return snapshots
+
     @command
     def status(self, dashboard_id, **kwargs):
         """Check QuickSight dashboard status"""
+        if kwargs.get('all') or kwargs.get('format') == 'json':
+            return self.status_snapshot(dashboard_id, output_format=kwargs.get('format') or 'table')
         next_selection = None
         while next_selection != 'exit':
             if not dashboard_id:
@@ -929,6 +1045,7 @@ class Cid():
 
         self.qs.pre_discover()
         self.qs.discover_datasets()
+        self.qs.hydrate_datasets([_id for dashboard in self.qs.dashboards.values() for _id in dashboard.get_dataset_ids()])
         references = {}
         for dashboard in self.qs.dashboards.values():
             for dataset_id in dashboard.datasets.values():
@@ -1294,7 +1411,7 @@ class Cid():
             cid_print(f'\nThere are still {len(missing_datasets)} datasets missing: {missing_str}')
 
             # get rls status of existing datasets
-            found_dataset_objects = [self.qs.describe_dataset(ds_id) for ds_id in found_datasets]
+            found_dataset_objects = list(self.qs.hydrate_datasets(found_datasets).values())
             rls_dataset_arns = [ds.rls_arn for ds in found_dataset_objects if ds.rls_arn]
             if rls_dataset_arns:
                 rls_dataset_arn = max(set(rls_dataset_arns), key=rls_dataset_arns.count) #get the most frequent
@@ -1372,13 +1489,12 @@ class Cid():
         elif definition.get('url') or definition.get('File') or definition.get('file'):
             source = definition.get('url') or definition.get('File') or definition.get('file')
             assert definition.get('source'), str(definition)
-            text =  self.load_text_file(source, definition.get('source'))
             if source.endswith('.json') or source.endswith('.jsn'):
-                data = json.loads(text)
+                data = json.loads(self.load_text_file(source, definition.get('source')))
             elif source.endswith('.yaml') or source.endswith('.yml'):
-                data = yaml.safe_load(text)
+                data = self.load_yaml_file(source, definition.get('source'))
             else:
-                data = text
+                data = self.load_text_file(source, definition.get('source'))
         if data is None:
             raise CidCritical(f"Error: definition is broken. Cannot find data for {repr(definition)}. Check resources file.")
         return data
@@ -1503,6 +1619,7 @@ class Cid():
             else: # try to find dataset and get athena database
                 found_datasets = self.qs.get_datasets(name=dataset_name)
                 logger.debug(f'Related to dataset {dataset_name}: {[ds.id for ds in found_datasets]}')
+                found_datasets = list(self.qs.hydrate_datasets([ds.id for ds in found_datasets]).values())
                 if found_datasets:
                     schemas = list(set(sum([d.schemas for d in found_datasets], [])))
                     datasources = list(set(sum([d.datasources for d in found_datasets], [])))
@@ -1565,22 +1682,18 @@ class Cid():
         found_views = utils.intersection(required_views, self.athena._metadata.keys())
         missing_views = utils.difference(required_views, found_views)
 
+        views_to_process = []
         if recursive:
             print(f"Detected views: {', '.join(found_views)}")
-            for view_name in found_views:
-                #if cur_required and view_name == self.cur.table_name:
-                #    logger.debug(f'Dependency view {view_name} is a CUR. Skip.')
-                #    continue
-                if view_name == 'account_map':
-                    logger.debug(f'Dependency view is {view_name}. Skip.')
-                    continue
-                self.create_or_update_view(view_name, recursive=recursive, update=update)
+            #if cur_required and view_name == self.cur.table_name:
+            #    logger.debug(f'Dependency view {view_name} is a CUR. Skip.')
+            views_to_process += [view_name for view_name in found_views if view_name != 'account_map']
 
         # create missing views
         if len(missing_views):
             print(f"Missing views: {', '.join(missing_views)}")
-            for view_name in missing_views:
-                self.create_or_update_view(view_name, recursive=recursive, update=update)
+            views_to_process += missing_views
+        self.create_or_update_views(views_to_process, recursive=recursive, update=update)
 
         if not isinstance(athena_datasource, Datasource):
             print('athena_datasource is not defined')
@@ -1752,26 +1865,100 @@ class Cid():
 
 
     def create_or_update_view(self, view_name: str, recursive: bool=True, update: bool=False) -> None:
-        # Avoid checking a views multiple times in one cid session
+        """ Create or update a view and (if recursive) all its dependencies """
+        self.create_or_update_views([view_name], recursive=recursive, update=update)
+
+    def create_or_update_views(self, view_names: list, recursive: bool=True, update: bool=False) -> None:
+        """ Create or update views and (if recursive) their dependencies.
+        Independent views are processed concurrently (see --max-workers).
+        """
         update = update or get_parameters().get('update')
-        logger.trace(f'create_or_update_view({view_name}, recursive={recursive}, update={update})')
-        if view_name in self._visited_views:
-            logger.trace(f'{view_name} is in _visited_views.skipping')
+        graph = self.get_views_graph(view_names, recursive=recursive, update=update)
+        if not graph:
             return
-        self._visited_views.append(view_name)
-        logger.info(f'Processing view: {view_name}')
+        self._prepare_views_processing(graph)
+        # Unattended runs can go concurrent by default, interactive runs must opt-in with --max-workers
+        graph.run(max_workers=utils.get_max_workers(default=1 if isatty() else 4))
 
-        # For account mappings create a view using a special helper
-        if view_name in ['account_map', 'aws_accounts']:
-            if view_name in self.athena._metadata.keys() and (not update and not recursive):
-                print(f'Account map {view_name} exists. Skipping.')
-            else:
-                self.create_or_update_account_map(view_name)
+    def _prepare_views_processing(self, graph: DependencyGraph) -> None:
+        """ Resolve shared state (Athena catalog, database, workgroup and CUR tables) before going concurrent.
+        These properties are lazy and can ask the user, so they must not be resolved first inside workers.
+        """
+        catalog, database, workgroup = self.athena.CatalogName, self.athena.DatabaseName, self.athena.WorkGroup
+        logger.debug(f'Using {catalog}.{database} with WorkGroup {workgroup}')
+        for cur_version in ['1', '2']:
+            if ('cur', cur_version) in graph:
+                table_name = self.get_cur_by_version(cur_version).table_name
+                logger.debug(f'Using CUR{cur_version} {table_name}')
+
+    def get_views_graph(self, view_names: list, recursive: bool=True, update: bool=False) -> DependencyGraph:
+        """ Build a graph of views and CUR columns that need to be processed """
+        graph = DependencyGraph()
+        cur_columns = {'1': [], '2': []}
+
+        def _add_view(view_name):
+            # Avoid checking a views multiple times in one cid session
+            if view_name in self._visited_views:
+                logger.trace(f'{view_name} is in _visited_views.skipping')
+                return
+            self._visited_views.add(view_name)
+            logger.info(f'Processing view: {view_name}')
+
+            if view_name in ['account_map', 'aws_accounts']:
+                graph.add(('view', view_name), func=functools.partial(self._create_or_update_account_map_view, view_name, recursive, update))
+                return
+
+            logger.info(f'Getting view definition {view_name}')
+            view_definition = self.get_definition("view", name=view_name, noparams=True) or {}
+            dependencies = view_definition.get('dependsOn', {})
+            depends_on = []
+
+            # CUR columns are added with ALTER TABLE one by one, so they go in a single node per CUR
+            for cur_version, keys in [('1', ['cur', 'cur1']), ('2', ['cur2'])]:
+                if any(dependencies.get(key) for key in keys):
+                    if dependencies.get(keys[0]):
+                        cur_columns[cur_version].append(dependencies.get(keys[0]))
+                    graph.add(('cur', cur_version), func=functools.partial(self._ensure_cur_columns, cur_version, cur_columns[cur_version]))
+                    depends_on.append(('cur', cur_version))
+
+            if recursive:
+                dependency_views = [name for name in dependencies.get('views', []) if name not in ['cur', 'cur2']]
+                # Discover dependency views (may not be discovered earlier)
+                self.athena.discover_views(dependency_views)
+                logger.info(f"Dependency views: {', '.join(dependency_views)}" if dependency_views else 'No dependency views')
+                for dep_view_name in dependency_views:
+                    if dep_view_name not in self.athena._metadata.keys():
+                        print(f'Missing dependency view: {dep_view_name}, creating')
+                        logger.info(f'Missing dependency view: {dep_view_name}, creating')
+                    _add_view(dep_view_name)
+                    if ('view', dep_view_name) in graph:
+                        depends_on.append(('view', dep_view_name))
+            graph.add(('view', view_name), func=functools.partial(self._create_or_update_view, view_name, view_definition, update), depends_on=depends_on)
+
+        for view_name in view_names:
+            _add_view(view_name)
+        return graph
+
+    def _create_or_update_account_map_view(self, view_name: str, recursive: bool, update: bool) -> None:
+        """ For account mappings create a view using a special helper """
+        if view_name in self.athena._metadata.keys() and (not update and not recursive):
+            print(f'Account map {view_name} exists. Skipping.')
+        else:
+            self.create_or_update_account_map(view_name)
+
+    def _ensure_cur_columns(self, cur_version: str, requirements: list) -> None:
+        """ Process CUR columns required by all views in one go """
+        if not requirements:
             return
+        cur = self.get_cur_by_version(cur_version)
+        columns = [column for requirement in requirements if isinstance(requirement, list) for column in requirement]
+        if columns:
+            cur.ensure_columns(list(dict.fromkeys(columns)))
+        else:
+            cur.ensure_columns(requirements[0]) # not a list of columns, but CUR is still required
 
-        # Create a view
-        logger.info(f'Getting view definition {view_name}')
-        view_definition = self.get_definition("view", name=view_name, noparams=True)
+    def _create_or_update_view(self, view_name: str, view_definition: dict, update: bool=False) -> None:
+        """ Create or update a single view. Dependencies must be processed before. """
         if not view_definition and view_name in self.athena._metadata.keys():
             logger.info(f"Definition is unavailable but view exists: {view_name}, skipping")
             return
@@ -1779,28 +1966,7 @@ class Cid():
             logger.info(f"Definition is unavailable {view_name}")
             return
         logger.debug(f'View definition: {view_definition}')
-        dependencies = view_definition.get('dependsOn', {})
 
-        # Process CUR columns
-        if dependencies.get('cur'):
-            self.cur1.ensure_columns(dependencies.get('cur'))
-        if dependencies.get('cur2'):
-            self.cur2.ensure_columns(dependencies.get('cur2'))
-
-        if recursive:
-            dependency_views = dependencies.get('views', [])
-            if 'cur' in dependency_views:
-                dependency_views.remove('cur')
-            if 'cur2' in dependency_views:
-                dependency_views.remove('cur2')
-            # Discover dependency views (may not be discovered earlier)
-            self.athena.discover_views(dependency_views)
-            logger.info(f"Dependency views: {', '.join(dependency_views)}" if dependency_views else 'No dependency views')
-            for dep_view_name in dependency_views:
-                if dep_view_name not in self.athena._metadata.keys():
-                    print(f'Missing dependency view: {dep_view_name}, creating')
-                    logger.info(f'Missing dependency view: {dep_view_name}, creating')
-                self.create_or_update_view(dep_view_name, recursive=recursive, update=update)
         view_query = self.get_view_query(view_name=view_name)
         logger.debug(f'view_query: {view_query}')
         if view_name in self.athena._metadata.keys():
@@ -1810,6 +1976,7 @@ class Cid():
                 if view_definition.get('type') == 'Glue_Table':
                     print(f'Updating table {view_name}')
                     self.glue.create_or_update_table(view_name, view_query)
+                    self.athena.invalidate_table_metadata(view_name)
                 else:
                     if 'CREATE EXTERNAL TABLE' in view_query.upper():
                         logger.warning('Cannot recreate table {view_name}')
@@ -1825,6 +1992,7 @@ class Cid():
             logger.info(f'Creating view: "{view_name}"')
             if view_definition.get('type') == 'Glue_Table':
                 self.glue.create_or_update_table(view_name, view_query)
+                self.athena.invalidate_table_metadata(view_name)
                 logger.info(f'Table "{view_name}" created')
             elif 'CREATE EXTERNAL TABLE' in view_query.upper():
                 print(f'Creating table: "{view_name}"')
@@ -1,16 +1,90 @@
 import re
+import csv
+import base64
+import hashlib
 import json
 import time
 import logging
+import itertools
+from decimal import Decimal
+from typing import Iterator
+
+from botocore.config import Config
 
 from cid.base import CidBase
-from cid.helpers import S3
-from cid.utils import get_parameter, get_parameters, cid_print, isatty, unset_parameter, get_yesno_parameter
+from cid.helpers import S3, Glue
+from cid.utils import get_parameter, get_parameters, cid_print, isatty, unset_parameter, get_yesno_parameter, backoff, get_max_workers
 from cid.helpers.diff import diff
+from cid.helpers.cache import DiskCache
 from cid.exceptions import CidCritical, CidError
+from cid.profiler import profiler
 
 logger = logging.getLogger(__name__)
 
+# DDL that changes table metadata: CREATE [OR REPLACE] [EXTERNAL] TABLE|VIEW [IF [NOT] EXISTS] name, DROP ..., ALTER ...
+DDL_REGEX = re.compile(r'^(?:\s|--[^\n]*\n)*(?:CREATE|DROP|ALTER)\s+(?:OR\s+REPLACE\s+)?(?:EXTERNAL\s+)?(?:TABLE|VIEW)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?([\w."`]+)', re.IGNORECASE)
+
+# Conversion of Athena column types when reading typed results. All other types stay as strings.
+TYPE_CONVERTERS = {
+    'tinyint': int,
+    'smallint': int,
+    'integer': int,
+    'bigint': int,
+    'float': float,
+    'real': float,
+    'double': float,
+    'decimal': Decimal,
+    'boolean': lambda value: value.lower() == 'true',
+}
+
+
+class AthenaQuery():
+    """ A handle of an Athena query execution (future like)
+    """
+    def __init__(self, athena: 'Athena', query_id: str, sql: str, fail: bool=True, database: str=None, catalog: str=None) -> None:
+        self.athena = athena
+        self.id = query_id
+        self.sql = sql
+        self.fail = fail
+        self.database = database
+        self.catalog = catalog
+        self.execution = {}
+
+    @property
+    def state(self) -> str:
+        return self.execution.get('Status', {}).get('State', 'QUEUED')
+
+    def done(self) -> bool:
+        """ True if the query is finished """
+        return self.state in ['SUCCEEDED', 'FAILED', 'CANCELLED']
+
+    def wait(self, timeout: float=None) -> 'AthenaQuery':
+        """ Block until the query is finished """
+        self.athena.wait_for_queries([self], timeout=timeout)
+        return self
+
+    def result(self, timeout: float=None) -> str:
+        """ Wait for the query and return its id. Raise CidCritical (or return False if fail=False) if query failed """
+        if not self.done():
+            self.wait(timeout=timeout)
+        if self.state == 'SUCCEEDED':
+            return self.id
+        failure_reason = self.execution.get('Status', {}).get('StateChangeReason', repr(self.execution))
+        logger.info(f'Athena query failed: {failure_reason}')
+        logger.debug(f'Full query: {self.sql}')
+        if self.fail:
+            raise CidCritical(f'Query:\n{self.sql}\n\nAthena query status failed : {failure_reason}')
+        return False
+
+    def rows(self, include_header: bool=False) -> list:
+        """ Wait for the query and return its result as a table """
+        return list(self.iter_rows(include_header))
+
+    def iter_rows(self, include_header: bool=False, typed: bool=False) -> Iterator[list]:
+        """ Wait for the query and yield rows of its result page by page """
+        return self.athena.iter_query_results(self.result(), include_header=include_header, typed=typed)
+
+
 class Athena(CidBase):
     # Define defaults
     defaults = {
@@ -24,6 +98,9 @@ class Athena(CidBase):
     _metadata = dict()
     _resources = dict()
     _client = None
+    _s3 = None
+    _glue = None
+    _cache = DiskCache('athena-metadata')
 
     def __init__(self, session, resources: dict=None, database_name: str=None) -> None:
         super().__init__(session)
@@ -34,7 +111,8 @@ class Athena(CidBase):
     @property
     def client(self):
         if not self._client:
-            self._client = self.session.client('athena', region_name=self.region)
+            # the client is shared by concurrent workers, so the pool of connections must fit them all
+            self._client = self.session.client('athena', region_name=self.region, config=Config(max_pool_connections=max(10, get_max_workers())))
         return self._client
 
     @property
@@ -254,20 +332,46 @@ class Athena(CidBase):
                 logger.debug(exc, exc_info=True)
                 return None
 
-    def list_table_metadata(self, database_name: str=None, max_items: int=None) -> dict:
+    def _cache_bucket(self, database_name: str=None, catalog_name: str=None) -> str:
+        return f'{self.account_id}:{self.region}:{catalog_name or self.CatalogName}:{database_name or self.DatabaseName}'
+
+    def invalidate_table_metadata(self, table_name: str, database_name: str=None, catalog_name: str=None) -> None:
+        """ Remove a table from persistent cache. Must be called when a table or a view is created, changed or deleted """
+        logger.debug(f'Invalidating cached metadata of {database_name or self.DatabaseName}.{table_name}')
+        self._cache.invalidate(self._cache_bucket(database_name, catalog_name), [table_name, '*', 'search'])
+
+    def _invalidate_cache_after_ddl(self, query: 'AthenaQuery') -> None:
+        match = DDL_REGEX.match(query.sql)
+        if not match:
+            return
+        name = re.sub(r'["`]', '', match.group(1)).split('.')
+        self.invalidate_table_metadata(
+            table_name=name[-1],
+            database_name=name[-2] if len(name) > 1 else query.database,
+            catalog_name=query.catalog,
+        )
+
+    def _list_table_metadata(self, database_name: str=None, catalog_name: str=None, max_items: int=None) -> list:
+        """ returns a list of table metadata. Uses persistent cache """
+        bucket = self._cache_bucket(database_name, catalog_name)
+        cached = self._cache.get(bucket, '*')
+        if cached and (cached['max_items'] is None or (max_items and max_items <= cached['max_items'])):
+            return cached['tables'][:max_items]
         params = {
-            'CatalogName': self.CatalogName,
+            'CatalogName': catalog_name or self.CatalogName,
             'DatabaseName': database_name or self.DatabaseName,
             'PaginationConfig':{
                 'MaxItems': max_items,
             },
         }
+        table_metadata = list(self.client.get_paginator('list_table_metadata').paginate(**params).search('TableMetadataList'))
+        self._cache.set(bucket, '*', {'max_items': max_items, 'tables': table_metadata})
+        return table_metadata
+
+    def list_table_metadata(self, database_name: str=None, max_items: int=None) -> dict:
         table_metadata = list()
         try:
-            paginator = self.client.get_paginator('list_table_metadata')
-            response_iterator = paginator.paginate(**params)
-            for page in response_iterator:
-                table_metadata.extend(page.get('TableMetadataList'))
+            table_metadata = self._list_table_metadata(database_name=database_name, max_items=max_items)
             logger.debug(f'Table metadata: {table_metadata}')
             logger.info(f'Found {len(table_metadata)} tables in {database_name or self.DatabaseName}')
         except Exception as e:
@@ -284,8 +388,12 @@ class Athena(CidBase):
 
     def get_table_metadata(self, table_name: str, database_name: str=None, no_cache: bool=False) -> dict:
         table_metadata = None
+        bucket = self._cache_bucket(database_name)
         if not no_cache:
-            table_metadata = self._metadata.get(table_name)
+            table_metadata = self._metadata.get(table_name) or self._cache.get(bucket, table_name)
+            if not table_metadata: # maybe we have it in a cached list
+                cached_list = self._cache.get(bucket, '*') or {}
+                table_metadata = next((table for table in cached_list.get('tables', []) if table.get('Name') == table_name), None)
         if not table_metadata:
             params = {
                 'CatalogName': self.CatalogName,
@@ -293,82 +401,169 @@ class Athena(CidBase):
                 'TableName': table_name,
             }
             table_metadata = self.client.get_table_metadata(**params).get('TableMetadata')
-            self._metadata[table_name] = table_metadata
+            self._cache.set(bucket, table_name, table_metadata)
+        self._metadata[table_name] = table_metadata
 
         return table_metadata
 
 
-    def execute_query(self, sql_query, sleep_duration=1, database: str=None, catalog: str=None, fail: bool=True) -> str:
-        """ Executes an AWS Athena Query """
+    def start_query(self, sql_query, database: str=None, catalog: str=None, fail: bool=True) -> 'AthenaQuery':
+        """ Starts an AWS Athena Query and returns a handle without waiting for completion """
 
         # Set execution context
         execution_context = {
             'Database': database or self.DatabaseName,
             'Catalog': catalog or self.CatalogName,
         }
-
-        try:
-            # Start Athena query
-            response = self.client.start_query_execution(
-                QueryString=sql_query,
-                QueryExecutionContext=execution_context,
-                WorkGroup=self.WorkGroup
-            )
-
-            # Get Query ID
-            query_id = response.get('QueryExecutionId')
-            if not query_id:
+        delays = backoff(initial=1, maximum=10)
+        while True:
+            try:
+                # Start Athena query
+                response = self.client.start_query_execution(
+                    QueryString=sql_query,
+                    QueryExecutionContext=execution_context,
+                    WorkGroup=self.WorkGroup
+                )
+                break
+            except self.client.exceptions.TooManyRequestsException as exc:
+                delay = next(delays)
+                if delay >= 10: # give up after too many attempts
+                    logger.debug(f'Full query: {sql_query}')
+                    raise CidCritical(f'TooManyRequestsException: {exc}') from exc
+                logger.debug(f'Too many concurrent Athena queries. Retrying in {delay}s')
+                time.sleep(delay)
+            except self.client.exceptions.InvalidRequestException as exc:
                 logger.debug(f'Full query: {sql_query}')
-                raise CidCritical(f'Athena cannot start query. Answer is: {response}')
-            # Get Query Status for the first time
-            query_status = self.client.get_query_execution(QueryExecutionId=query_id)
-        except self.client.exceptions.InvalidRequestException as exc:
-            logger.debug(f'Full query: {sql_query}')
-            raise CidCritical(f'InvalidRequestException: {exc}') from exc
-        except Exception as exc:
-            logger.debug(f'Full query: {sql_query}')
-            raise CidCritical(f'Query:\n{sql_query}\n\nAthena query failed: {exc}') from exc
-
-        current_status = query_status['QueryExecution']['Status']['State']
+                raise CidCritical(f'InvalidRequestException: {exc}') from exc
+            except Exception as exc:
+                logger.debug(f'Full query: {sql_query}')
+                raise CidCritical(f'Query:\n{sql_query}\n\nAthena query failed: {exc}') from exc
 
-        # Poll for the current status of query as long as its not finished
-        while current_status in ['SUBMITTED', 'RUNNING', 'QUEUED']:
-            response = self.client.get_query_execution(QueryExecutionId=query_id)
-            current_status = response['QueryExecution']['Status']['State']
+        # Get Query ID
+        query_id = response.get('QueryExecutionId')
+        if not query_id:
+            logger.debug(f'Full query: {sql_query}')
+            raise CidCritical(f'Athena cannot start query. Answer is: {response}')
+        return AthenaQuery(
+            athena=self,
+            query_id=query_id,
+            sql=sql_query,
+            fail=fail,
+            database=execution_context['Database'],
+            catalog=execution_context['Catalog'],
+        )
 
-            # Sleep before polling again
-            time.sleep(sleep_duration)
+    def wait_for_queries(self, queries: list, max_interval: float=1, timeout: float=None) -> list:
+        """ Poll a list of query handles until all of them are finished.
+        Uses batch_get_query_execution and polls fast first, then with growing intervals up to max_interval.
+        """
+        deadline = time.time() + timeout if timeout else None
+        delays = backoff(maximum=max_interval)
+        while True:
+            pending = {query.id: query for query in queries if not query.done()}
+            if not pending:
+                break
+            ids = list(pending.keys())
+            for i in range(0, len(ids), 50): # max batch size for batch_get_query_execution
+                try:
+                    response = self.client.batch_get_query_execution(QueryExecutionIds=ids[i:i+50])
+                except Exception as exc:
+                    raise CidCritical(f'Cannot get status of Athena queries: {exc}') from exc
+                for execution in response.get('QueryExecutions', []):
+                    query = pending[execution['QueryExecutionId']]
+                    query.execution = execution
+                    if query.done():
+                        self._invalidate_cache_after_ddl(query)
+                        if profiler.enabled:
+                            profiler.record_athena_query(execution)
+                for unprocessed in response.get('UnprocessedQueryExecutionIds', []):
+                    logger.debug(f'Cannot get status of {unprocessed.get("QueryExecutionId")}: {unprocessed.get("ErrorMessage")}. Will retry.')
+            if all(query.done() for query in pending.values()):
+                break
+            if deadline and time.time() > deadline:
+                raise CidCritical(f'Timeout while waiting for Athena queries: {[q.id for q in pending.values() if not q.done()]}')
+            time.sleep(next(delays))
+        return queries
 
-        if current_status == "SUCCEEDED":
-            return query_id
-        failure_reason = response.get('QueryExecution', {}).get('Status', {}).get('StateChangeReason',repr(response))
-        logger.info(f'Athena query failed: {failure_reason}')
-        logger.debug(f'Full query: {sql_query}')
-        if fail:
-            raise CidCritical(f'Query:\n{sql_query}\n\nAthena query status failed : {failure_reason}')
-        return False
+    def execute_queries(self, sql_queries: list, database: str=None, catalog: str=None, fail: bool=True) -> list:
+        """ Submit several independent queries at once and wait for all of them. Returns the list of query handles """
+        queries = [self.start_query(sql, database=database, catalog=catalog, fail=fail) for sql in sql_queries]
+        return self.wait_for_queries(queries)
 
-    def get_query_results(self, query_id):
-        """ Get Query Results """
+    def execute_query(self, sql_query, sleep_duration=1, database: str=None, catalog: str=None, fail: bool=True) -> str:
+        """ Executes an AWS Athena Query """
+        query = self.start_query(sql_query, database=database, catalog=catalog, fail=fail)
+        self.wait_for_queries([query], max_interval=sleep_duration)
+        return query.result()
+
+    def iter_query_results(self, query_id: str, include_header: bool=False, typed: bool=False, page_size: int=1000) -> Iterator[list]:
+        """ Yield rows of a query result page by page, so only one page is kept in memory.
+        The first row of DML results is a header; include_header=True keeps it (needed for DDL like SHOW CREATE).
+        With typed=True values are converted according to ResultSetMetadata and NULLs are returned as None.
+        Results that do not fit in one page are read from the result file on S3 if possible (see _iter_results_from_s3).
+        """
+        if not query_id: # failed query with fail=False
+            return
         paginator = self.client.get_paginator("get_query_results")
-        return paginator.paginate(QueryExecutionId=query_id).build_full_result()
+        pages = iter(paginator.paginate(QueryExecutionId=query_id, PaginationConfig={'PageSize': page_size}))
+        first_page = next(pages, None)
+        if not first_page:
+            return
+        columns = first_page['ResultSet'].get('ResultSetMetadata', {}).get('ColumnInfo', [])
+        rows = None
+        if first_page.get('NextToken'):
+            rows = self._iter_results_from_s3(query_id)
+        if rows is None:
+            rows = (
+                [data.get('VarCharValue') for data in row['Data']]
+                for page in itertools.chain([first_page], pages)
+                for row in page['ResultSet']['Rows']
+            )
+        converters = [TYPE_CONVERTERS.get(column.get('Type', '').lower(), str) for column in columns]
+        for index, row in enumerate(rows):
+            if index == 0 and not include_header:
+                continue
+            if not typed or index == 0: # header is never converted
+                yield [value if value is not None else '' for value in row]
+                continue
+            yield [
+                None if value is None or (value == '' and converter is not str) else converter(value)
+                for converter, value in zip(converters or [str] * len(row), row)
+            ]
+
+    def _iter_results_from_s3(self, query_id: str) -> Iterator[list]:
+        """ Returns an iterator over rows of the result csv file of a DML query, or None if file cannot be read.
+        Concurrent ranged GETs of the result file are much faster than paging GetQueryResults for large results.
+        """
+        if get_parameters().get('athena-results-from-s3', 'yes').lower() in ['no', 'false']:
+            return None
+        try:
+            execution = self.client.get_query_execution(QueryExecutionId=query_id)['QueryExecution']
+            output_location = execution.get('ResultConfiguration', {}).get('OutputLocation', '')
+            if execution.get('StatementType') != 'DML' or not output_location.startswith('s3://') or not output_location.endswith('.csv'):
+                return None
+            bucket, key = output_location[len('s3://'):].split('/', 1)
+            if not self._s3:
+                self._s3 = S3(session=self.session)
+            rows = csv.reader(self._s3.open_text(bucket, key, max_workers=get_max_workers()))
+            header = next(rows) # fail early if the file is not accessible
+        except Exception as exc: # pylint: disable=broad-except
+            logger.debug(f'Cannot read results of {query_id} from s3, falling back to GetQueryResults: {exc}')
+            return None
+        logger.debug(f'Reading results of {query_id} from {output_location}')
+        return itertools.chain([header], rows)
 
-    def parse_response_as_table(self, response, include_header=False):
-        """ Return a query response as a table. """
-        result = []
-        starting_row = 0 if include_header else 1
-        for row in response['ResultSet']['Rows'][starting_row:]:
-            result.append([data.get('VarCharValue', '') for data in row['Data']])
-        return result
+    def query_iter(self, sql, include_header=False, typed=False, **kwargs) -> Iterator[list]:
+        """ Execute Athena Query and yield rows of a result """
+        logger.debug(f'query={sql}')
+        execution_id = self.execute_query(sql, **kwargs) # not lazy: executed before the first row is requested
+        return self.iter_query_results(execution_id, include_header=include_header, typed=typed)
 
     def query(self, sql, include_header=False, **kwargs) -> list:
         """ Execute Athena Query and return a result"""
-        logger.debug(f'query={sql}')
-        execution_id = self.execute_query(sql, **kwargs)
-        results = self.get_query_results(execution_id)
-        #logger.debug(f'results = {json.dumps(results, indent=2)}')
-        parsed = self.parse_response_as_table(results, include_header)
-        logger.debug(f'parsed res = {json.dumps(parsed, indent=2)}')
+        parsed = list(self.query_iter(sql, include_header=include_header, **kwargs))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'parsed res = {json.dumps(parsed, indent=2, default=str)}')
         return parsed
 
 
@@ -444,21 +639,18 @@ class Athena(CidBase):
 
     def get_view_diff(self, name, sql):
         """ returns a diff between existing and new views. """
-        tmp_name = 'cid_tmp_deleteme'
+        tmp_name = 'cid_tmp_deleteme_' + re.sub(r'\W', '_', name) # unique per view as views can be processed concurrently
         existing_sql = ''
-        try:
-            existing_sql = self.query(f'SHOW CREATE VIEW {name}', include_header=True)
-            existing_sql = '\n'.join([line[0] for line in existing_sql][1:])
-        except Exception as exc:
-            print(exc)
-            return None
         try:
             # Avoid difference in the first line of diff (replace name of the view with the tmp_name)
             tmp_sql = re.sub(r'(CREATE OR REPLACE VIEW) (.+?) (AS.*)', r'\1 ' + tmp_name +  r' \3', sql)
 
             if tmp_sql == sql:
                 raise CidError(f"Cannot get diff: same sql {repr(sql)}")
-            self.query(tmp_sql)
+            # Read the existing view and create the temporary one at the same time
+            show_existing, create_tmp = self.execute_queries([f'SHOW CREATE VIEW {name}', tmp_sql])
+            existing_sql = '\n'.join([line[0] for line in show_existing.rows(include_header=True)][1:])
+            create_tmp.result()
             tmp_sql = self.query(f'SHOW CREATE VIEW {tmp_name}', include_header=True)
             tmp_sql = '\n'.join([line[0] for line in tmp_sql][1:])
         except Exception as exc:
@@ -475,7 +667,91 @@ class Athena(CidBase):
         return diff(existing_sql, tmp_sql)
 
 
+    @staticmethod
+    def _find_view_dependencies(sql: str) -> list:
+        """ returns names of objects used in FROM of a view sql (without database) """
+        deps = []
+        for dep_view in re.findall(r'FROM\W+?([\w."]+)', sql):
+            #FIXME: need to add cross Database Dependencies
+            if dep_view.upper() in ('SELECT', 'VALUES'): # remove "FROM SELECT" and "FROM VALUES"
+                continue
+            dep_view = dep_view.replace('"', '').split('.')[-1]
+            if dep_view not in deps:
+                deps.append(dep_view)
+        return deps
+
+    @staticmethod
+    def _decode_view_text(view_original_text: str) -> str:
+        """ returns the original sql of a view from Glue ViewOriginalText ('/* Presto View: <base64 json> */') """
+        match = re.match(r'^/\* Presto View: (.*) \*/$', (view_original_text or '').strip(), re.DOTALL)
+        if not match:
+            return view_original_text or ''
+        try:
+            return json.loads(base64.b64decode(match.group(1))).get('originalSql', '')
+        except (ValueError, TypeError) as exc:
+            logger.debug(f'Cannot decode view text: {exc}')
+            return view_original_text
+
+    def _get_tables_from_glue(self) -> dict:
+        """ returns types and view sql of all tables in the current database: {name: {'type': 'view'|'table', 'sql': ...}}
+        """
+        tables = {}
+        paginator = self.glue.client.get_paginator('get_tables')
+        for page in paginator.paginate(CatalogId=self.account_id, DatabaseName=self.DatabaseName):
+            for table in page['TableList']:
+                if table.get('TableType') == 'VIRTUAL_VIEW':
+                    tables[table['Name']] = {'type': 'view', 'sql': self._decode_view_text(table.get('ViewOriginalText'))}
+                else:
+                    tables[table['Name']] = {'type': 'table'}
+        return tables
+
     def process_views(self, views):
+        """ returns a dict of discovered views. Going to each view and try to discover recursively all "FROM" dependanices
+        Types and dependencies are discovered with bulk Glue calls, then definitions are fetched with concurrent queries.
+        """
+        tables = None
+        if self.CatalogName == 'AwsDataCatalog':
+            try:
+                tables = self._get_tables_from_glue()
+            except self.glue.client.exceptions.ClientError as exc:
+                logger.debug(f'Cannot list tables in Glue, will query Athena for each view: {exc}')
+        if tables is None:
+            return self._process_views_one_by_one(views)
+
+        all_views = {}
+        types = {}
+        def _recursively_process_view(view):
+            table = tables.get(view.lower())
+            if not table:
+                logger.debug(f'{view} not a view and not a table. Skipping.')
+                return
+            types[view] = table['type']
+            cid_print(f"    Processing Athena {table['type']}: <BOLD>{view}<END>")
+            all_views[view] = {}
+            if table['type'] != 'view':
+                return
+            dependencies = []
+            for dep_view in self._find_view_dependencies(table['sql']):
+                if dep_view not in all_views:
+                    _recursively_process_view(dep_view)
+                if dep_view in all_views:
+                    dependencies.append(dep_view)
+            if dependencies:
+                all_views[view]['dependsOn'] = {'views': dependencies}
+
+        for view in views:
+            if view not in all_views:
+                _recursively_process_view(view)
+
+        names = list(all_views)
+        queries = self.execute_queries([f'SHOW CREATE {types[name].upper()} {name}' for name in names])
+        for name, query in zip(names, queries):
+            sql = '\n'.join([line[0] for line in query.rows(include_header=True)])
+            if sql:
+                all_views[name]['data'] = sql.rstrip()
+        return all_views
+
+    def _process_views_one_by_one(self, views):
         """ returns a dict of discovered views. Going to each view and try to discover recursively all "FROM" dependanices
         """
         all_views = {}
@@ -498,18 +774,9 @@ class Athena(CidBase):
                 if not sql:
                     return
                 sql = '\n'.join([line[0] for line in sql])
-                #print("sql", sql)
                 all_views[view]["dependsOn"] = {}
                 all_views[view]["dependsOn"]['views'] = []
-                deps = re.findall(r'FROM\W+?([\w."]+)', sql)
-                for dep_view in deps:
-                    #FIXME: need to add cross Database Dependencies
-                    if dep_view.upper() in ('SELECT', 'VALUES'): # remove "FROM SELECT" and "FROM VALUES"
-                        continue
-                    dep_view = dep_view.replace('"', '')
-                    if len(dep_view.split('.')) == 2:
-                        dep_database, dep_view_name = dep_view.split('.')
-                    dep_view = dep_view.split('.')[-1]
+                for dep_view in self._find_view_dependencies(sql):
                     if dep_view not in all_views:
                         _recursively_process_view(dep_view)
                     if dep_view not in all_views[view]["dependsOn"]['views'] and dep_view in all_views:
@@ -529,8 +796,68 @@ class Athena(CidBase):
 
         return all_views
 
-    def create_or_update_view(self, view_name, view_query):
+    @property
+    def glue(self) -> Glue:
+        if not self._glue:
+            self._glue = Glue(session=self.session)
+        return self._glue
+
+    @staticmethod
+    def _sql_hash(sql: str) -> str:
+        return hashlib.sha256((sql or '').strip().encode()).hexdigest()
+
+    def _get_view_hashes(self, view_name: str) -> dict:
+        """ returns hashes stored by cid in the view parameters and a hash of the current view text.
+        Always reads from Glue, as the view can be replaced by someone else.
+        """
+        if self.CatalogName != 'AwsDataCatalog': # ledger is only supported for the Glue catalog of this account
+            return {}
+        try:
+            table = self.glue.get_table(name=view_name, catalog=self.account_id, database=self.DatabaseName)
+        except self.glue.client.exceptions.ClientError as exc:
+            logger.debug(f'Cannot read view hash of {view_name}: {exc}')
+            return {}
+        return {
+            'sql': table.get('Parameters', {}).get('cid_sql_hash'),
+            'text': table.get('Parameters', {}).get('cid_view_text_hash'),
+            'current_text': self._sql_hash(table.get('ViewOriginalText')),
+            'parameters': table.get('Parameters', {}),
+        }
+
+    def get_view_parameters(self, view_name: str) -> dict:
+        """ returns parameters recorded by cid with the view, or an empty dict if the view was modified after that """
+        hashes = self._get_view_hashes(view_name)
+        if not hashes.get('text') or hashes['text'] != hashes['current_text']:
+            return {}
+        return hashes['parameters']
+
+    def view_is_unchanged(self, view_name: str, view_query: str) -> bool:
+        """ True if the view was deployed by cid from the same query and was not modified after that """
+        hashes = self._get_view_hashes(view_name)
+        return bool(hashes.get('sql')) and hashes['sql'] == self._sql_hash(view_query) and hashes['text'] == hashes['current_text']
+
+    def record_view_hash(self, view_name: str, view_query: str, parameters: dict=None) -> None:
+        """ store the hash of the query and optional parameters in the view parameters, so next deployment can skip the diff """
+        if self.CatalogName != 'AwsDataCatalog':
+            return
+        try:
+            table = self.glue.get_table(name=view_name, catalog=self.account_id, database=self.DatabaseName)
+            self.glue.update_table_parameters(
+                name=view_name,
+                catalog=self.account_id,
+                database=self.DatabaseName,
+                parameters=dict(parameters or {}, **{
+                    'cid_sql_hash': self._sql_hash(view_query),
+                    'cid_view_text_hash': self._sql_hash(table.get('ViewOriginalText')),
+                }),
+                table=table,
+            )
+        except self.glue.client.exceptions.ClientError as exc:
+            logger.debug(f'Cannot record view hash of {view_name}: {exc}')
+
+    def create_or_update_view(self, view_name, view_query, parameters: dict=None):
         """ update view while asking user
+        parameters: optional dict of strings stored with the view (in Glue table parameters)
         """
         update_view = None
         # first understand if view exists
@@ -538,6 +865,10 @@ class Athena(CidBase):
         logger.trace(str(list(self._metadata.keys())))
         if view_name not in self._metadata:
             update_view = True
+        elif get_parameters().get('on-drift', 'show').lower() != 'override' and isatty() and self.view_is_unchanged(view_name, view_query):
+            cid_print(f'No need to update {view_name}. Skipping.')
+            if parameters:
+                self.record_view_hash(view_name, view_query, parameters)
         else: # view exists
             while get_parameters().get('on-drift', 'show').lower() != 'override' and isatty():
                 cid_print(f'Analyzing view {view_name}')
@@ -574,10 +905,12 @@ class Athena(CidBase):
                     update_view = True
                 elif diff and not diff['diff']:
                     cid_print(f'No need to update {view_name}. Skipping.')
+                    self.record_view_hash(view_name, view_query, parameters)
                 break
         if update_view:
             cid_print(f'Updating view: "{view_name}"')
             self.execute_query(view_query)
+            self.record_view_hash(view_name, view_query, parameters)
 
 
     def find_tables_with_columns_in_information_schema(self, columns):
@@ -600,19 +933,49 @@ class Athena(CidBase):
             COUNT(DISTINCT column_name) = {len(columns)}
         ''')
 
+    @staticmethod
+    def _glue_table_to_metadata(table: dict) -> dict:
+        """ Glue table in the format of Athena TableMetadata """
+        def _columns(columns):
+            return [{key: column[key] for key in ('Name', 'Type', 'Comment') if key in column} for column in columns]
+        return {
+            'Name': table['Name'],
+            'CreateTime': table.get('CreateTime'),
+            'LastAccessTime': table.get('LastAccessTime'),
+            'TableType': table.get('TableType'),
+            'Columns': _columns(table.get('StorageDescriptor', {}).get('Columns', [])),
+            'PartitionKeys': _columns(table.get('PartitionKeys', [])),
+            'Parameters': table.get('Parameters', {}),
+        }
+
+    def _find_tables_with_columns_in_glue(self, columns: list, database_name: str=None, catalog_name: str=None) -> list:
+        """ returns metadata of tables containing all columns. Uses Glue search and persistent cache per database """
+        bucket = self._cache_bucket(database_name, catalog_name)
+        key = ','.join(columns)
+        cached = self._cache.get(bucket, 'search') or {}
+        if key not in cached:
+            tables = self.glue.find_tables_with_columns(columns, database=database_name or self.DatabaseName, catalog=self.account_id)
+            cached[key] = [self._glue_table_to_metadata(table) for table in tables]
+            self._cache.set(bucket, 'search', cached)
+        return cached[key]
+
     def find_tables_with_columns(self, columns: list, database_name: str=None, catalog_name: str=None, max_items: int=10000):
         """ Returns an iterator that yields only tables containing all specified columns.
+        Tables of Glue Data Catalog are searched in Glue, so full metadata is transferred only for candidates (--table-discovery athena to disable).
         """
-        iterator = self.client.get_paginator('list_table_metadata').paginate(
-            DatabaseName=database_name or self.DatabaseName,
-            CatalogName=catalog_name or self.CatalogName,
-            PaginationConfig= {
-                'MaxItems': max_items, # sometimes customers can have 1'000s of tables (due to a crawler going crazy for example)
-            },
+        if (catalog_name or self.CatalogName) == 'AwsDataCatalog' and get_parameters().get('table-discovery', 'glue') != 'athena':
+            try:
+                yield from self._find_tables_with_columns_in_glue(columns, database_name, catalog_name)
+                return
+            except self.glue.client.exceptions.ClientError as exc:
+                logger.debug(f'Cannot search tables in Glue, will list table metadata in Athena: {exc}')
+        tables = self._list_table_metadata(
+            database_name=database_name,
+            catalog_name=catalog_name,
+            max_items=max_items, # sometimes customers can have 1'000s of tables (due to a crawler going crazy for example)
         )
         # We cannot rely on search to find directly columns as there might be Nulls. So iterating old fashion.
-        for table in iterator.search('TableMetadataList'):
+        for table in tables:
             column_names = [c['Name'] for c in table.get('Columns', [])]
             if all([(col in column_names) for col in columns]):
                 yield table
-
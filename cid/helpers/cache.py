@@ -0,0 +1,134 @@
+""" Persistent cache on a local disk.
+
+Cache survives between cid-cmd runs. Each bucket is a json file with entries and their timestamps.
+Use --no-cache to bypass it.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import datetime
+import threading
+
+from cid.utils import get_parameters, exec_env
+
+logger = logging.getLogger(__name__)
+
+
+def get_cache_dir() -> str:
+    """ returns a folder for cache files """
+    if os.environ.get('CID_CACHE_DIR'):
+        return os.environ['CID_CACHE_DIR']
+    if exec_env()['terminal'] == 'lambda': # only /tmp is writable in lambda
+        return os.path.join(tempfile.gettempdir(), 'cid-cache')
+    return os.path.join(os.path.expanduser('~'), '.cid', 'cache')
+
+
+def cache_disabled() -> bool:
+    """ True if user requested --no-cache """
+    return str(get_parameters().get('no-cache', False)).lower() in ['true', 'yes', '1']
+
+
+def _json_default(obj):
+    if isinstance(obj, datetime.datetime):
+        return {'__datetime__': obj.isoformat()}
+    if isinstance(obj, datetime.date):
+        return {'__date__': obj.isoformat()}
+    raise TypeError(f'{type(obj)} is not serializable')
+
+
+def _json_object_hook(obj):
+    if '__datetime__' in obj and len(obj) == 1:
+        return datetime.datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj and len(obj) == 1:
+        return datetime.date.fromisoformat(obj['__date__'])
+    return obj
+
+
+def json_dumps(obj) -> str:
+    """ serialize to json with support of dates """
+    return json.dumps(obj, default=_json_default)
+
+
+def json_loads(text: str):
+    """ deserialize json produced by json_dumps """
+    return json.loads(text, object_hook=_json_object_hook)
+
+
+class DiskCache():
+    """ A key/value cache grouped in buckets. Each bucket is a file.
+    """
+    _lock = threading.RLock()
+
+    def __init__(self, namespace: str, ttl: int=None) -> None:
+        self.namespace = namespace
+        self._ttl = ttl
+        self._buckets = {}
+
+    @property
+    def ttl(self) -> int:
+        """ time to live in seconds. An explicit ttl of the cache wins over --cache-ttl (default 900) """
+        if self._ttl is not None:
+            return self._ttl
+        return int(get_parameters().get('cache-ttl') or 900)
+
+    @property
+    def enabled(self) -> bool:
+        return not cache_disabled()
+
+    def _path(self, bucket: str) -> str:
+        name = hashlib.sha256(bucket.encode()).hexdigest()
+        return os.path.join(get_cache_dir(), self.namespace, f'{name}.json')
+
+    def _load(self, bucket: str) -> dict:
+        if bucket not in self._buckets:
+            data = {}
+            try:
+                with open(self._path(bucket), encoding='utf-8') as file_:
+                    data = json.load(file_, object_hook=_json_object_hook)
+            except FileNotFoundError:
+                pass
+            except Exception as exc: # pylint: disable=broad-except
+                logger.debug(f'Cannot read cache {bucket}: {exc}')
+            self._buckets[bucket] = data
+        return self._buckets[bucket]
+
+    def _save(self, bucket: str) -> None:
+        path = self._path(bucket)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file_:
+                json.dump(self._buckets.get(bucket, {}), file_, default=_json_default)
+            os.replace(tmp_path, path) # atomic
+        except Exception as exc: # pylint: disable=broad-except
+            logger.debug(f'Cannot write cache {bucket}: {exc}')
+
+    def get(self, bucket: str, key: str, default=None):
+        """ returns a cached value or default if missing or expired """
+        if not self.enabled:
+            return default
+        with self._lock:
+            entry = self._load(bucket).get(key)
+        if not entry or time.time() - entry.get('time', 0) > self.ttl:
+            return default
+        logger.debug(f'Using cached {self.namespace} {bucket} {key}')
+        return entry.get('value')
+
+    def set(self, bucket: str, key: str, value) -> None:
+        """ store a value """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._load(bucket)[key] = {'time': time.time(), 'value': value}
+            self._save(bucket)
+
+    def invalidate(self, bucket: str, keys: list=None) -> None:
+        """ remove given keys from a bucket or the whole bucket if keys are not provided """
+        with self._lock:
+            data = self._load(bucket)
+            for key in (keys if keys is not None else list(data.keys())):
+                data.pop(key, None)
+            self._save(bucket)
@@ -1,11 +1,13 @@
 """ Manage AWS CUR
 """
+import re
 import json
 import logging
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from cid.base import CidBase
-from cid.utils import get_parameter, get_parameters, set_parameters, cid_print
+from cid.utils import get_parameter, get_parameters, set_parameters, cid_print, isatty, get_max_workers
 from cid.exceptions import CidCritical
 from cid.helpers.cur_proxy import ProxyView
 
@@ -13,6 +15,10 @@ from tqdm import tqdm
 
 logger = logging.getLogger(__name__)
 
+# databases that most likely contain CUR. Scanned first
+LIKELY_CUR_DATABASES = ['cid_cur', 'cid_data_export']
+LIKELY_CUR_DATABASE_REGEX = re.compile(r'^athenacurcfn|(^|_)cur(\d|_|$)|data_export') # athenacurcfn_* is created by CUR CloudFormation template
+
 
 class AbstractCUR(CidBase):
     """ Manage AWS CUR
@@ -59,9 +65,33 @@ class AbstractCUR(CidBase):
         'savings_plan_offering_type',
         'savings_plan_payment_option'
     ]
+    # types of columns that do not follow naming conventions (see get_type_of_column)
+    special_column_types = {
+        "cost_category": "MAP",
+        "discount": "MAP",
+        "product": "MAP",
+        "resource_tags": "MAP",
+        "reservation_amortized_upfront_fee_for_billing_period": "DOUBLE",
+        "reservation_unused_amortized_upfront_fee_for_billing_period": "DOUBLE",
+        "reservation_upfront_value": "DOUBLE",
+        "reservation_net_amortized_upfront_fee_for_billing_period": "DOUBLE",
+        "reservation_net_unused_amortized_upfront_fee_for_billing_period": "DOUBLE",
+        "reservation_net_upfront_value": "DOUBLE",
+        "savings_plan_total_commitment_to_date": "DOUBLE",
+        "savings_plan_savings_plan_rate": "DOUBLE",
+        "savings_plan_used_commitment": "DOUBLE",
+        "savings_plan_amortized_upfront_commitment_for_billing_period": "DOUBLE",
+        "savings_plan_net_amortized_upfront_commitment_for_billing_period": "DOUBLE",
+        "savings_plan_recurring_commitment_for_billing_period": "DOUBLE",
+    }
+    double_column_endings = ('_cost', '_factor', '_quantity', '_fee', '_amount', '_discount', '_usage', '_usage_ratio')
     _metadata = None
     _database = None
     _tag_and_cost_category = None
+    _column_index = None
+    _column_index_signature = None
+    _fields = None
+    _tag_fields = None
 
     def __init__(self, athena, glue):
         self.athena = athena
@@ -85,56 +115,65 @@ class AbstractCUR(CidBase):
     @property
     def has_resource_ids(self) -> bool:
         """ Return True if CUR has resource ids """
-        return 'line_item_resource_id' in self.fields
+        return self.column_exists('line_item_resource_id')
 
     @property
     def has_reservations(self) -> bool:
         """ Return True if CUR has reservation fields """
-        return all(col in self.fields for col in self.ri_required_columns)
+        return all(self.column_exists(col) for col in self.ri_required_columns)
 
     @property
     def has_savings_plans(self) -> bool:
         """ Return True if CUR has savings plan """
-        return all(col in self.fields for col in self.sp_required_columns)
+        return all(self.column_exists(col) for col in self.sp_required_columns)
 
     @property
     def version(self) -> str:
         """ Return version of CUR """
-        return '2' if 'bill_payer_account_name' in self.fields else '1'
+        return '2' if self.column_exists('bill_payer_account_name') else '1'
 
     def get_type_of_column(self, column: str, version=None):
-        """ Return an Athena type of a given non existent CUR column """
-        if column.startswith('cost_category_') or column.startswith('resource_tags_'):
+        """ Return an Athena type of a CUR column. Types of missing columns are guessed from their names """
+        if version is None or version == self.version:
+            existing = self.column_index.get(column.lower())
+            if existing and existing.get('type'):
+                return existing['type'].upper()
+        if column.startswith(('cost_category_', 'resource_tags_')):
             return 'STRING'
-        for ending in ['_cost', '_factor', '_quantity', '_fee', '_amount', '_discount', '_usage', '_usage_ratio']:
-            if column.endswith(ending):
-                return 'DOUBLE'
+        if column.endswith(self.double_column_endings):
+            return 'DOUBLE'
         if column.endswith('_date') and not column.endswith('_to_date'):
             return 'TIMESTAMP'
         if column.endswith('_time') and (version or self.version) == '2':
             return 'STRING' # yes, they are string
-        special_cases = {
-            "cost_category": "MAP",
-            "discount": "MAP",
-            "product": "MAP",
-            "resource_tags": "MAP",
-            "reservation_amortized_upfront_fee_for_billing_period": "DOUBLE",
-            "reservation_unused_amortized_upfront_fee_for_billing_period": "DOUBLE",
-            "reservation_upfront_value": "DOUBLE",
-            "reservation_net_amortized_upfront_fee_for_billing_period": "DOUBLE",
-            "reservation_net_unused_amortized_upfront_fee_for_billing_period": "DOUBLE",
-            "reservation_net_upfront_value": "DOUBLE",
-            "savings_plan_total_commitment_to_date": "DOUBLE",
-            "savings_plan_savings_plan_rate": "DOUBLE",
-            "savings_plan_used_commitment": "DOUBLE",
-            "savings_plan_amortized_upfront_commitment_for_billing_period": "DOUBLE",
-            "savings_plan_net_amortized_upfront_commitment_for_billing_period": "DOUBLE",
-            "savings_plan_recurring_commitment_for_billing_period": "DOUBLE",
-        }
-        return special_cases.get(column, 'STRING')
+        return self.special_column_types.get(column, 'STRING')
+
+    @property
+    def column_index(self) -> dict:
+        """ Returns a case insensitive index of columns: {lower_name: {'name', 'type', 'partition'}}.
+        The index is rebuilt when metadata is replaced or columns are added.
+        """
+        metadata = self.metadata
+        columns = metadata.get('Columns', [])
+        partitions = metadata.get('PartitionKeys', [])
+        signature = (id(metadata), id(columns), len(columns), id(partitions), len(partitions))
+        if self._column_index is None or self._column_index_signature != signature:
+            index = {}
+            for is_partition, cols in ((False, columns), (True, partitions)):
+                for col in cols:
+                    index.setdefault(col.get('Name').lower(), {'name': col.get('Name'), 'type': col.get('Type'), 'partition': is_partition})
+            self._fields = [col.get('Name') for col in columns + partitions]
+            self._tag_fields = [field for field in self._fields if field.startswith(('resource_tags_', 'cost_category_'))]
+            self._column_index = index
+            self._column_index_signature = signature
+        return self._column_index
+
+    def invalidate_column_index(self) -> None:
+        """ Force rebuild of the column index """
+        self._column_index = None
 
     def column_exists(self, column:  str):
-        return column.lower() in [col.lower() for col in self.fields]
+        return column.lower() in self.column_index
 
     def ensure_columns(self, columns):
         if not isinstance(columns, list):
@@ -171,13 +210,15 @@ class AbstractCUR(CidBase):
     @property
     def fields(self) -> list:
         """get CUR fields """
-        return [col.get('Name') for col in (self.metadata.get('Columns', []) + self.metadata.get('PartitionKeys', []))]
+        self.column_index # make sure the list is up to date
+        return self._fields
 
     @property
     def tag_and_cost_category_fields(self) -> list:
         """ Returns all SQL selectable fields with tags and cost category."""
         if self.version == '1':
-            return [field for field in self.fields if field.startswith('resource_tags_') or field.startswith('cost_category_')]
+            self.column_index # make sure the list is up to date
+            return self._tag_fields
         elif self.version == '2':
             if self._tag_and_cost_category is not None: # the query can take few mins so we try to cache it
                 logging.debug(f'Using cached tags.')
@@ -186,7 +227,7 @@ class AbstractCUR(CidBase):
             self._tag_and_cost_category = []
             number_of_rows_scanned = 500000 # empiric value
             for tag_type in ['resource_tags', 'cost_category']:
-                if tag_type not in self.fields:
+                if not self.column_exists(tag_type):
                     logging.debug(f'skipping {tag_type} scan')
                 cid_print(f'Scanning {tag_type} in {self.table_name}.')
                 try:
@@ -245,6 +286,41 @@ class CUR(AbstractCUR):
     def set_cur(self, database: str=None, table: str=None):
         self._database, self._metadata = self.find_cur(database, table)
 
+    @staticmethod
+    def _database_priority(database: str) -> int:
+        """ order of scanning databases. Lower is more likely to contain CUR """
+        if database in LIKELY_CUR_DATABASES:
+            return LIKELY_CUR_DATABASES.index(database)
+        if LIKELY_CUR_DATABASE_REGEX.search(database):
+            return len(LIKELY_CUR_DATABASES)
+        return len(LIKELY_CUR_DATABASES) + 1
+
+    def _find_cur_tables(self, databases: list) -> list:
+        """ returns (database, table) of CUR tables found in databases. Databases are scanned concurrently in the given order """
+        def _find(database):
+            try:
+                tables = self.athena.find_tables_with_columns(
+                    columns=self.cur_minimal_required_columns,
+                    database_name=database,
+                )
+                return [(database, table['Name']) for table in tables]
+            except self.athena.client.exceptions.ClientError as exc:
+                if 'AccessDenied' in str(exc):
+                    logger.info(f'Cannot read from athena database {database}')
+                    return []
+                raise
+
+        cur_tables = []
+        if not databases:
+            return cur_tables
+        with ThreadPoolExecutor(max_workers=get_max_workers()) as executor:
+            futures = [executor.submit(_find, database) for database in databases]
+            for future in tqdm(as_completed(futures), total=len(futures), desc='Finding CUR in Athena Databases', leave=False):
+                for database, table in future.result():
+                    logger.info(f'Found CUR table {database}.{table}')
+                    cur_tables.append((database, table))
+        return sorted(cur_tables)
+
     def find_cur(self, database: str=None, table: str=None):
         """Choose CUR"""
         metadata = None
@@ -260,23 +336,16 @@ class CUR(AbstractCUR):
                 raise CidCritical(f'Table {table_name} does not look like CUR. {message}')
             return cur_database or self.athena.DatabaseName, metadata
 
-        all_cur_tables = []
         if cur_database:
-            cur_databases = [cur_database]
-        else:
-            cur_databases = list(self.athena.list_databases()) # user have not provided the cur database
-        for database in tqdm(cur_databases, desc='Fining CUR in Athena Databases'):
-            try:
-                tables = self.athena.find_tables_with_columns(
-                    columns=self.cur_minimal_required_columns,
-                    database_name=database,
-                )
-                all_cur_tables += [(database, table['Name']) for table in tables]
-            except self.athena.client.exceptions.ClientError as exc:
-                if 'AccessDenied' in str(exc):
-                    logger.info(f'Cannot read from athena database {database}')
-                else:
-                    raise
+            all_cur_tables = self._find_cur_tables([cur_database])
+        else: # user have not provided the cur database
+            databases = sorted(self.athena.list_databases(), key=self._database_priority)
+            likely = [database for database in databases if self._database_priority(database) <= len(LIKELY_CUR_DATABASES)]
+            all_cur_tables = self._find_cur_tables(likely)
+            if len(all_cur_tables) == 1 and not isatty():
+                logger.info(f'Found a single CUR {all_cur_tables[0]} in likely databases. Skipping other databases.')
+            else:
+                all_cur_tables += self._find_cur_tables([database for database in databases if database not in likely])
 
         if not all_cur_tables:
             # FIXME : distinguish a case where we have NONE tables in any database. This might be because
@@ -285,6 +354,11 @@ class CUR(AbstractCUR):
                  ' Please make sure you created cur and created Athena table, preferably with CID Cloud Formation stack.'
                  ' Also if you have AWS Lake Formation, the user running the tool might need additional permissions'
             )
+        if len(all_cur_tables) == 1 and not isatty() and not get_parameters().get('cur-table-name-and-db'):
+            database, table = all_cur_tables[0]
+            logger.info(f'Using the only CUR table found: {database}.{table}')
+            set_parameters({'cur-table-name': table,'cur-database': database, })
+            return database, self.athena.get_table_metadata(table, database_name=database)
         databases = set([database for database, _ in all_cur_tables])
         if len(databases) > 1:
             choices = dict(sorted([(f'{database}.{tab}', (database, tab)) for database, tab in all_cur_tables], reverse=True))
@@ -326,6 +400,13 @@ class CUR(AbstractCUR):
             except self.glue.client.exceptions.ClientError as exc:
                 logger.debug(f'Failed to get crawler info: {exc}')
         if table_can_be_updated:
+            # metadata can come from cache, so make sure the column is still missing
+            fresh_metadata = self.athena.get_table_metadata(self.table_name, database_name=self.database, no_cache=True)
+            fresh_column = next((col for col in fresh_metadata.get('Columns', []) if col['Name'].lower() == column), None)
+            if fresh_column:
+                self._metadata.get('Columns', []).append(fresh_column)
+                self.invalidate_column_index()
+                return
             column_type = column_type or self.get_type_of_column(column)
             try:
                 self.athena.query(f'ALTER TABLE {self.table_name} ADD COLUMNS ({column} {column_type})', database=self.database)
@@ -333,6 +414,7 @@ class CUR(AbstractCUR):
                 raise CidCritical(f'Column {column} is not found in CUR and we were unable to add it. Please check FAQ.') from exc
             # table takes time to update so just adding column to cached data
             self._metadata.get('Columns', []).append({'Name': column, 'Type': column_type})
+            self.invalidate_column_index()
             cid_print(f"Column '{column}' was added to CUR ({self.table_name}).")
             return
 
@@ -388,12 +470,12 @@ class ProxyCUR(AbstractCUR):
                     logger.trace(f'equivalent_columns = {dict(zip(columns,equivalent_columns))}')
                     self.cur.ensure_columns(list(set(equivalent_columns)))
                     # add field from underlying cur to the proxy
+                    existing_names = {item['Name'] for item in self._metadata.get('Columns', [])}
                     for item in self.cur._metadata.get('Columns', []):
-                        for existing_item in self._metadata.get('Columns', []):
-                            if item['Name'] == existing_item['Name']:
-                                break
-                        else: # if not found
+                        if item['Name'] not in existing_names: # if not found
                             self._metadata.get('Columns', []).append(item)
+                            existing_names.add(item['Name'])
+                    self.invalidate_column_index()
                 except Exception as exc:
                     logger.exception(exc)
             for column in columns:
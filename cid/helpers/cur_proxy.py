@@ -1,5 +1,8 @@
 import re
+import json
 import logging
+from functools import lru_cache
+from typing import Dict, List, NamedTuple
 
 try:
     from itertools import batched #python3.12+
@@ -355,6 +358,154 @@ cur2_maps = {
     'discount',
 }
 
+# Indexes computed once. Lookups in per field loops must not scan mappings
+cur2to1_mapping = {value: key for key, value in cur1to2_mapping.items()}
+_CUR2_MAP_FAMILY_REGEX = re.compile(r'^(' + '|'.join(sorted(cur2_maps)) + r')_(.+)$', re.DOTALL) # resource_tags_user_a => resource_tags
+_TAG_FIELD_REGEX = re.compile(r'^(resource_tags|cost_category)_(.+)$', re.DOTALL)
+_TIME_FIELD_REGEX = re.compile(r'"(.+_time)"')
+
+STATE_PARAMETER = 'cid_proxy_state' # Glue table parameter of the view with exposed fields and map keys
+STATE_MAX_SIZE = 400000 # Glue limits a parameter value to 512000 bytes
+
+# Tokens of the Presto/Trino subset used in proxy views. Strings and quoted identifiers can contain any characters
+_TOKEN_REGEX = re.compile(r"""
+      (?P<string>'(?:[^']|'')*')
+    | (?P<identifier>"(?:[^"]|"")*")
+    | (?P<concat>\|\|)
+    | (?P<punctuation>[()\[\],])
+    | (?P<word>[^\s'"()\[\],|]+)
+    | (?P<other>\S)
+""", re.VERBOSE)
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    start: int
+    end: int
+
+
+def tokenize(sql: str) -> List[Token]:
+    """ split sql into tokens in one pass """
+    return [Token(match.lastgroup, match.group(), match.start(), match.end()) for match in _TOKEN_REGEX.finditer(sql)]
+
+
+def _unquote(token: Token) -> str:
+    if token.kind == 'string':
+        return token.text[1:-1].replace("''", "'")
+    if token.kind == 'identifier':
+        return token.text[1:-1].replace('""', '"')
+    return token.text
+
+
+def _split_top_level(tokens: List[Token]) -> List[List[Token]]:
+    """ split tokens on commas that are not inside brackets or parentheses """
+    items, current, depth = [], [], 0
+    for token in tokens:
+        if token.text in ('(', '['):
+            depth += 1
+        elif token.text in (')', ']'):
+            depth -= 1
+        elif token.text == ',' and depth == 0:
+            items.append(current)
+            current = []
+            continue
+        current.append(token)
+    if current:
+        items.append(current)
+    return items
+
+
+def _closing(tokens: List[Token], index: int) -> int:
+    """ returns index of the bracket closing the one at index """
+    depth = 0
+    for i in range(index, len(tokens)):
+        if tokens[i].text in ('(', '['):
+            depth += 1
+        elif tokens[i].text in (')', ']'):
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ValueError(f'Unbalanced brackets at position {tokens[index].start}')
+
+
+def _array_items(tokens: List[Token]) -> List[List[Token]]:
+    """ items of all ARRAY[...] in an expression in order of appearance
+    ex: ARRAY['a', 'b'] || ARRAY['c'] or concat(ARRAY['a', 'b'], ARRAY['c']) => tokens of 'a', 'b' and 'c'
+    """
+    items = []
+    index = 0
+    while index < len(tokens):
+        if tokens[index].text.upper() == 'ARRAY' and index + 1 < len(tokens) and tokens[index + 1].text == '[':
+            end = _closing(tokens, index + 1)
+            items += _split_top_level(tokens[index + 2:end])
+            index = end
+        index += 1
+    return items
+
+
+_MAP_KEY_REGEX = re.compile(r"^(\w+)\['(.*)'\]$", re.DOTALL)
+_IDENTIFIER_REGEX = re.compile(r'^[a-z_][a-z0-9_]*$', re.IGNORECASE)
+
+
+def split_map_key(field: str) -> tuple:
+    """ split a key of a map field: resource_tags['user_a,b'] => ('resource_tags', 'user_a,b'). Returns None if not a map key """
+    match = _MAP_KEY_REGEX.match(field)
+    return match.groups() if match else None
+
+
+def sql_identifier(name: str) -> str:
+    """ quote a column name if needed """
+    if _IDENTIFIER_REGEX.match(name):
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+def sql_string(value: str) -> str:
+    """ sql string literal """
+    return "'" + value.replace("'", "''") + "'"
+
+
+def parse_view_maps(sql: str) -> Dict[str, Dict[str, str]]:
+    """ read MAP columns of a view: {column: {key: value expression}}
+    ex:
+        SELECT MAP(ARRAY['key1', 'key2'], ARRAY[value1, value2]) resource_tags FROM ... => {'resource_tags': {'key1': 'value1', 'key2': 'value2'}}
+    """
+    tokens = tokenize(sql)
+    select = next((i for i, token in enumerate(tokens) if token.text.upper() == 'SELECT'), None)
+    if select is None:
+        return {}
+    depth, end = 0, len(tokens)
+    for i in range(select + 1, len(tokens)):
+        if tokens[i].text in ('(', '['):
+            depth += 1
+        elif tokens[i].text in (')', ']'):
+            depth -= 1
+        elif depth == 0 and tokens[i].text.upper() == 'FROM':
+            end = i
+            break
+    maps = {}
+    for item in _split_top_level(tokens[select + 1:end]):
+        if len(item) < 4 or item[0].text.upper() != 'MAP' or item[1].text != '(':
+            continue
+        closing = _closing(item, 1)
+        args = _split_top_level(item[2:closing])
+        if len(args) != 2 or closing + 1 >= len(item):
+            continue
+        keys = [_unquote(key[0]) if len(key) == 1 else sql[key[0].start:key[-1].end] for key in _array_items(args[0])]
+        values = [sql[value[0].start:value[-1].end] for value in _array_items(args[1])]
+        maps[_unquote(item[-1])] = dict(zip(keys, values))
+    return maps
+
+@lru_cache(maxsize=None)
+def _fields_from_sql(field: str) -> tuple:
+    if '"' in field:
+        return tuple(_TIME_FIELD_REGEX.findall(field))
+    if '[' in field:
+        return (field.split('[')[0],)
+    return (field,)
+
+
 class ProxyView():
     """ Proxy for CUR
 
@@ -369,14 +520,47 @@ class ProxyView():
         # add tags in cur2 proxy
         if cur.version.startswith('1') and target_cur_version.startswith('2') :
             for field in cur.tag_and_cost_category_fields:
-                self.fields_to_expose.append(re.sub("(resource_tags|cost_category)_(.+)", r"\1['\2']", field))
+                self.fields_to_expose.append(_TAG_FIELD_REGEX.sub(r"\1['\2']", field))
         self.athena = self.cur.athena
         self.name = f'cur{self.target_cur_version}_proxy'
         self.exposed_fields = []
         self.exposed_maps = {}
         self.fields_to_expose_in_maps = {}
-        self.fields_with_missing_requirements = [] # keep the list to show warning just once
-        self.updated_once = False
+        self.fields_with_missing_requirements = set() # keep the set to show warning just once
+        self.missing_columns = set() # source columns exposed as empty values
+        self.updated_once = False # True when exposed fields and maps reflect the view
+
+    @property
+    def source(self) -> str:
+        return f'{self.cur.database}.{self.cur.table_name}'
+
+    def read_state(self) -> bool:
+        """ read exposed fields and map keys from the parameters of the view. Returns False if the state is unknown
+        """
+        try:
+            state = json.loads(self.athena.get_view_parameters(self.name).get(STATE_PARAMETER) or 'null')
+        except ValueError:
+            state = None
+        if not state or state.get('source') != self.source:
+            return False
+        self.exposed_fields = state.get('fields', [])
+        self.exposed_maps = {field: set(keys) for field, keys in state.get('maps', {}).items()}
+        self.missing_columns = set(state.get('missing', []))
+        logger.debug(f'proxy state: {len(self.exposed_fields)} fields, maps: { {k: len(v) for k, v in self.exposed_maps.items()} }')
+        return True
+
+    def get_state_parameters(self) -> dict:
+        """ parameters of the view with the state of exposed fields and map keys """
+        state = json.dumps({
+            'source': self.source,
+            'fields': sorted(self.exposed_fields),
+            'maps': {field: sorted(keys) for field, keys in self.exposed_maps.items()},
+            'missing': sorted(self.missing_columns),
+        })
+        if len(state) > STATE_MAX_SIZE:
+            logger.debug(f'proxy state is too big to be stored ({len(state)} bytes)')
+            return {STATE_PARAMETER: ''}
+        return {STATE_PARAMETER: state}
 
     def read_from_athena(self):
         """ read the current state from athena. read all fields and their types from existing SQL view and also for each MAP read existing keys
@@ -394,31 +578,17 @@ class ProxyView():
         if not self.exposed_fields:
             return
         # If we have existing fields, we need to read also all map definitions from the SQL of the existing view
-        def _parse_mapping_string(mapping_string):
-            ''' read keys and values from definition
-            ex:
-                MAP(ARRAY['key1', 'key2'], ARRAY[value1, value2])
-            '''
-            arrays = re.findall(r'ARRAY\[(.*?)\]', mapping_string) # Extract arrays from the string
-            keys = arrays[0].replace("'", '').split(',') # Split arrays into elements
-            values = arrays[1].split(',') # FIXME: the values can be more complex then just columns and ma potentially include comma in some rare cases.
-            return {key.strip(): value.strip() for key, value in zip(keys, values)}
-
         _current_sql = '\n'.join([line[0] for line in self.athena.query(f'SHOW CREATE VIEW {self.name}')])
-
-        # transform: concat(ARRAY[a,b,c], ARRAY[d,e,f], ARRAY[e,g,h]) >> ARRAY[a,b,c,d,e,f,e,g,h]
-        _current_sql = re.sub(r'concat\((.+?)\)', lambda match: match.group(1).replace('], ARRAY[', ','), _current_sql)
+        current_maps = parse_view_maps(_current_sql)
         for field in self.exposed_fields:
             if field in cur2_maps:
                 if field not in self.exposed_maps:
                     self.exposed_maps[field] = set()
-                maps = re.findall(fr'MAP\(ARRAY\[.+?\], ARRAY\[.+?\]\) {field}', _current_sql)
-                if not maps:
+                if field not in current_maps:
                     logger.warning(f'Cannot find map {field} definition in the view {self.name}. It must be defined as MAP.')
                     continue
-                current_map = _parse_mapping_string(maps[0])
-                logger.debug(f'current definition of {field} = {current_map}')
-                self.exposed_maps[field].update([key for key in current_map])
+                logger.debug(f'current definition of {field} = {current_maps[field]}')
+                self.exposed_maps[field].update(current_maps[field])
         logger.debug(f'exposed_maps = {self.exposed_maps}')
 
     def source_column_equivalents(self, field):
@@ -429,7 +599,7 @@ class ProxyView():
         there can be more then one field
         """
         logger.trace(f'source_column_equivalents {field}')
-        if field in self.cur.fields and not field.endswith('_time'): # Same field name is more then common case so try it first
+        if self.cur.column_exists(field) and not field.endswith('_time'): # Same field name is more then common case so try it first
             return [field]
 
         if self.current_cur_version.startswith('2') and self.target_cur_version.startswith('2'): # field from CUR2 to CUR2
@@ -438,18 +608,18 @@ class ProxyView():
             return [field] # all the same
         if self.current_cur_version.startswith('2') and self.target_cur_version.startswith('1'): # field from CUR1 to CUR2
             if field not in cur1to2_mapping: #check if this field is in mapping
-                for cur2map in cur2_maps:
-                    if field.startswith(cur2map + '_'):
-                        return [cur2map]
+                map_family = _CUR2_MAP_FAMILY_REGEX.match(field)
+                if map_family:
+                    return [map_family.group(1)]
                 logger.warning(f"{field} not known field of CUR2. needs to be added in code. Please create a github issue")
             res = cur1to2_mapping.get(field, field)
             return self.get_fields_from_sql(res)
         if self.current_cur_version.startswith('1') and self.target_cur_version.startswith('2'): # field from CUR2 to CUR1
             if field.lower() in cur2_maps:
                 return [] # field mapping itself without indication to concrete component
-            matches = re.findall(r"(\w+)\['(\w+)'\]", field)
+            matches = split_map_key(field)
             if matches:
-                map_field, key = matches[0]
+                map_field, key = matches
                 if map_field not in self.fields_to_expose_in_maps:
                     self.fields_to_expose_in_maps[map_field] = set()
                 self.fields_to_expose_in_maps[map_field].add(key)
@@ -459,7 +629,6 @@ class ProxyView():
             #if field.endswith('_time'): # can be
             #    return self.get_fields_from_sql(field)
 
-            cur2to1_mapping = {value: key for key, value in cur1to2_mapping.items()}
             if field not in cur2to1_mapping and field not in cur2_maps:
                 logger.warning(f"The field '{field}' is not known field of CUR1. needs to be added in code. Please create a github issue")
             ret =  self.get_fields_from_sql(cur2to1_mapping.get(field, field)) 
@@ -473,12 +642,7 @@ class ProxyView():
             parameters['aaa'] => parameters
             plane_fields => plane_fields
         """
-        if '"' in field:
-            matches = re.findall(r'"(.+_time)"', field)
-            return matches
-        if '[' in field:
-            return [field.split('[')[0]]
-        return [field]
+        return list(_fields_from_sql(field))
 
     def get_sql_expression(self, field, field_type):
         """ Given a field of cur return an SQL representation of the field in the target cur system. Takes into account existence of fields in the current cur.
@@ -495,7 +659,7 @@ class ProxyView():
             logger.trace(f'field {field} cannot be present as prereqs are missing in source cur: {missing_requirements}')
             return empty[field_type.lower()]
 
-        if field in self.cur.fields and not field.endswith('_time'): # Same field name is more then common case so try it first _date have different fields
+        if self.cur.column_exists(field) and not field.endswith('_time'): # Same field name is more then common case so try it first _date have different fields
             return field
         if self.current_cur_version.startswith('2') and self.target_cur_version.startswith('2'): # field from CUR2 to CUR2
             return field.split('[')[0]
@@ -510,17 +674,16 @@ class ProxyView():
                 for key in keys_set:
                     map_field_key = f'{map_field}_{key}'
                     if self.cur.column_exists(map_field_key):
-                        if map_field_key.encode('unicode-escape').decode('ascii') != map_field_key: # field name contains unicode characters that must be escaped
-                            map_field_key = f'"{map_field_key}"'
-                        map_mapping[key] = map_field_key
+                        map_mapping[key] = sql_identifier(map_field_key) # names with unicode or punctuation must be quoted
                     else:
+                        self.missing_columns.add(map_field_key)
                         map_mapping[key] = empty['string'] # all known maps have string values for now
                 if not map_mapping:
                     return 'cast(NULL AS MAP<VARCHAR, VARCHAR>)'
                 map_mapping = dict(sorted(map_mapping.items())) # ordered dict
 
                 chunk_size = 254 # https://github.com/prestodb/presto/issues/9073
-                key_arrays =   [f"""ARRAY[{', '.join(["'" + key + "'" for key in chunk])}]""" for chunk in batched(map_mapping.keys(), chunk_size)]
+                key_arrays =   [f"""ARRAY[{', '.join([sql_string(key) for key in chunk])}]""" for chunk in batched(map_mapping.keys(), chunk_size)]
                 value_arrays = [f"""ARRAY[{', '.join(chunk                             )}]""" for chunk in batched(map_mapping.values(), chunk_size)]
                 return f'''
                     MAP(
@@ -529,30 +692,33 @@ class ProxyView():
                     )
                 '''
 
-            cur2to1_mapping = {value: key for key, value in cur1to2_mapping.items()}
             if field in cur2to1_mapping:
                 return cur2to1_mapping[field]
             else:
                 raise NotImplementedError(f'CUR1 field {field} has no known equivalent')
         if self.current_cur_version.startswith('2') and self.target_cur_version.startswith('1'):
-            for tag_type in 'resource_tags', 'cost_category':
-                if field.startswith(tag_type + '_'):
-                    short_field_name = field[len(tag_type + '_'):]
-                    return f"{tag_type}['{short_field_name}']"
+            tag_field = _TAG_FIELD_REGEX.match(field)
+            if tag_field:
+                tag_type, short_field_name = tag_field.groups()
+                return f"{tag_type}[{sql_string(short_field_name)}]"
 
 
-    def column_surely_exist(self, field_to_expose):
-        if not self.updated_once:
-            return False
+    def is_exposed(self, field_to_expose):
+        """ True if the field (or the key of a map) is known to be exposed by the view """
         target_field = self.get_fields_from_sql(field_to_expose)[0]
         if target_field not in self.exposed_fields:
             return False
-        if '[' in  field_to_expose:
-            key = field_to_expose.split('[')[1].split(']')[0].replace("'",'')
+        if split_map_key(field_to_expose):
+            key = split_map_key(field_to_expose)[1]
             if key not in self.exposed_maps.get(target_field.lower(),{}):
                 return False
         return True
 
+    def column_surely_exist(self, field_to_expose):
+        if not self.updated_once:
+            return False
+        return self.is_exposed(field_to_expose)
+
     def create_or_update_view(self):
         """ Create or update view
         """
@@ -560,12 +726,26 @@ class ProxyView():
             logger.debug('no need for proxy change. skip.')
             return
 
-        self.read_from_athena()
+        if not self.updated_once:
+            if self.read_state():
+                appeared = [column for column in self.missing_columns if self.cur.column_exists(column)]
+                if not appeared and all(self.is_exposed(field_to_expose) for field_to_expose in self.fields_to_expose):
+                    logger.debug('proxy view already has all fields. skip.')
+                    self.updated_once = True
+                    return
+                logger.debug(f'proxy view needs an update. new source columns: {appeared}')
+            else:
+                self.read_from_athena()
         all_target_fields  = sorted(list(set(self.exposed_fields + self.fields_to_expose)))
         logger.trace(f'all_target_fields = {all_target_fields}')
-        lines = {}
+        self.missing_columns = set()
+        fields_by_target = {}
         for field in all_target_fields:
-            target_field = self.get_fields_from_sql(field)[0]
+            fields_by_target.setdefault(self.get_fields_from_sql(field)[0], []).append(field)
+            self.source_column_equivalents(field) # collect keys of all maps first, so each map is generated once
+        lines = {}
+        for target_field, fields in fields_by_target.items():
+            field = fields[-1] # for map we take the latest
             target_field_type = self.cur.get_type_of_column(target_field, self.target_cur_version)
             logger.trace(f'get_sql_expression {field} {target_field_type}')
             mapped_expression = self.get_sql_expression(field, target_field_type) #
@@ -576,12 +756,13 @@ class ProxyView():
                 expression = mapped_expression                      # then take resulting expression as is
             else:
                 if field not in self.fields_with_missing_requirements:
-                    self.fields_with_missing_requirements.append(field)
+                    self.fields_with_missing_requirements.add(field)
                     logger.warning(f"Missing requirement for field {field}: {', '.join(missing_requirements)}. Setting as empty.")
                 if target_field_type.lower() not in empty:
                     raise RuntimeError(f'{target_field_type} not in empty list for field {field}. Raise a github issue.')
+                self.missing_columns.update(missing_requirements)
                 expression = empty.get(target_field_type.lower(), 'null')
-            lines[target_field] = expression # for map we will take the latest
+            lines[target_field] = expression
         select_block = '\n                ,'.join([f'{expression} {field}' for field, expression in sorted(lines.items())])
         query = (f'''
             CREATE OR REPLACE VIEW "{self.name}" AS
@@ -590,10 +771,12 @@ class ProxyView():
             FROM
                 "{self.cur.database}"."{self.cur.table_name}"
         ''')
-        res = self.athena.create_or_update_view(self.name, query) # this cost 3 athena calls
+        self.exposed_fields = sorted(lines.keys())
+        for map_field in cur2_maps & set(lines.keys()):
+            self.exposed_maps[map_field] = set(self.exposed_maps.get(map_field, set())) | self.fields_to_expose_in_maps.get(map_field, set())
+        res = self.athena.create_or_update_view(self.name, query, parameters=self.get_state_parameters()) # this cost 3 athena calls
         logging.debug(res)
-
-        self.exposed_fields = all_target_fields
+        self.updated_once = True
 
     def get_table_metadata(self):
         return self.athena.get_table_metadata(self.name)
@@ -11,6 +11,11 @@ logger = logging.getLogger(__name__)
 
 
 class Glue(CidBase):
+    # fields of get_table response that can be used in TableInput
+    TABLE_INPUT_KEYS = [
+        'Name', 'Description', 'Owner', 'LastAccessTime', 'LastAnalyzedTime', 'Retention', 'StorageDescriptor',
+        'PartitionKeys', 'ViewOriginalText', 'ViewExpandedText', 'TableType', 'Parameters', 'TargetTable',
+    ]
 
     def __init__(self, session):
         super().__init__(session)
@@ -49,6 +54,49 @@ class Glue(CidBase):
             Name=name,
         )['Table']
 
+    def find_tables_with_columns(self, columns: list, database: str, catalog: str=None, name_expression: str=None) -> list:
+        """ Returns tables of a database that contain all given columns.
+        Candidates are narrowed on the server side: by name with get_tables Expression if provided, otherwise with
+        search_tables on the first column, so only candidates are transferred with their full list of columns.
+        """
+        catalog = catalog or self.account_id
+        if name_expression:
+            paginator = self.client.get_paginator('get_tables')
+            candidates = list(paginator.paginate(CatalogId=catalog, DatabaseName=database, Expression=name_expression).search('TableList'))
+        else:
+            candidates = []
+            params = {
+                'CatalogId': catalog,
+                'SearchText': f'"{columns[0]}"', # exact match
+                'Filters': [{'Key': 'DatabaseName', 'Value': database}],
+                'MaxResults': 1000,
+            }
+            while True: # search_tables has no paginator
+                page = self.client.search_tables(**params)
+                candidates += page.get('TableList', [])
+                if not page.get('NextToken'):
+                    break
+                params['NextToken'] = page['NextToken']
+        tables = []
+        for table in candidates:
+            if table.get('DatabaseName', database) != database: # filters are fuzzy
+                continue
+            column_names = {column['Name'] for column in table.get('StorageDescriptor', {}).get('Columns', [])}
+            if all(column in column_names for column in columns):
+                tables.append(table)
+        logger.debug(f'Found {len(tables)} of {len(candidates)} candidate tables with columns in {database}')
+        return tables
+
+    def update_table_parameters(self, name, catalog, database, parameters: dict, table: dict=None) -> dict:
+        """ Add or replace table parameters keeping the rest of the table as is. Returns the updated table. """
+        table = table or self.get_table(name=name, catalog=catalog, database=database)
+        table_input = {key: value for key, value in table.items() if key in self.TABLE_INPUT_KEYS}
+        table_input['Parameters'] = dict(table_input.get('Parameters', {}), **parameters)
+        # SkipArchive: do not create a new table version only for parameters, versions count against Glue quotas
+        self.client.update_table(CatalogId=catalog, DatabaseName=database, TableInput=table_input, SkipArchive=True)
+        table['Parameters'] = table_input['Parameters']
+        return table
+
     def delete_table(self, name, catalog, database):
         """ Delete an AWS Glue table """
         try:
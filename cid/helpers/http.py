@@ -0,0 +1,126 @@
+""" Fetching of remote resources (catalog, resource and definition files).
+
+Connections are pooled and kept alive. Responses are stored in a local http cache and revalidated with
+conditional GETs (If-None-Match / If-Modified-Since). With --offline, files are served from the cache only.
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cid.utils import get_parameters, get_max_workers
+from cid.helpers.cache import get_cache_dir, cache_disabled
+from cid.exceptions import CidCritical
+
+logger = logging.getLogger(__name__)
+
+
+def offline() -> bool:
+    """ True if user requested --offline """
+    return str(get_parameters().get('offline', False)).lower() in ['true', 'yes', '1']
+
+
+class HttpClient():
+    """ Pooled http client with a local cache
+    """
+    _lock = threading.Lock()
+
+    def __init__(self, timeout: int=10) -> None:
+        self.timeout = timeout
+        self._session = None
+
+    @property
+    def session(self) -> requests.Session:
+        with self._lock:
+            if not self._session:
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=10, pool_maxsize=max(10, get_max_workers(default=8)))
+                self._session.mount('https://', adapter)
+                self._session.mount('http://', adapter)
+                self._session.headers.update({'User-Agent': 'cid'})
+        return self._session
+
+    def _paths(self, url: str) -> tuple:
+        name = hashlib.sha256(url.encode()).hexdigest()
+        folder = os.path.join(get_cache_dir(), 'http')
+        return os.path.join(folder, f'{name}.json'), os.path.join(folder, f'{name}.body')
+
+    def _read_cache(self, url: str) -> tuple:
+        """ returns (headers, text) from the cache or (None, None) """
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, encoding='utf-8') as file_:
+                meta = json.load(file_)
+            with open(body_path, encoding='utf-8') as file_:
+                return meta, file_.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def _write_cache(self, url: str, response: requests.Response) -> None:
+        meta_path, body_path = self._paths(url)
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        try:
+            os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+            suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(body_path + suffix, 'w', encoding='utf-8') as file_:
+                file_.write(response.text)
+            with open(meta_path + suffix, 'w', encoding='utf-8') as file_:
+                json.dump(meta, file_)
+            os.replace(body_path + suffix, body_path) # atomic
+            os.replace(meta_path + suffix, meta_path)
+        except OSError as exc:
+            logger.debug(f'Cannot write http cache for {url}: {exc}')
+
+    def get_text(self, url: str) -> str:
+        """ returns the content of url using the local cache when the file is not modified """
+        use_cache = not cache_disabled()
+        meta, text = self._read_cache(url) if use_cache or offline() else (None, None)
+        if offline():
+            if text is None:
+                raise CidCritical(f'{url} is not available in the local cache (--offline). Run once without --offline.')
+            logger.debug(f'Using cached {url} (offline)')
+            return text
+        headers = {}
+        if text is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        try:
+            response = self.session.get(url, timeout=self.timeout, headers=headers)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exc:
+            if text is None:
+                raise
+            logger.warning(f'Cannot reach {url}, using a cached copy: {exc}')
+            return text
+        if response.status_code == 304 and text is not None:
+            logger.debug(f'Not modified {url}')
+            return text
+        response.raise_for_status()
+        if use_cache:
+            self._write_cache(url, response)
+        return response.text
+
+    def prefetch(self, urls: list) -> dict:
+        """ fetch several urls concurrently. Returns {url: text} for successfully fetched ones """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(len(urls), get_max_workers(default=8))) as executor:
+            futures = {url: executor.submit(self.get_text, url) for url in urls}
+        result = {}
+        for url, future in futures.items():
+            try:
+                result[url] = future.result()
+            except (requests.exceptions.RequestException, CidCritical) as exc:
+                logger.debug(f'Prefetch of {url} failed: {exc}')
+        return result
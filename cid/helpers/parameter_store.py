@@ -23,13 +23,15 @@ class AthenaStore():
         ''' load from athena
         '''
         try:
-            res = self.athena.query(f'''select * from  {self.view_name}''', include_header=True)
+            rows = self.athena.query_iter(f'''select * from  {self.view_name}''', include_header=True)
         except CidCritical as exc:
             if 'TABLE_NOT_FOUND' in str(exc):
-                res = []
-            else:
-                raise
-        return [{k:v for k, v in zip(res[0], row)} for row in res[1:]]
+                return []
+            raise
+        header = next(rows, None)
+        if not header:
+            return []
+        return [dict(zip(header, row)) for row in rows]
 
     def _to_sql_str(self, val):
         if val is None:
@@ -1,28 +1,37 @@
 import re
 import json
 import time
+import random
 import datetime
 import logging
+import threading
 from uuid import uuid4
 from string import Template
 from typing import Dict, List, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pkg_resources import resource_string
 
 from tqdm import tqdm
+from botocore.config import Config
 
 from cid.base import CidBase
 from cid.helpers import diff, timezone, randtime
+from cid.helpers.cache import DiskCache
 from cid.helpers.quicksight.dashboard import Dashboard
 from cid.helpers.quicksight.dataset import Dataset
 from cid.helpers.quicksight.dashboard_patching import add_filter_to_dashboard_definition, patch_currency, patch_group_by, patch_spaces
 from cid.helpers.quicksight.datasource import Datasource
 from cid.helpers.quicksight.template import Template as CidQsTemplate
 from cid.helpers.quicksight.definition import Definition as CidQsDefinition
-from cid.utils import get_parameter, get_parameters, exec_env, cid_print, ago, unset_parameter
+from cid.helpers.quicksight.rate_limit import rate_limiter
+from cid.helpers.quicksight.version import CidVersion
+from cid.utils import get_parameter, get_parameters, exec_env, cid_print, ago, unset_parameter, get_max_workers, backoff
 from cid.exceptions import CidCritical, CidError
 
 logger = logging.getLogger(__name__)
 
+INGESTION_IN_PROGRESS = ['INITIALIZED', 'QUEUED', 'RUNNING']
+
 class QuickSight(CidBase):
     # Define defaults
     cidAccountId = '223485597511'
@@ -32,6 +41,8 @@ class QuickSight(CidBase):
     _datasources: Dict[str, Datasource] = None
     _templates: Dict[str, CidQsTemplate] = dict()
     _definitions: Dict[str, CidQsDefinition] = dict()
+    _versions = DiskCache('cid-versions', ttl=24*3600) # cid versions of templates and dashboard versions
+    _tags: Dict[str, dict] = None
     _identityRegion: str = None
     _user: dict = None
     _principal_arn: dict = None
@@ -43,10 +54,21 @@ class QuickSight(CidBase):
         self._resources = resources
         super().__init__(session)
 
-        # QuickSight clients
+        # QuickSight clients. Clients are shared by concurrent workers, so the pool of connections must fit them all
+        # Calls are rate limited per API family and retried on throttling with backoff and jitter
         logger.info('Creating QuickSight client')
-        self.client = self.session.client('quicksight')
-        self.identityClient = self.session.client('quicksight', region_name=self.identityRegion)
+        rate_limiter.register(self.session)
+        self.client_config = Config(
+            max_pool_connections=max(10, get_max_workers()),
+            retries={
+                'mode': get_parameters().get('quicksight-retry-mode') or 'adaptive',
+                'max_attempts': int(get_parameters().get('quicksight-max-attempts') or 10),
+            },
+        )
+        self._regional_clients = {}
+        self._lock = threading.Lock()
+        self.client = self.session.client('quicksight', config=self.client_config)
+        self.identityClient = self.session.client('quicksight', region_name=self.identityRegion, config=self.client_config)
 
 
     @property
@@ -218,8 +240,15 @@ class QuickSight(CidBase):
         return [v['dashboardId'] for v in self.supported_dashboards.values()]
 
 
-    def discover_dashboard(self, dashboard_id: str, refresh: bool = False) -> Dashboard:
-        """Discover a single dashboard: describe and pull downstream info (datasets, related templates and views) """
+    def get_regional_client(self, region: str):
+        """ returns a QuickSight client for a given region. Can be used by concurrent workers """
+        with self._lock: # session is not thread safe
+            if region not in self._regional_clients:
+                self._regional_clients[region] = self.session.client('quicksight', region_name=region, config=self.client_config)
+        return self._regional_clients[region]
+
+    def _describe_supported_dashboard(self, dashboard_id: str) -> Dashboard:
+        """ Describe a single dashboard if it can be supported. Can be used by concurrent workers """
         if dashboard_id not in self.supported_dashboard_ids and not get_parameters().get('detect-dashboards-by-template'):
             logger.trace(f'Skipping {dashboard_id} as it is not supported dashboard id. To detect by template use --detect-dashboards-by-template yes')
             return None
@@ -227,12 +256,27 @@ class QuickSight(CidBase):
         dashboard = self.describe_dashboard(DashboardId=dashboard_id)
         if not dashboard:
             raise CidCritical(f'Dashboard {dashboard_id} was not found')
+        return dashboard
 
-        if dashboard.supported:
+    def discover_dashboard(self, dashboard_id: str, refresh: bool = False) -> Dashboard:
+        """Discover a single dashboard: describe and pull downstream info (datasets, related templates and views) """
+        dashboard = self._describe_supported_dashboard(dashboard_id)
+        if dashboard and dashboard.supported:
             self._dashboards = self._dashboards or {}
             self._dashboards[dashboard_id] = dashboard
         return dashboard
 
+    def prefetch_dashboards_status(self, dashboards: List[Dashboard]) -> None:
+        """ Concurrently read templates, definitions and tags needed for status of dashboards """
+        self.prefetch_tags([dashboard.arn for dashboard in dashboards]) # versions from tags need no describe
+        def _status(dashboard):
+            return dashboard.status
+        with ThreadPoolExecutor(max_workers=get_max_workers()) as executor:
+            futures = [executor.submit(_status, dashboard) for dashboard in dashboards]
+            for future in tqdm(as_completed(futures), total=len(futures), desc='Reading Dashboards', leave=False):
+                if future.exception():
+                    logger.debug(f'Cannot get status: {future.exception()}')
+
     def ensure_group_exists(self, groupname='cid-owners', description='Created by Cloud Intelligence Dashboards'):
         try:
             group = self.identityClient.describe_group(
@@ -258,6 +302,8 @@ class QuickSight(CidBase):
                 ResourceArn=arn,
                 Tags=[{'Key': key, 'Value': str(value)} for key, value in (tags or {}).items()]
             )
+            if self._tags is not None and arn in self._tags:
+                self._tags[arn].update({key: str(value) for key, value in tags.items()})
             return True
         except self.client.exceptions.AccessDeniedException as exc:
             logger.debug(f'Cannot tag {arn} (AccessDenied).')
@@ -268,13 +314,33 @@ class QuickSight(CidBase):
 
     def get_tags(self, arn):
         ''' get tags
-        returns empty dict if no access
+        returns empty dict if no access. Tags are read once per session
         '''
+        if self._tags is None:
+            self._tags = {}
+        if arn in self._tags:
+            return dict(self._tags[arn])
         try:
-            return {t['Key']: t['Value'] for t in self.client.list_tags_for_resource(ResourceArn=arn).get('Tags', [])}
+            tags = {t['Key']: t['Value'] for t in self.client.list_tags_for_resource(ResourceArn=arn).get('Tags', [])}
         except self.client.exceptions.AccessDeniedException as exc:
             logger.debug(f'Cannot get tags from {arn} (AccessDenied).')
-            return {}
+            tags = {}
+        self._tags[arn] = tags
+        return dict(tags)
+
+    def prefetch_tags(self, arns: List[str]) -> None:
+        ''' read tags of many resources concurrently (there is no batch api for tags)
+        '''
+        if self._tags is None:
+            self._tags = {}
+        arns = [arn for arn in dict.fromkeys(arns) if arn not in self._tags]
+        if not arns:
+            return
+        with ThreadPoolExecutor(max_workers=get_max_workers()) as executor:
+            futures = [executor.submit(self.get_tags, arn) for arn in arns]
+            for future in as_completed(futures):
+                if future.exception():
+                    logger.debug(f'Cannot get tags: {future.exception()}')
 
 
     def get_principal_arn(self):
@@ -498,10 +564,12 @@ class QuickSight(CidBase):
         except Exception as exc:
             logger.debug(exc, exc_info=True)
 
-    def discover_dashboards(self, refresh_overrides: List[str]=[], refresh: bool = False, scan_all: bool = False) -> None:
+    def discover_dashboards(self, refresh_overrides: List[str]=[], refresh: bool = False, scan_all: bool = False, lazy: bool = False) -> None:
         """ Discover deployed dashboards
         :param refresh_overrides: a list of dashboard ids to refresh
         :param refresh: force refresh all dashboards
+        :param scan_all: describe all dashboards, not only supported ids
+        :param lazy: only use summaries from the list, dashboards are described on the first access to details
         """
         if refresh or self._dashboards is None:
             self._dashboards = {}
@@ -510,22 +578,33 @@ class QuickSight(CidBase):
                 if dashboard_id in self._dashboards:
                     del self._dashboards[dashboard_id]
         logger.debug('Discovering deployed dashboards')
-        all_dashboards_ids = [d.get('DashboardId') for d in self.list_dashboards()]
-        if scan_all:
-            dashboards_ids = all_dashboards_ids
+        summaries = {d.get('DashboardId'): d for d in self.list_dashboards()}
+        if scan_all and not lazy:
+            dashboards_ids = list(summaries.keys())
         else:
-            dashboards_ids = [ d for d in self.get_supported_dashboard_ids() if d in all_dashboards_ids ]
+            dashboards_ids = [ d for d in self.get_supported_dashboard_ids() if d in summaries ]
         logger.info(f'Found {len(dashboards_ids)} deployed dashboards')
-        bar = tqdm(dashboards_ids, desc='Discovering Dashboards', leave=False)
-        for dashboard_id in bar:
-            # Discover found dashboards
-            bar.set_description(f'Discovering {dashboard_id[:10]:<10}', refresh=True)
-            logger.debug(f'Discovering "{dashboard_id}"')
-            refresh = dashboard_id in refresh_overrides
+        if lazy:
+            for dashboard_id in dashboards_ids:
+                if dashboard_id not in self._dashboards:
+                    self._dashboards[dashboard_id] = Dashboard(summaries[dashboard_id], qs=self)
+            return
+
+        with ThreadPoolExecutor(max_workers=get_max_workers()) as executor:
+            futures = {
+                dashboard_id: executor.submit(self._describe_supported_dashboard, dashboard_id)
+                for dashboard_id in dashboards_ids
+            }
+            for _ in tqdm(as_completed(futures.values()), total=len(futures), desc='Discovering Dashboards', leave=False):
+                pass
+        # Merge in the order of ids to keep results deterministic
+        for dashboard_id, future in futures.items():
             try:
-                self.discover_dashboard(dashboard_id, refresh=refresh)
+                dashboard = future.result()
             except CidCritical:
-                pass
+                continue
+            if dashboard and dashboard.supported:
+                self._dashboards[dashboard_id] = dashboard
 
     def list_dashboards(self) -> list:
         try:
@@ -557,10 +636,8 @@ class QuickSight(CidBase):
         if not self.dashboards:
             return None
         choices = {}
-        bar = tqdm(self.dashboards.values(), desc='Reading Dashboards', leave=False)
-        for dashboard in bar:
-            # Discover found dashboards
-            bar.set_description(f'Reading {dashboard.name[:10]:<10}', refresh=True)
+        self.prefetch_dashboards_status(list(self.dashboards.values()))
+        for dashboard in self.dashboards.values():
             health = '' if dashboard.health else ' UNHEALTHY'
             status = '' if dashboard.status == 'up to date' else ' ' + dashboard.status.upper()
             key = f'{dashboard.name} ({dashboard.arn.split("/")[-1]}){health}{status}'
@@ -872,41 +949,112 @@ class QuickSight(CidBase):
         logger.info(f'DataSetId {id} timeout')
         return self._datasets.get(id, None)
 
-    def get_dataset_last_ingestion(self, dataset_id) -> str:
-        """returns human friendly status of the latest ingestion"""
+    def _describe_data_set_with_retry(self, dataset_id: str, max_attempts: int=6) -> dict:
+        """ describe_data_set with retry on throttling. Can be used by concurrent workers """
+        delays = backoff(initial=1, maximum=20)
+        for attempt in range(1, max_attempts + 1):
+            try:
+                return self.client.describe_data_set(AwsAccountId=self.account_id, DataSetId=dataset_id).get('DataSet')
+            except self.client.exceptions.ThrottlingException:
+                if attempt == max_attempts:
+                    raise
+                delay = random.uniform(0, next(delays)) # full jitter to spread concurrent workers
+                logger.debug(f'Got ThrottlingException describing {dataset_id}, will retry in {delay:.1f}s')
+                time.sleep(delay)
+        return None
+
+    def hydrate_datasets(self, dataset_ids: list) -> Dict[str, Dataset]:
+        """ Describe given datasets concurrently, so later access to columns, schemas and datasources
+        does not require a describe for each dataset. Datasets already described are skipped.
+        """
+        self._datasets = self._datasets or {}
+        ids_to_describe = [
+            _id for _id in dict.fromkeys(dataset_ids)
+            if _id and not (_id in self._datasets and self._datasets[_id].described)
+        ]
+        if ids_to_describe:
+            logger.info(f'Describing {len(ids_to_describe)} datasets')
+            with ThreadPoolExecutor(max_workers=get_max_workers()) as executor:
+                futures = {_id: executor.submit(self._describe_data_set_with_retry, _id) for _id in ids_to_describe}
+            for _id, future in futures.items(): # merge in the order of ids
+                try:
+                    raw = future.result()
+                except self.client.exceptions.ResourceNotFoundException:
+                    logger.debug(f'DataSetId {_id} not found')
+                    continue
+                except self.client.exceptions.AccessDeniedException:
+                    logger.debug(f'No quicksight:DescribeDataSet permission or missing DataSetId {_id}')
+                    continue
+                except self.client.exceptions.ClientError as exc:
+                    logger.warning(f'Error when trying to describe dataset {_id}: {exc}')
+                    continue
+                if raw:
+                    self._datasets[_id] = Dataset(raw, qs=self)
+        return {_id: self._datasets[_id] for _id in dataset_ids if _id in self._datasets}
+
+    def get_dataset_last_ingestion_info(self, dataset_id) -> dict:
+        """returns a dict with status, created, rows, duration_s and error of the latest ingestion or None if there are no ingestions"""
         try:
-            ingestions = self.client.list_ingestions( # latest come first, so no pagination required    
+            ingestions = self.client.list_ingestions( # latest come first, so no pagination required
                 DataSetId=dataset_id,
                 AwsAccountId=self.account_id,
             ).get('Ingestions', [])
         except self.client.exceptions.ResourceNotFoundException:
-            return '<RED>NotFound<END>'
+            return {'status': 'NotFound'}
         except self.client.exceptions.AccessDeniedException:
-            return '<YELLOW>AccessDenied<END>'
+            return {'status': 'AccessDenied'}
         if not ingestions:
             return None
         last_ingestion = ingestions[0] # Suppose it is the latest
-        status = last_ingestion.get('IngestionStatus')
-        time_ago = ago(last_ingestion.get('CreatedTime'))
-        if last_ingestion.get('ErrorInfo', {}).get('Type') == "DATA_SET_NOT_SPICE":
+        error = last_ingestion.get('ErrorInfo') or {}
+        return {
+            'status': 'DIRECT_QUERY' if error.get('Type') == 'DATA_SET_NOT_SPICE' else last_ingestion.get('IngestionStatus'),
+            'created': last_ingestion.get('CreatedTime'),
+            'rows': (last_ingestion.get('RowInfo') or {}).get('RowsIngested'),
+            'duration_s': last_ingestion.get('IngestionTimeInSeconds'),
+            'error': f"{error.get('Type')} {error.get('Message')}" if error else None,
+        }
+
+    @staticmethod
+    def format_ingestion(info: dict) -> str:
+        """returns human friendly status of an ingestion from get_dataset_last_ingestion_info"""
+        if not info:
+            return None
+        status = info['status']
+        if status == 'NotFound':
+            return '<RED>NotFound<END>'
+        if status == 'AccessDenied':
+            return '<YELLOW>AccessDenied<END>'
+        if status == 'DIRECT_QUERY':
             return '<BLUE>DIRECT_QUERY<END>'
+        time_ago = ago(info['created'])
         if status in ('COMPLETED',):
-            status = f'<GREEN>{status}<END>'
-            time_in_mins = int(int(last_ingestion.get('IngestionTimeInSeconds', 0) or 0) / 60)
-            return f"{status} ({time_in_mins} mins, {last_ingestion['RowInfo']['RowsIngested']} rows) {time_ago}"
+            time_in_mins = int(int(info.get('duration_s') or 0) / 60)
+            return f"<GREEN>{status}<END> ({time_in_mins} mins, {info['rows']} rows) {time_ago}"
         if status in ('FAILED', 'CANCELLED'):
-            status = f'<RED>{status}<END>'
-            return f"{status} ({last_ingestion['ErrorInfo']['Type']} {last_ingestion['ErrorInfo']['Message']}) {time_ago}"
+            return f"<RED>{status}<END> ({info['error']}) {time_ago}"
         return f'{status} {time_ago}'
 
+    def get_dataset_last_ingestion(self, dataset_id) -> str:
+        """returns human friendly status of the latest ingestion"""
+        return self.format_ingestion(self.get_dataset_last_ingestion_info(dataset_id))
+
+    def get_status_snapshots(self, dashboards: List[Dashboard]) -> List[dict]:
+        """ Collect status of dashboards concurrently (versions, owners and last ingestions of datasets) """
+        self.prefetch_tags([dashboard.arn for dashboard in dashboards])
+        with ThreadPoolExecutor(max_workers=get_max_workers()) as executor:
+            futures = [executor.submit(dashboard.get_status_snapshot) for dashboard in dashboards]
+            for _ in tqdm(as_completed(futures), total=len(futures), desc='Reading Dashboards', leave=False):
+                pass
+        return [future.result() for future in futures]
+
     def discover_datasets(self, _datasets: list=None):
         """ Discover datasets in the account """
 
         logger.info('Discovering datasets')
         self._datasets =  self._datasets or {}
         if _datasets:
-            for dataset in _datasets:
-                self.describe_dataset(dataset)
+            self.hydrate_datasets(_datasets)
         try:
             for dataset in self.list_data_sets():
                 try:
@@ -916,40 +1064,133 @@ class QuickSight(CidBase):
                     continue
         except self.client.exceptions.AccessDeniedException:
             logger.info('AccessDenied listing datasets. Will try to find all datasets in dashboards as failover method.')
-            for dashboard in self.dashboards.values():
-                for dataset_id in dashboard.get_dataset_ids():
-                    try:
-                        self.describe_dataset(dataset_id)
-                    except Exception as exc:
-                        logger.debug(exc, exc_info=True)
-                        continue
+            self.hydrate_datasets([_id for dashboard in self.dashboards.values() for _id in dashboard.get_dataset_ids()])
         except Exception as exc:
             logger.debug(exc, exc_info=True)
             logger.info('No datasets found')
 
-    def refresh_dataset(self, dataset_id):
-        """ Refresh the dataset """
-
-        logger.info(f'Starting refresh for dataset: {dataset_id}')
-        status = 'FAILED'
+    def start_ingestion(self, dataset_id: str) -> dict:
+        """ Start a SPICE ingestion of a dataset or reuse an ingestion in progress.
+        Returns a dict with mode, ingestion_id and status. Raises LimitExceededException if no more ingestions can be started.
+        """
+        result = {'dataset_id': dataset_id, 'mode': None, 'ingestion_id': None, 'status': 'FAILED', 'reused': False}
         try:
-            response = self.client.describe_data_set(
+            dataset = self.describe_dataset(id=dataset_id)
+            if not dataset:
+                result['error'] = 'not found'
+                return result
+            result['mode'] = dataset.raw.get('ImportMode')
+            if result['mode'] == 'DIRECT_QUERY':
+                result['status'] = 'DIRECT'
+                return result
+            ingestions = self.client.list_ingestions( # latest come first
+                DataSetId=dataset_id,
                 AwsAccountId=self.account_id,
-                DataSetId=dataset_id)
-            mode = response.get('DataSet').get('ImportMode')
-            if mode == 'DIRECT_QUERY':
-                return mode, 'DIRECT'
+                MaxResults=5,
+            ).get('Ingestions', [])
+            in_progress = next((i for i in ingestions if i.get('IngestionStatus') in INGESTION_IN_PROGRESS), None)
+            if in_progress:
+                logger.info(f'Dataset {dataset_id} has an ingestion in progress {in_progress["IngestionId"]}, will not start a new one')
+                result.update({'ingestion_id': in_progress['IngestionId'], 'status': in_progress['IngestionStatus'], 'reused': True})
+                return result
+            logger.info(f'Starting refresh for dataset: {dataset_id}')
             response = self.client.create_ingestion(
                 DataSetId=dataset_id,
                 IngestionId=datetime.datetime.now().strftime("%d%m%y-%H%M%S-%f"),
                 AwsAccountId=self.account_id)
-            status = response.get('IngestionStatus')
+            result.update({'ingestion_id': response.get('IngestionId'), 'status': response.get('IngestionStatus')})
+        except self.client.exceptions.LimitExceededException:
+            raise
         except self.client.exceptions.AccessDeniedException:
             logger.error(f'Access denied refreshing dataset: {dataset_id}')
+            result['error'] = 'access denied'
         except Exception as exc:
             logger.debug(exc, exc_info=True)
-            raise CidError(f'Unable to list refresh dataset {dataset_id}: {str(exc)}') from exc
-        return mode, status
+            raise CidError(f'Unable to refresh dataset {dataset_id}: {str(exc)}') from exc
+        return result
+
+    def refresh_dataset(self, dataset_id):
+        """ Refresh the dataset """
+        try:
+            result = self.start_ingestion(dataset_id)
+        except self.client.exceptions.LimitExceededException as exc:
+            raise CidError(f'Unable to refresh dataset {dataset_id}: {str(exc)}') from exc
+        return result['mode'], result['status']
+
+    def describe_ingestion(self, dataset_id: str, ingestion_id: str) -> dict:
+        """ Describe an ingestion of a dataset """
+        return self.client.describe_ingestion(
+            DataSetId=dataset_id,
+            IngestionId=ingestion_id,
+            AwsAccountId=self.account_id,
+        ).get('Ingestion', {})
+
+    def refresh_datasets(self, dataset_ids: list, wait: bool=False, max_ingestions: int=None, max_limit_retries: int=10) -> Dict[str, dict]:
+        """ Refresh datasets. Each dataset is refreshed once even if it is listed several times. In progress ingestions are reused.
+        :param wait: wait until all ingestions are finished, running at most max_ingestions at a time.
+            Without wait all ingestions are started at once and the function returns without monitoring them.
+        :param max_ingestions: max number of concurrent ingestions when waiting (--max-ingestions)
+        :param max_limit_retries: give up after this number of consecutive LimitExceededException (SPICE ingestion slots are busy)
+        :returns: a dict {dataset_id: result} with status, rows, duration_s and rows_per_s
+        """
+        dataset_ids = [_id for _id in dict.fromkeys(dataset_ids) if _id]
+        if wait:
+            max_ingestions = max(1, int(max_ingestions or get_parameters().get('max-ingestions') or 5))
+        else:
+            max_ingestions = len(dataset_ids)
+        self.hydrate_datasets(dataset_ids)
+        pending = list(dataset_ids)
+        running = {}
+        results = {}
+        limit_retries = 0
+        delays = backoff(initial=2, factor=1.5, maximum=30)
+        while pending or (wait and running):
+            while pending and len(running) < max_ingestions:
+                dataset_id = pending[0]
+                try:
+                    result = self.start_ingestion(dataset_id)
+                except self.client.exceptions.LimitExceededException:
+                    limit_retries += 1
+                    if limit_retries > max_limit_retries:
+                        logger.warning(f'SPICE ingestion limit is still reached after {max_limit_retries} retries, {len(pending)} datasets are not refreshed')
+                        for _id in pending:
+                            results[_id] = {'dataset_id': _id, 'status': 'FAILED', 'error': 'limit exceeded'}
+                        pending = []
+                    else:
+                        logger.info(f'SPICE ingestion limit reached, {len(pending)} datasets are waiting')
+                    break
+                except CidError as exc:
+                    logger.warning(exc)
+                    result = {'dataset_id': dataset_id, 'status': 'FAILED', 'error': str(exc)}
+                limit_retries = 0
+                pending.pop(0)
+                result['started'] = time.time()
+                results[dataset_id] = result
+                if wait and result['status'] in INGESTION_IN_PROGRESS:
+                    running[dataset_id] = result
+            if not pending and not running:
+                break
+            time.sleep(next(delays))
+            for dataset_id, result in list(running.items()):
+                try:
+                    ingestion = self.describe_ingestion(dataset_id, result['ingestion_id'])
+                except self.client.exceptions.ClientError as exc:
+                    logger.debug(f'Cannot describe ingestion of {dataset_id}: {exc}')
+                    continue
+                result['status'] = ingestion.get('IngestionStatus', result['status'])
+                if result['status'] in INGESTION_IN_PROGRESS:
+                    continue
+                del running[dataset_id]
+                rows = (ingestion.get('RowInfo') or {}).get('RowsIngested') or 0
+                duration = ingestion.get('IngestionTimeInSeconds') or round(time.time() - result['started'])
+                result.update({
+                    'rows': rows,
+                    'duration_s': duration,
+                    'rows_per_s': round(rows / duration) if duration else None,
+                    'error': (ingestion.get('ErrorInfo') or {}).get('Message'),
+                })
+                logger.info(f'Ingestion of {dataset_id} {result["status"]}: {rows} rows in {duration}s')
+        return results
 
     def describe_data_source(self, id: str, update: bool=False) -> Datasource:
         """ Describes an Amazon QuickSight DataSource """
@@ -982,7 +1223,7 @@ class QuickSight(CidBase):
             account_id=self.cidAccountId
         if not self._templates.get(f'{account_id}:{region}:{template_id}:{version_number}'):
             try:
-                client = self.session.client('quicksight', region_name=region)
+                client = self.get_regional_client(region)
                 parameters = {
                     'AwsAccountId': account_id,
                     'TemplateId': template_id
@@ -1001,6 +1242,27 @@ class QuickSight(CidBase):
                 raise CidError(f'Error: {exc} - Cannot find {template_id} in account {account_id}.') from exc
         return self._templates.get(f'{account_id}:{region}:{template_id}:{version_number}')
 
+    def get_template_version(self, template_id: str, version_number: int=None, account_id: str=None, region: str='us-east-1') -> CidVersion:
+        """ Returns cid version of a template. Versions are cached on disk per account, region and template """
+        account_id = account_id or self.cidAccountId
+        bucket = f'{account_id}:{region}'
+        key = f'{template_id}:{version_number or "latest"}'
+        cached = self._versions.get(bucket, key)
+        if cached:
+            return CidVersion(cached)
+        version = self.describe_template(template_id, version_number=version_number, account_id=account_id, region=region).cid_version
+        self._versions.set(bucket, key, str(version))
+        return version
+
+    def get_cached_version(self, key: str) -> CidVersion:
+        """ Returns a cached cid version of a resource of this account or None """
+        cached = self._versions.get(f'{self.account_id}:{self.session.region_name}', key)
+        return CidVersion(cached) if cached else None
+
+    def set_cached_version(self, key: str, version: CidVersion) -> None:
+        """ Store a cid version of a resource of this account """
+        self._versions.set(f'{self.account_id}:{self.session.region_name}', key, str(version))
+
     def describe_user(self, username: str) -> dict:
         """ Describes an Amazon QuickSight user """
         parameters = {
@@ -2,13 +2,13 @@ import io
 import json
 import logging
 from typing import Dict
-
-import yaml
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 from cid.helpers.quicksight.resource import CidQsResource
 from cid.helpers.quicksight.definition import Definition as CidQsDefinition
 from cid.helpers.quicksight.template import Template as CidQsTemplate
-from cid.utils import cid_print, get_yesno_parameter
+from cid.utils import cid_print, get_yesno_parameter, yaml_load, get_max_workers
 from cid.helpers.quicksight.resource import CidQsResource
 from cid.helpers.quicksight.dataset import Dataset
 from cid.helpers.quicksight.version import CidVersion
@@ -17,6 +17,13 @@ from cid.helpers.quicksight.version import CidVersion
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=32)
+def _parse_source_definition(data: str) -> CidQsDefinition:
+    """ parse a definition once per session, as several deployed dashboards can share the same resource """
+    definition_data = yaml_load(io.StringIO(data)) # FIXME: there can be template variables.
+    return CidQsDefinition(definition_data)
+
+
 class Dashboard(CidQsResource):
     def __init__(self, raw: dict, qs=None) -> None:
         super().__init__(raw)
@@ -45,9 +52,17 @@ class Dashboard(CidQsResource):
         return self.get_property('Arn').split('/version/')[0]
 
 
+    def describe(self) -> 'Dashboard':
+        ''' get a full description if dashboard was discovered from a summary '''
+        if not self.qs:
+            raise Exception('Need to define me with qs')
+        self.raw = self.qs.client.describe_dashboard(AwsAccountId=self.account_id, DashboardId=self.id).get('Dashboard')
+        return self
+
     @property
     def version(self) -> dict:
         '''dashboard's data in the current version. Please note it is not cid version'''
+        if not 'Version' in self.raw: self.describe()
         return self.get_property('Version')
 
 
@@ -98,35 +113,62 @@ class Dashboard(CidQsResource):
         return self._source_template
 
     @property
-    def deployed_template(self) -> CidQsTemplate:
-        ''' Fetch template referenced as current dashboard source (if any)
+    def deployed_template_arn(self) -> str:
+        ''' Arn of the template referenced as current dashboard source (if any), without version
         '''
-        if self._deployed_template:
-            return  self._deployed_template
         _template_arn = self.version.get('SourceEntityArn')
-
         if _template_arn and isinstance(_template_arn, str) \
             and len(_template_arn.split(':')) > 5 \
             and _template_arn.split(':')[5].startswith('template/'):
-            params = {
-                "region": _template_arn.split(':')[3],
-                "account_id": _template_arn.split(':')[4],
-                "template_id": _template_arn.split('/')[1],
-            }
-            if '/version/' in _template_arn:
-                params['version_number'] = int(_template_arn.split('/version/')[-1] or 0)
+            return _template_arn.split('/version/')[0]
+        return None
+
+    @property
+    def source_template_arn(self) -> str:
+        ''' Arn of the source template referenced in definition (if any)
+        '''
+        template_id = (self.definition or {}).get('templateId')
+        if not template_id:
+            return None
+        account_id = self.definition.get('sourceAccountId') or self.qs.cidAccountId
+        region = self.definition.get('region', 'us-east-1')
+        return f"arn:{self.arn.split(':')[1]}:quicksight:{region}:{account_id}:template/{template_id}"
+
+    def _deployed_template_params(self) -> dict:
+        ''' parameters of describe_template for the template referenced as current dashboard source
+        '''
+        if not self.deployed_template_arn:
+            return None
+        _template_arn = self.version.get('SourceEntityArn')
+        params = {
+            "region": _template_arn.split(':')[3],
+            "account_id": _template_arn.split(':')[4],
+            "template_id": _template_arn.split('/')[1],
+        }
+        if '/version/' in _template_arn:
+            params['version_number'] = int(_template_arn.split('/version/')[-1] or 0)
+        else:
+            # in some older deployments versions was not referenced so we try to get it from resources yaml
+            version_obj = self.definition.get('versions', {}) if self.definition else {}
+            min_template_version = int(version_obj.get('minTemplateVersion', 0)) # 0 is not a valid version for template. it starts with 1
+            if min_template_version:
+                logger.debug(f"Using default version number {min_template_version} in place")
+                params['version_number'] = min_template_version
             else:
-                # in some older deployments versions was not referenced so we try to get it from resources yaml
-                version_obj = self.definition.get('versions', {}) if self.definition else {}
-                min_template_version = int(version_obj.get('minTemplateVersion', 0)) # 0 is not a valid version for template. it starts with 1
-                if min_template_version:
-                    logger.debug(f"Using default version number {min_template_version} in place")
-                    params['version_number'] = min_template_version
-                else:
-                    logger.debug("Minimum template version could not be found for Dashboard {self.id}: {_template_arn}. We cannot describe deployed template and get the version.")
-                    return self._deployed_template # None
+                logger.debug(f"Minimum template version could not be found for Dashboard {self.id}: {_template_arn}. We cannot describe deployed template and get the version.")
+                return None
+        return params
+
+    @property
+    def deployed_template(self) -> CidQsTemplate:
+        ''' Fetch template referenced as current dashboard source (if any)
+        '''
+        if self._deployed_template:
+            return  self._deployed_template
+        params = self._deployed_template_params()
+        if params:
             try:
-                logger.debug(f'Describing template {_template_arn}')
+                logger.debug(f'Describing template {self.deployed_template_arn}')
                 _template = self.qs.describe_template(**params)
                 if isinstance(_template, CidQsTemplate):
                     self._deployed_template = _template
@@ -169,6 +211,9 @@ class Dashboard(CidQsResource):
     def datasets(self):
         if self._datasets:
             return self._datasets
+        # only names are needed here, so summaries are enough. Describe concurrently only the unknown datasets
+        known = self.qs._datasets or {}
+        self.qs.hydrate_datasets([_id for _id in self.get_dataset_ids() if _id not in known])
         for dataset_id in self.get_dataset_ids():
             try:
                 _dataset = self.qs.describe_dataset(id=dataset_id)
@@ -215,20 +260,34 @@ class Dashboard(CidQsResource):
         if self._cid_version:
             return  self._cid_version
         tag_version = (self.qs.get_tags(self.arn) or {}).get('cid_version_tag')
-        #print(f'{self.id}: {tag_version}')
         if tag_version:
             logger.trace(f'version of {self.arn} from tag = {tag_version}')
             self._cid_version = CidVersion(tag_version)
         else:
-            if self.deployed_template:
-                self._cid_version = self.deployed_template.cid_version
-            elif self.deployed_definition:
-                self._cid_version = self.deployed_definition.cid_version
+            self._cid_version = self._resolve_deployed_cid_version()
             if self._cid_version:
                 logger.trace(f'setting tag of {self.arn} to cid_version_tag = {self._cid_version}')
                 self.qs.set_tags(self.arn, cid_version_tag=self._cid_version)
         return self._cid_version
 
+    def _resolve_deployed_cid_version(self) -> CidVersion:
+        ''' version from the deployed template or, as a last resort, from the deployed definition.
+        Both are immutable for a given version, so resolved versions are cached on disk.
+        '''
+        params = self._deployed_template_params()
+        if params:
+            try:
+                return self.qs.get_template_version(**params)
+            except Exception as exc:
+                logger.debug(f'Unable to get version of template for {self.id}, {exc}')
+        cache_key = f"dashboard/{self.id}:{self.version.get('VersionNumber')}"
+        version = self.qs.get_cached_version(cache_key)
+        if not version and self.deployed_definition:
+            version = self.deployed_definition.cid_version
+            if version:
+                self.qs.set_cached_version(cache_key, version)
+        return version
+
 
     @property
     def cid_version(self): # for backward compatibility
@@ -240,9 +299,20 @@ class Dashboard(CidQsResource):
         if 'version' in self._definition:
             return CidVersion(self._definition['version'])
 
-        if self.source_template:
-            return self.source_template.cid_version
-        elif self.source_definition:
+        if self._source_template:
+            return self._source_template.cid_version
+        template_id = self.definition.get('templateId')
+        if template_id:
+            try:
+                return self.qs.get_template_version(
+                    template_id,
+                    account_id=self.definition.get('sourceAccountId'),
+                    region=self.definition.get('region', 'us-east-1'),
+                )
+            except Exception as exc:
+                logger.debug(exc, exc_info=True)
+                logger.info(f'Unable to get version of template {template_id}')
+        if self.source_definition:
             return self.source_definition.cid_version
         else:
             return None
@@ -258,9 +328,7 @@ class Dashboard(CidQsResource):
             return self._source_definition
         if 'data' in self.definition:
             # Resolve source definition (the latest definition publicly available)
-            data_stream = io.StringIO(self.definition["data"])
-            definition_data = yaml.safe_load(data_stream) # FIXME: there can be template variables. 
-            self._source_definition = CidQsDefinition(definition_data)
+            self._source_definition = _parse_source_definition(self.definition["data"])
         return self._source_definition
 
     @property
@@ -274,7 +342,7 @@ class Dashboard(CidQsResource):
             elif not self.definition:
                 self._status = 'undiscovered'
             # Source Template has changed
-            elif self.deployed_template and self.source_template and self.deployed_template.arn and self.source_template.arn and not self.deployed_template.arn.startswith(self.source_template.arn):
+            elif self.deployed_template_arn and self.source_template_arn and not self.deployed_template_arn.startswith(self.source_template_arn):
                 self._status = 'legacy'
             elif not self.latest_available_cid_version or not self.deployed_cid_version:
                 self._status = 'undetermined'
@@ -285,48 +353,87 @@ class Dashboard(CidQsResource):
                     self._status = 'up to date'
         return self._status
 
-    def display_status(self) -> None:
+    def get_status_snapshot(self) -> dict:
+        """ Returns status of the dashboard as a dict. Owners and last ingestions of datasets are read concurrently """
+        def _owners():
+            try:
+                permissions = self.qs.get_dashboard_permissions(self.id)
+            except Exception as exc:
+                if "AccessDenied" in str(exc):
+                    return 'AccessDenied'
+                logger.debug(f'Cannot read permissions of {self.id}: {exc}')
+                return []
+            return [
+                permission["Principal"].split('user/default/')[-1]
+                for permission in permissions
+                if 'quicksight:UpdateDashboardPermissions' in permission["Actions"]
+            ]
+
+        datasets = sorted(self.datasets.items())
+        with ThreadPoolExecutor(max_workers=get_max_workers()) as executor:
+            owners = executor.submit(_owners)
+            ingestions = {dataset_id: executor.submit(self.qs.get_dataset_last_ingestion_info, dataset_id) for _, dataset_id in datasets}
+            snapshot = {
+                'id': self.id,
+                'name': self.name,
+                'health': self.health,
+                'status': self.status,
+                'status_detail': self.status_detail or None,
+                'cid_version': self.cid_version,
+                'latest_version': self.latest_available_cid_version,
+                'latest': self.latest if self.latest_available_cid_version else None,
+            }
+        snapshot['owners'] = owners.result()
+        snapshot['datasets'] = []
+        for dataset_name, dataset_id in datasets:
+            dataset = self.qs.describe_dataset(dataset_id)
+            snapshot['datasets'].append({
+                'name': dataset_name,
+                'id': dataset_id,
+                'rls': dataset.rls_status if dataset else None,
+                'last_ingestion': ingestions[dataset_id].result(),
+            })
+        return snapshot
+
+    def display_status(self, snapshot: dict=None) -> None:
         """Display status of dashboard"""
-
+        snapshot = snapshot or self.get_status_snapshot()
+        health = snapshot['health']
         cid_print('\n<BOLD>Dashboard status:<END>')
-        cid_print(f"  <BOLD>Id:<END>        {self.id}")
-        cid_print(f"  <BOLD>Name:<END>      {self.name}")
-        cid_print(f"  <BOLD>Health:<END>    {'<GREEN>healthy<END>' if self.health else '<RED>unhealthy<END>'}")
-        cid_print(f"  <BOLD>Status:<END>    {'<GREEN>' + self.status + '<END>' if self.health else '<RED>' + self.status + '<END>'}")
+        cid_print(f"  <BOLD>Id:<END>        {snapshot['id']}")
+        cid_print(f"  <BOLD>Name:<END>      {snapshot['name']}")
+        cid_print(f"  <BOLD>Health:<END>    {'<GREEN>healthy<END>' if health else '<RED>unhealthy<END>'}")
+        cid_print(f"  <BOLD>Status:<END>    {'<GREEN>' + snapshot['status'] + '<END>' if health else '<RED>' + snapshot['status'] + '<END>'}")
 
-        if self.status_detail:
-            cid_print(f"  <BOLD>Status detail:<END> {self.status_detail}")
+        if snapshot['status_detail']:
+            cid_print(f"  <BOLD>Status detail:<END> {snapshot['status_detail']}")
 
-        if not self.cid_version:
+        if not snapshot['cid_version']:
             logger.debug("The cid version of the deployed dashboard could not be retrieved")
 
-        if not self.latest_available_cid_version:
+        if not snapshot['latest_version']:
             logger.debug("The latest version of the dashboard could not be retrieved")
-            cid_print(f"  <BOLD>Version:<END>   <YELLOW>{self.cid_version or 'N/A'}<END> (unable to find latest)")
+            cid_print(f"  <BOLD>Version:<END>   <YELLOW>{snapshot['cid_version'] or 'N/A'}<END> (unable to find latest)")
         else:
-            if self.latest:
-                cid_print(f"  <BOLD>Version:<END>   <GREEN>{self.cid_version or 'N/A'}<END> (latest)")
+            if snapshot['latest']:
+                cid_print(f"  <BOLD>Version:<END>   <GREEN>{snapshot['cid_version'] or 'N/A'}<END> (latest)")
             else:
                 logger.debug("An update is available")
-                cid_print(f"  <BOLD>Version:<END>   <YELLOW>{self.cid_version or 'N/A'} --> {self.latest_available_cid_version or 'N/A'}<END>")
+                cid_print(f"  <BOLD>Version:<END>   <YELLOW>{snapshot['cid_version'] or 'N/A'} --> {snapshot['latest_version'] or 'N/A'}<END>")
 
         cid_print('  <BOLD>Owners:<END>')
-        try:
-            permissions = self.qs.get_dashboard_permissions(self.id)
-            for permission in permissions:
-                if 'quicksight:UpdateDashboardPermissions' in permission["Actions"]:
-                    cid_print('    ' + permission["Principal"].split('user/default/')[-1])
-        except Exception as exc:
-            if "AccessDenied" in str(exc):
-                cid_print('     <RED>AccessDenied<END>')
+        if snapshot['owners'] == 'AccessDenied':
+            cid_print('     <RED>AccessDenied<END>')
+        else:
+            for owner in snapshot['owners']:
+                cid_print('    ' + owner)
 
-        if self.datasets:
+        if snapshot['datasets']:
             cid_print(f"  <BOLD>Datasets:<END>")
-            for dataset_name, dataset_id in  sorted(self.datasets.items()):
-                ds = self.qs.describe_dataset(dataset_id)
-                rls = {'ENABLED': '🔐', 'DISABLED': '🔓', None: ' '}.get(ds.rls_status)
-                status = self.qs.get_dataset_last_ingestion(dataset_id) or '<BLUE>DIRECT<END>' #todo fix this Blue using dataset import type.
-                cid_print(f'   {rls} {dataset_name: <36} ({dataset_id: <36}) {status}')
+            for dataset in snapshot['datasets']:
+                rls = {'ENABLED': '🔐', 'DISABLED': '🔓'}.get(dataset['rls'], ' ')
+                status = self.qs.format_ingestion(dataset['last_ingestion']) or '<BLUE>DIRECT<END>' #todo fix this Blue using dataset import type.
+                cid_print(f"   {rls} {dataset['name']: <36} ({dataset['id']: <36}) {status}")
 
     def display_url(self, url_template: str, launch: bool = False, **kwargs) -> None:
         url = url_template.format(dashboard_id=self.id, **kwargs)
@@ -336,6 +443,7 @@ class Dashboard(CidQsResource):
         """Refresh datasets of dashboard"""
         if self.datasets:
             cid_print(f"  <BOLD>Refreshing Datasets:<END>")
+            results = self.qs.refresh_datasets(list(self.datasets.values()))
             for dataset_name, dataset_id in  sorted(self.datasets.items()):
-                mode, status = self.qs.refresh_dataset(dataset_id)
-                cid_print(f'    {dataset_name: <36} ({dataset_id: <36}) Refresh Status: {status} Mode: {mode}')
+                result = results.get(dataset_id, {})
+                cid_print(f'    {dataset_name: <36} ({dataset_id: <36}) Refresh Status: {result.get("status")} Mode: {result.get("mode")}')
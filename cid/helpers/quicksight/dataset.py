@@ -33,6 +33,11 @@ class Dataset(CidQsResource):
         self.raw = self.qs.client.describe_data_set(AwsAccountId=self.account_id, DataSetId=self.id).get('DataSet')
         return self
 
+    @property
+    def described(self) -> bool:
+        """ False if dataset was created from a summary """
+        return 'PhysicalTableMap' in self.raw
+
     @property
     def id(self) -> str:
         return self.get_property('DataSetId')
@@ -0,0 +1,170 @@
+""" Client side rate limiting of QuickSight API calls.
+
+QuickSight has low TPS quotas. Calls are grouped in families (describe, list, write, other) and each family has
+a token bucket shared by all threads and all QuickSight clients of a session. On throttling the rate of the family
+is halved and then slowly recovers (AIMD). Rates can be changed with --quicksight-tps (ex: describe=10,list=5,write=2).
+"""
+import time
+import atexit
+import random
+import logging
+import threading
+
+from cid.utils import get_parameters
+from cid.exceptions import CidCritical
+
+logger = logging.getLogger(__name__)
+
+# calls per second. Conservative defaults below QuickSight quotas
+DEFAULT_RATES = {
+    'describe': 10.0,
+    'list': 5.0,
+    'write': 2.0,
+    'other': 5.0,
+}
+THROTTLING_CODES = ['Throttling', 'ThrottlingException', 'TooManyRequestsException']
+
+
+def api_family(operation: str) -> str:
+    """ returns a family of an operation name (ex: DescribeDataSet -> describe) """
+    if operation.startswith('Describe') or operation.startswith('Get'):
+        return 'describe'
+    if operation.startswith('List') or operation.startswith('Search'):
+        return 'list'
+    if operation.startswith(('Create', 'Update', 'Delete', 'Put', 'Tag', 'Untag', 'Register', 'Start', 'Cancel')):
+        return 'write'
+    return 'other'
+
+
+def get_rates() -> dict:
+    """ returns rates per family with overrides from --quicksight-tps """
+    rates = dict(DEFAULT_RATES)
+    value = get_parameters().get('quicksight-tps')
+    if not value:
+        return rates
+    for item in str(value).split(','):
+        family, _, rate = item.partition('=')
+        family = family.strip()
+        if family not in rates:
+            raise CidCritical(f'Unknown QuickSight API family "{family}" in quicksight-tps. Use one of: {list(rates.keys())}')
+        try:
+            rates[family] = float(rate)
+        except ValueError as exc:
+            raise CidCritical(f'quicksight-tps must look like describe=10,list=5 got: {value}') from exc
+    return rates
+
+
+class TokenBucket():
+    """ Thread safe token bucket with an adaptive rate. A rate of 0 means unlimited """
+
+    def __init__(self, rate: float, burst: float=None) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> float:
+        """ wait for a token. Returns the time waited in seconds """
+        if not self.max_rate:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            delay *= random.uniform(1.0, 1.2) # jitter, so waiting threads do not wake up together
+            time.sleep(delay)
+            waited += delay
+
+    def throttled(self) -> None:
+        """ halve the rate after a throttling """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+
+    def succeeded(self) -> None:
+        """ recover the rate slowly after a successful call """
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class RateLimiter():
+    """ Token buckets per QuickSight API family with throttling counters """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sessions = set()
+        self.buckets = {}
+        self.throttled = {}
+        self.waited = {}
+
+    def register(self, session) -> None:
+        """ register hooks for all QuickSight clients of a boto3 session """
+        with self._lock:
+            if id(session) in self._sessions:
+                return
+            if not self._sessions:
+                atexit.register(self.log_report)
+            self._sessions.add(id(session))
+            for family, rate in get_rates().items():
+                if family not in self.buckets:
+                    self.buckets[family] = TokenBucket(rate)
+        session.events.register('before-send.quicksight', self._before_send) # each attempt including retries
+        session.events.register('needs-retry.quicksight', self._needs_retry)
+
+    @staticmethod
+    def _family(event_name: str) -> str:
+        # event names look like 'before-send.quicksight.DescribeDataSet'
+        return api_family(event_name.split('.')[-1])
+
+    def _before_send(self, event_name, **kwargs) -> None:
+        family = self._family(event_name)
+        waited = self.buckets[family].acquire()
+        if waited:
+            with self._lock:
+                self.waited[family] = self.waited.get(family, 0.0) + waited
+
+    def _needs_retry(self, event_name, response=None, **kwargs) -> None:
+        if not response:
+            return
+        family = self._family(event_name)
+        error_code = (response[1] or {}).get('Error', {}).get('Code')
+        if error_code in THROTTLING_CODES:
+            self.buckets[family].throttled()
+            with self._lock:
+                self.throttled[family] = self.throttled.get(family, 0) + 1
+            logger.debug(f'QuickSight throttled {event_name.split(".")[-1]}, {family} rate is now {self.buckets[family].rate:.2f}/s')
+        elif not error_code:
+            self.buckets[family].succeeded()
+
+    def report(self) -> dict:
+        """ returns throttling counts and time spent waiting per family """
+        with self._lock:
+            return {
+                family: {
+                    'throttled': self.throttled.get(family, 0),
+                    'waited_s': round(self.waited.get(family, 0.0), 1),
+                    'rate': round(bucket.rate, 2),
+                }
+                for family, bucket in self.buckets.items()
+            }
+
+    def log_report(self) -> None:
+        """ log a summary if there was any throttling """
+        throttled = {family: count for family, count in self.throttled.items() if count}
+        if throttled:
+            logger.info(f'QuickSight throttling: {self.report()}')
+
+
+rate_limiter = RateLimiter()
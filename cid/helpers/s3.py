@@ -1,6 +1,9 @@
+import io
 import re
 import logging
-from typing import Optional, List
+from collections import deque
+from typing import Optional, List, Iterator
+from concurrent.futures import ThreadPoolExecutor
 
 from cid.base import CidBase
 from cid.exceptions import CidError
@@ -9,6 +12,29 @@ from cid.exceptions import CidError
 logger = logging.getLogger(__name__)
 
 
+class ChunksReader(io.RawIOBase):
+    ''' Read-only file-like object over an iterator of bytes chunks
+    '''
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = iter(chunks)
+        self._chunk = memoryview(b'')
+        self._offset = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self._offset >= len(self._chunk):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0 # EOF
+            self._chunk, self._offset = memoryview(chunk), 0
+        size = min(len(buffer), len(self._chunk) - self._offset)
+        buffer[:size] = self._chunk[self._offset:self._offset + size]
+        self._offset += size
+        return size
+
+
 class S3(CidBase):
     ''' S3 Helper
     '''
@@ -88,3 +114,28 @@ class S3(CidBase):
             if re.findall(regexp, path):
                 paths.append(re.sub(regexp,'',path))
         return paths
+
+    def iterate_object_chunks(self, bucket: str, key: str, chunk_size: int=8*1024*1024, max_workers: int=4) -> Iterator[bytes]:
+        ''' yield the content of an object in order, downloading chunks with concurrent ranged GETs.
+        Not more than max_workers chunks are kept in memory.
+        '''
+        size = self.client.head_object(Bucket=bucket, Key=key)['ContentLength']
+        ranges = iter([(start, min(start + chunk_size, size) - 1) for start in range(0, size, chunk_size)])
+
+        def _get_range(byte_range):
+            return self.client.get_object(Bucket=bucket, Key=key, Range=f'bytes={byte_range[0]}-{byte_range[1]}')['Body'].read()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = deque(executor.submit(_get_range, byte_range) for _, byte_range in zip(range(max_workers), ranges))
+            while futures:
+                chunk = futures.popleft().result()
+                next_range = next(ranges, None)
+                if next_range:
+                    futures.append(executor.submit(_get_range, next_range))
+                yield chunk
+
+    def open_text(self, bucket: str, key: str, encoding: str='utf-8', **kwargs) -> io.TextIOBase:
+        ''' returns a streaming text file object for an S3 object (see iterate_object_chunks for kwargs)
+        '''
+        raw = ChunksReader(self.iterate_object_chunks(bucket, key, **kwargs))
+        return io.TextIOWrapper(io.BufferedReader(raw), encoding=encoding, newline='')
@@ -0,0 +1,152 @@
+""" Dependency graph of deployment steps (views, CUR columns etc) with concurrent execution
+"""
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from cid.exceptions import CidCritical
+
+logger = logging.getLogger(__name__)
+
+
+class Node():
+    """ A step of deployment """
+
+    def __init__(self, key: tuple, func=None, depends_on: list=None) -> None:
+        self.key = key
+        self.func = func
+        self.depends_on = list(depends_on or [])
+        self.status = 'pending' # pending|running|done|failed|skipped
+        self.result = None
+        self.error = None
+        self.duration = None
+
+    @property
+    def name(self) -> str:
+        return ':'.join(map(str, self.key))
+
+    def __repr__(self) -> str:
+        return f'Node({self.name}, {self.status})'
+
+    def run(self):
+        """ execute the node and record timing """
+        start = time.time()
+        try:
+            if self.func:
+                self.result = self.func()
+            return self.result
+        finally:
+            self.duration = time.time() - start
+
+
+class DependencyGraph():
+    """ A DAG of deployment steps. Nodes are executed when all dependencies are done.
+    Independent nodes are executed concurrently on a bounded pool. A failure of a node
+    skips only nodes that depend on it, all others continue.
+    """
+
+    def __init__(self) -> None:
+        self.nodes = {}
+
+    def __contains__(self, key) -> bool:
+        return key in self.nodes
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def add(self, key: tuple, func=None, depends_on: list=None) -> Node:
+        """ add a node or update dependencies and function of an existing one """
+        node = self.nodes.get(key)
+        if node:
+            node.func = func or node.func
+            node.depends_on += [dep for dep in (depends_on or []) if dep not in node.depends_on]
+        else:
+            node = self.nodes[key] = Node(key, func, depends_on)
+        return node
+
+    def dependents(self, key: tuple) -> list:
+        """ nodes that directly depend on a given one """
+        return [node for node in self.nodes.values() if key in node.depends_on]
+
+    def topological_order(self) -> list:
+        """ returns a list of nodes where each node goes after all its dependencies (Kahn's algorithm).
+        Order is stable: nodes with no relation keep the order they were added.
+        """
+        for node in self.nodes.values():
+            missing = [dep for dep in node.depends_on if dep not in self.nodes]
+            if missing:
+                raise CidCritical(f'{node.name} depends on unknown nodes: {missing}')
+        in_degree = {key: len(set(node.depends_on)) for key, node in self.nodes.items()}
+        ready = [key for key, degree in in_degree.items() if degree == 0]
+        order = []
+        while ready:
+            key = ready.pop(0)
+            order.append(self.nodes[key])
+            for node in self.dependents(key):
+                in_degree[node.key] -= 1
+                if in_degree[node.key] == 0:
+                    ready.append(node.key)
+        if len(order) != len(self.nodes):
+            cycle = [node.name for key, node in self.nodes.items() if in_degree[key] > 0]
+            raise CidCritical(f'Circular dependency between: {", ".join(cycle)}')
+        return order
+
+    def _skip_dependents(self, key: tuple) -> None:
+        for node in self.dependents(key):
+            if node.status == 'pending':
+                node.status = 'skipped'
+                logger.info(f'Skipping {node.name} as it depends on failed {self.nodes[key].name}')
+                self._skip_dependents(node.key)
+
+    def _finish(self, node: Node, error: BaseException=None) -> None:
+        if error is None:
+            node.status = 'done'
+            logger.info(f'{node.name} done in {node.duration:.2f}s')
+        else:
+            node.status = 'failed'
+            node.error = error
+            logger.info(f'{node.name} failed in {node.duration or 0:.2f}s: {error}')
+            self._skip_dependents(node.key)
+
+    def run(self, max_workers: int=1) -> dict:
+        """ Execute all nodes respecting dependencies. Returns a dict {key: result}.
+        If any node failed, the first failure is raised after all independent nodes are finished.
+        """
+        order = self.topological_order()
+        logger.debug(f'Execution order: {[node.name for node in order]}')
+        if max_workers <= 1: # keep it simple and in the main thread
+            for node in order:
+                if node.status != 'pending':
+                    continue
+                node.status = 'running'
+                try:
+                    node.run()
+                except (KeyboardInterrupt, SystemExit):
+                    raise
+                except BaseException as exc: # pylint: disable=broad-except
+                    self._finish(node, exc)
+                else:
+                    self._finish(node)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                running = {}
+                while True:
+                    for node in order:
+                        if node.status == 'pending' and all(self.nodes[dep].status == 'done' for dep in node.depends_on):
+                            node.status = 'running'
+                            running[executor.submit(node.run)] = node
+                    if not running:
+                        break
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        self._finish(running.pop(future), future.exception())
+        self.log_timings()
+        failed = [node for node in order if node.status == 'failed']
+        if failed:
+            raise failed[0].error
+        return {key: node.result for key, node in self.nodes.items()}
+
+    def log_timings(self) -> None:
+        """ log per node timing, the slowest first """
+        for node in sorted(self.nodes.values(), key=lambda node: -(node.duration or 0)):
+            logger.debug(f'  {node.name}: {node.status} {node.duration or 0:.2f}s')
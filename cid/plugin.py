@@ -1,6 +1,6 @@
 # Implements generic Plugin class to load plugins
 
-import json, yaml
+import json
 from pkg_resources import (
     resource_exists,
     resource_string,
@@ -11,6 +11,8 @@ from pkg_resources import (
 )
 import logging
 
+from cid.utils import yaml_load
+
 logger = logging.getLogger(__name__)
 
 class Plugin():
@@ -30,7 +32,7 @@ class Plugin():
                     logger.debug(f'Loaded {pkg_resource} as JSON')
                 elif ext in ['yaml', 'yml']:
                     with resource_stream(self.name, f'data/{pkg_resource}') as yaml_stream:
-                        content = yaml.load(yaml_stream, Loader=yaml.SafeLoader)
+                        content = yaml_load(yaml_stream)
                         logger.debug(f'Loaded {pkg_resource} as YAML')
                 if content is None:
                     logger.info(f'Unsupported file type: {pkg_resource}')
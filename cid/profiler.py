@@ -0,0 +1,153 @@
+""" Timing of AWS API calls and Athena queries (--profile-report).
+
+Hooks into boto3 events of a session, so all clients created from that session are measured.
+"""
+import sys
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# upper bounds of latency buckets in milliseconds
+BUCKETS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float('inf')]
+THROTTLING_CODES = ['Throttling', 'ThrottlingException', 'ThrottledException', 'TooManyRequestsException', 'RequestLimitExceeded', 'SlowDown']
+
+
+class Stats():
+    """ Latency histogram of one operation """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.retries = 0
+        self.throttled = 0
+        self.errors = 0
+
+    def add(self, duration_ms: float) -> None:
+        self.count += 1
+        self.total += duration_ms
+        self.max = max(self.max, duration_ms)
+        self.buckets[next(index for index, bound in enumerate(BUCKETS) if duration_ms <= bound)] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 1),
+            'avg_ms': round(self.total / self.count, 1) if self.count else 0,
+            'max_ms': round(self.max, 1),
+            'histogram_ms': {f'<={bound}': value for bound, value in zip(BUCKETS, self.buckets) if value},
+            'retries': self.retries,
+            'throttled': self.throttled,
+            'errors': self.errors,
+        }
+
+
+class Profiler():
+    """ Collects per service/operation statistics of API calls and Athena queries """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.api_calls = {}
+        self.athena_queries = []
+        self.start = time.time()
+        self._sessions = set()
+        self.enabled = False
+
+    def register(self, session) -> None:
+        """ register hooks on a boto3 session. Must be done before clients are created """
+        if id(session) in self._sessions:
+            return
+        self._sessions.add(id(session))
+        self.enabled = True
+        session.events.register('before-parameter-build', self._before_call) # first event of each api call that has the context
+        session.events.register('after-call', self._after_call)
+        session.events.register('needs-retry', self._needs_retry)
+
+    def _stats(self, service: str, operation: str) -> Stats:
+        key = f'{service}.{operation}'
+        if key not in self.api_calls:
+            self.api_calls[key] = Stats()
+        return self.api_calls[key]
+
+    @staticmethod
+    def _names(event_name: str) -> tuple:
+        # event names look like 'after-call.athena.StartQueryExecution'
+        parts = event_name.split('.')
+        return (parts[1], parts[2]) if len(parts) > 2 else ('unknown', 'unknown')
+
+    def _before_call(self, context=None, **kwargs) -> None:
+        if context is not None:
+            context['cid_profiler_start'] = time.perf_counter()
+
+    def _after_call(self, event_name, parsed=None, context=None, **kwargs) -> None:
+        start = (context or {}).get('cid_profiler_start')
+        if start is None:
+            return
+        service, operation = self._names(event_name)
+        parsed = parsed or {}
+        error_code = parsed.get('Error', {}).get('Code')
+        with self._lock:
+            stats = self._stats(service, operation)
+            stats.add((time.perf_counter() - start) * 1000)
+            stats.retries += parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+            if error_code:
+                stats.errors += 1
+
+    def _needs_retry(self, event_name, response=None, **kwargs) -> None:
+        if not response:
+            return
+        error_code = (response[1] or {}).get('Error', {}).get('Code')
+        if error_code in THROTTLING_CODES:
+            service, operation = self._names(event_name)
+            with self._lock:
+                self._stats(service, operation).throttled += 1
+
+    def record_athena_query(self, execution: dict) -> None:
+        """ record queue and execution time of a finished Athena query """
+        statistics = execution.get('Statistics', {})
+        with self._lock:
+            self.athena_queries.append({
+                'id': execution.get('QueryExecutionId'),
+                'state': execution.get('Status', {}).get('State'),
+                'statement_type': execution.get('StatementType'),
+                'queue_ms': statistics.get('QueryQueueTimeInMillis'),
+                'execution_ms': statistics.get('EngineExecutionTimeInMillis'),
+                'total_ms': statistics.get('TotalExecutionTimeInMillis'),
+                'scanned_bytes': statistics.get('DataScannedInBytes'),
+            })
+
+    def report(self) -> dict:
+        """ returns a summary """
+        with self._lock:
+            api_calls = {key: stats.to_dict() for key, stats in sorted(self.api_calls.items(), key=lambda item: -item[1].total)}
+            queries = list(self.athena_queries)
+        return {
+            'duration_s': round(time.time() - self.start, 1),
+            'api_calls': api_calls,
+            'athena': {
+                'queries': len(queries),
+                'queue_ms': sum(query['queue_ms'] or 0 for query in queries),
+                'execution_ms': sum(query['execution_ms'] or 0 for query in queries),
+                'slowest': sorted(queries, key=lambda query: -(query['total_ms'] or 0))[:10],
+            },
+        }
+
+    def write_report(self, path: str) -> None:
+        """ write a json report to a file or to stdout if path is '-' """
+        text = json.dumps(self.report(), indent=2, default=str)
+        if path in ['-', 'stdout']:
+            print(text)
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as file_:
+                file_.write(text)
+            print(f'Profile report written to {path}', file=sys.stderr)
+        except OSError as exc:
+            logger.warning(f'Cannot write profile report to {path}: {exc}')
+
+
+profiler = Profiler()
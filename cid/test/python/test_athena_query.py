@@ -0,0 +1,204 @@
+import io
+import json
+import base64
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+from botocore.response import StreamingBody
+
+from cid.helpers import S3
+from cid.helpers.athena import Athena, backoff
+from cid.exceptions import CidCritical
+
+
+def get_athena():
+    """ returns Athena helper with stubbed client
+    """
+    session = boto3.session.Session(region_name='us-east-1', aws_access_key_id='test', aws_secret_access_key='test')
+    athena = Athena(session)
+    athena._client = session.client('athena', region_name='us-east-1')
+    athena._CatalogName = 'AwsDataCatalog'
+    athena._DatabaseName = 'cid_cur'
+    athena._WorkGroup = 'CID'
+    return athena, Stubber(athena._client)
+
+
+def execution(query_id, state):
+    return {'QueryExecutionId': query_id, 'Status': {'State': state, 'StateChangeReason': 'some reason'}}
+
+
+def test_backoff():
+    """ make sure polling starts fast and is capped
+    """
+    delays = backoff(initial=0.1, factor=2, maximum=1)
+    assert [next(delays) for _ in range(6)] == [0.1, 0.2, 0.4, 0.8, 1, 1]
+
+
+def test_execute_queries(monkeypatch):
+    """ make sure queries are submitted at once and polled in batches
+    """
+    monkeypatch.setattr('time.sleep', lambda _: None)
+    athena, stubber = get_athena()
+    stubber.add_response('start_query_execution', {'QueryExecutionId': 'q1'})
+    stubber.add_response('start_query_execution', {'QueryExecutionId': 'q2'})
+    stubber.add_response('batch_get_query_execution', {
+        'QueryExecutions': [execution('q1', 'SUCCEEDED'), execution('q2', 'RUNNING')],
+        'UnprocessedQueryExecutionIds': [],
+    }, {'QueryExecutionIds': ['q1', 'q2']})
+    stubber.add_response('batch_get_query_execution', {
+        'QueryExecutions': [execution('q2', 'FAILED')],
+        'UnprocessedQueryExecutionIds': [],
+    }, {'QueryExecutionIds': ['q2']})
+    with stubber:
+        query1, query2 = athena.execute_queries(['SELECT 1', 'SELECT 2'], fail=False)
+    assert query1.result() == 'q1'
+    assert query2.result() is False
+    stubber.assert_no_pending_responses()
+
+
+def test_execute_query_fails():
+    """ make sure a failed query raises CidCritical
+    """
+    athena, stubber = get_athena()
+    stubber.add_response('start_query_execution', {'QueryExecutionId': 'q1'})
+    stubber.add_response('batch_get_query_execution', {
+        'QueryExecutions': [execution('q1', 'FAILED')],
+        'UnprocessedQueryExecutionIds': [],
+    })
+    with stubber:
+        with pytest.raises(CidCritical):
+            athena.execute_query('SELECT 1')
+
+
+def test_iter_query_results():
+    """ make sure results are streamed page by page with header skipped once and values typed
+    """
+    athena, stubber = get_athena()
+    metadata = {'ColumnInfo': [
+        {'Name': 'name', 'Type': 'varchar'},
+        {'Name': 'cost', 'Type': 'double'},
+        {'Name': 'count', 'Type': 'bigint'},
+    ]}
+    def row(*values):
+        return {'Data': [{'VarCharValue': value} if value is not None else {} for value in values]}
+    stubber.add_response('get_query_results', {
+        'ResultSet': {'Rows': [row('name', 'cost', 'count'), row('a', '1.5', '2')], 'ResultSetMetadata': metadata},
+        'NextToken': 'token',
+    })
+    stubber.add_response('get_query_results', {
+        'ResultSet': {'Rows': [row('b', None, '3')], 'ResultSetMetadata': metadata},
+    })
+    with stubber:
+        rows = list(athena.iter_query_results('q1', typed=True))
+    assert rows == [['a', 1.5, 2], ['b', None, 3]]
+    stubber.assert_no_pending_responses()
+
+
+def test_iter_query_results_from_s3():
+    """ make sure large results are read from the result csv file on s3
+    """
+    athena, stubber = get_athena()
+    athena._s3 = S3(athena.session)
+    s3_stubber = Stubber(athena._s3.client)
+    content = b'"name","cost"\n"a","1.5"\n"b",\n"c\nd","3"\n'
+    stubber.add_response('get_query_results', {
+        'ResultSet': {'Rows': [{'Data': [{'VarCharValue': 'name'}, {'VarCharValue': 'cost'}]}], 'ResultSetMetadata': {'ColumnInfo': [
+            {'Name': 'name', 'Type': 'varchar'},
+            {'Name': 'cost', 'Type': 'double'},
+        ]}},
+        'NextToken': 'token',
+    })
+    stubber.add_response('get_query_execution', {'QueryExecution': {
+        'QueryExecutionId': 'q1',
+        'StatementType': 'DML',
+        'ResultConfiguration': {'OutputLocation': 's3://bucket/path/q1.csv'},
+    }})
+    s3_stubber.add_response('head_object', {'ContentLength': len(content)})
+    s3_stubber.add_response('get_object', {'Body': StreamingBody(io.BytesIO(content), len(content))})
+    with stubber, s3_stubber:
+        rows = list(athena.iter_query_results('q1', typed=True))
+    assert rows == [['a', 1.5], ['b', None], ['c\nd', 3.0]]
+
+
+def test_view_hash(monkeypatch):
+    """ make sure a view deployed with the same query is detected as unchanged and a modified one is not
+    """
+    athena, _ = get_athena()
+    monkeypatch.setattr(Athena, '_awsIdentity', {'Account': '123456789012'})
+    glue_stubber = Stubber(athena.glue.client)
+    view = {'Name': 'summary_view', 'DatabaseName': 'cid_cur', 'ViewOriginalText': '/* Presto View: abc */', 'Parameters': {'presto_view': 'true'}}
+    glue_stubber.add_response('get_table', {'Table': view})
+    glue_stubber.add_response('update_table', {})
+    glue_stubber.add_response('get_table', {'Table': dict(view, Parameters={
+        'cid_sql_hash': athena._sql_hash('CREATE VIEW summary_view AS SELECT 1'),
+        'cid_view_text_hash': athena._sql_hash('/* Presto View: abc */'),
+    })})
+    glue_stubber.add_response('get_table', {'Table': dict(view, ViewOriginalText='/* Presto View: changed */', Parameters={
+        'cid_sql_hash': athena._sql_hash('CREATE VIEW summary_view AS SELECT 1'),
+        'cid_view_text_hash': athena._sql_hash('/* Presto View: abc */'),
+    })})
+    with glue_stubber:
+        athena.record_view_hash('summary_view', 'CREATE VIEW summary_view AS SELECT 1')
+        assert athena.view_is_unchanged('summary_view', 'CREATE VIEW summary_view AS SELECT 1')
+        assert not athena.view_is_unchanged('summary_view', 'CREATE VIEW summary_view AS SELECT 1')
+    glue_stubber.assert_no_pending_responses()
+
+
+def test_process_views(monkeypatch):
+    """ make sure view dependencies are discovered from Glue and definitions are fetched at once
+    """
+    athena, stubber = get_athena()
+    monkeypatch.setattr(Athena, '_awsIdentity', {'Account': '123456789012'})
+    glue_stubber = Stubber(athena.glue.client)
+    view_text = '/* Presto View: ' + base64.b64encode(json.dumps({'originalSql': 'SELECT * FROM "cid_cur"."cur_table"'}).encode()).decode() + ' */'
+    glue_stubber.add_response('get_tables', {'TableList': [
+        {'Name': 'summary_view', 'TableType': 'VIRTUAL_VIEW', 'ViewOriginalText': view_text},
+        {'Name': 'cur_table', 'TableType': 'EXTERNAL_TABLE'},
+        {'Name': 'other_table', 'TableType': 'EXTERNAL_TABLE'},
+    ]})
+    stubber.add_response('start_query_execution', {'QueryExecutionId': 'q1'}, {
+        'QueryString': 'SHOW CREATE VIEW summary_view',
+        'QueryExecutionContext': {'Catalog': 'AwsDataCatalog', 'Database': 'cid_cur'},
+        'WorkGroup': 'CID',
+    })
+    stubber.add_response('start_query_execution', {'QueryExecutionId': 'q2'}, {
+        'QueryString': 'SHOW CREATE TABLE cur_table',
+        'QueryExecutionContext': {'Catalog': 'AwsDataCatalog', 'Database': 'cid_cur'},
+        'WorkGroup': 'CID',
+    })
+    stubber.add_response('batch_get_query_execution', {
+        'QueryExecutions': [execution('q1', 'SUCCEEDED'), execution('q2', 'SUCCEEDED')],
+        'UnprocessedQueryExecutionIds': [],
+    })
+    stubber.add_response('get_query_results', {'ResultSet': {'Rows': [{'Data': [{'VarCharValue': 'CREATE VIEW summary_view AS'}]}]}})
+    stubber.add_response('get_query_results', {'ResultSet': {'Rows': [{'Data': [{'VarCharValue': 'CREATE EXTERNAL TABLE cur_table'}]}]}})
+    with stubber, glue_stubber:
+        views = athena.process_views(['summary_view'])
+    assert views == {
+        'summary_view': {'dependsOn': {'views': ['cur_table']}, 'data': 'CREATE VIEW summary_view AS'},
+        'cur_table': {'data': 'CREATE EXTERNAL TABLE cur_table'},
+    }
+    stubber.assert_no_pending_responses()
+
+
+def test_find_tables_with_columns_in_glue(monkeypatch, tmp_path):
+    """ make sure tables are searched in Glue, checked for all columns and cached per database
+    """
+    monkeypatch.setenv('CID_CACHE_DIR', str(tmp_path))
+    athena, _ = get_athena()
+    monkeypatch.setattr(Athena, '_awsIdentity', {'Account': '123456789012'})
+    glue_stubber = Stubber(athena.glue.client)
+    def table(name, database, columns):
+        return {'Name': name, 'DatabaseName': database, 'TableType': 'EXTERNAL_TABLE', 'StorageDescriptor': {'Columns': [{'Name': column, 'Type': 'string'} for column in columns]}}
+    search = {'CatalogId': '123456789012', 'SearchText': '"bill_payer_account_id"', 'Filters': [{'Key': 'DatabaseName', 'Value': 'cid_cur'}], 'MaxResults': 1000}
+    glue_stubber.add_response('search_tables', {'TableList': [table('cur', 'cid_cur', ['bill_payer_account_id', 'line_item_usage_account_id'])], 'NextToken': 't1'}, search)
+    glue_stubber.add_response('search_tables', {'TableList': [
+        table('partial', 'cid_cur', ['bill_payer_account_id']),
+        table('cur', 'cid_cur_copy', ['bill_payer_account_id', 'line_item_usage_account_id']),
+    ]}, dict(search, NextToken='t1'))
+    with glue_stubber:
+        for _ in range(2):
+            tables = list(athena.find_tables_with_columns(['bill_payer_account_id', 'line_item_usage_account_id'], database_name='cid_cur'))
+            assert [(table['Name'], [column['Name'] for column in table['Columns']]) for table in tables] == [('cur', ['bill_payer_account_id', 'line_item_usage_account_id'])]
+    glue_stubber.assert_no_pending_responses()
@@ -0,0 +1,247 @@
+""" Offline benchmarks of the hot paths on a large account.
+
+AWS is replaced by an in-process fake that answers API calls from generated data with a small simulated latency.
+Each benchmark fails if it is slower than its budget. Benchmarks run only with CID_BENCHMARK=1.
+Budgets can be scaled with CID_BENCHMARK_FACTOR (ex: CID_BENCHMARK_FACTOR=3 on slow CI runners)
+and the latency changed with CID_BENCHMARK_LATENCY_MS.
+"""
+import os
+import time
+import logging
+import threading
+import collections
+
+import boto3
+import pytest
+from botocore.awsrequest import AWSResponse
+
+from cid.logger import add_logging_level
+from cid.utils import set_parameters
+from cid.helpers.cur import CUR
+from cid.helpers.cur_proxy import ProxyView
+from cid.helpers.glue import Glue
+from cid.helpers.athena import Athena
+from cid.helpers.quicksight import QuickSight
+
+add_logging_level('TRACE', logging.DEBUG - 5) # proxy view uses logger.trace
+
+pytestmark = pytest.mark.skipif(not os.environ.get('CID_BENCHMARK'), reason='benchmarks run only with CID_BENCHMARK=1')
+
+LATENCY = float(os.environ.get('CID_BENCHMARK_LATENCY_MS', 5)) / 1000
+FACTOR = float(os.environ.get('CID_BENCHMARK_FACTOR', 1))
+
+DATASETS = 500
+DEPLOYED_DASHBOARDS = 500
+DASHBOARDS = 100 # supported ones
+DATABASES = 10
+TABLES = 3000
+CUR_TAGS = 2000
+
+
+class FakeAws():
+    """ Answers api calls of a boto3 client with functions of the call parameters.
+
+    Unlike Stubber, responses do not depend on the order of calls, so it can be used with concurrent workers.
+    """
+
+    def __init__(self, client, handlers: dict) -> None:
+        self.handlers = handlers
+        self.calls = collections.Counter()
+        self._lock = threading.Lock()
+        client.meta.events.register('before-parameter-build', self._store_params)
+        client.meta.events.register('before-call', self._respond)
+
+    def _store_params(self, params, context, **kwargs) -> None:
+        context['fake_params'] = dict(params)
+
+    def _respond(self, model, context, **kwargs) -> tuple:
+        with self._lock:
+            self.calls[model.name] += 1
+        time.sleep(LATENCY)
+        handler = self.handlers.get(model.name)
+        if not handler:
+            return AWSResponse(None, 400, {}, None), {'Error': {'Code': 'NotImplemented', 'Message': model.name}}
+        result = handler(**context['fake_params'])
+        if 'Error' in result:
+            return AWSResponse(None, 400, {}, None), result
+        return AWSResponse(None, 200, {}, None), result
+
+
+def paginate(items: list, key: str, page_size: int, NextToken: str=None) -> dict:
+    """ returns a page of items with a NextToken for the following page """
+    start = int(NextToken or 0)
+    page = {key: items[start:start + page_size]}
+    if start + page_size < len(items):
+        page['NextToken'] = str(start + page_size)
+    return page
+
+
+def assert_budget(name: str, seconds: float, budget: float) -> None:
+    print(f'benchmark {name}: {seconds:.2f}s (budget {budget * FACTOR:.1f}s)')
+    assert seconds < budget * FACTOR, f'{name} took {seconds:.2f}s which is more than {budget * FACTOR:.1f}s'
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    """ no persistent cache and no parameters leaking between benchmarks """
+    monkeypatch.setenv('CID_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr('cid.utils.params', {})
+
+
+def get_quicksight(monkeypatch) -> tuple:
+    monkeypatch.setattr(QuickSight, '_awsIdentity', {'Account': '123456789012'})
+    monkeypatch.setattr(QuickSight, '_identityRegion', 'us-east-1')
+    session = boto3.session.Session(region_name='us-east-1', aws_access_key_id='test', aws_secret_access_key='test')
+    resources = {'dashboards': {f'Dashboard {i}': {'dashboardId': f'dashboard-{i}'} for i in range(DASHBOARDS)}}
+    qs = QuickSight(session, resources=resources)
+    arn = 'arn:aws:quicksight:us-east-1:123456789012'
+
+    def list_dashboards(AwsAccountId, NextToken=None, **kwargs):
+        summaries = [{'DashboardId': f'dashboard-{i}', 'Name': f'Dashboard {i}', 'Arn': f'{arn}:dashboard/dashboard-{i}'} for i in range(DEPLOYED_DASHBOARDS)]
+        return paginate(summaries, 'DashboardSummaryList', 100, NextToken)
+
+    def describe_dashboard(AwsAccountId, DashboardId):
+        return {'Dashboard': {
+            'DashboardId': DashboardId,
+            'Name': DashboardId,
+            'Arn': f'{arn}:dashboard/{DashboardId}',
+            'Version': {
+                'Status': 'CREATION_SUCCESSFUL',
+                'VersionNumber': 1,
+                'SourceEntityArn': f'{arn}:template/{DashboardId}/version/1',
+                'DataSetArns': [f'{arn}:dataset/dataset-{i}' for i in range(5)],
+            },
+        }}
+
+    def describe_data_set(AwsAccountId, DataSetId):
+        return {'DataSet': {
+            'DataSetId': DataSetId,
+            'Name': DataSetId,
+            'Arn': f'{arn}:dataset/{DataSetId}',
+            'PhysicalTableMap': {'table': {'CustomSql': {'DataSourceArn': f'{arn}:datasource/athena', 'Name': 'sql', 'SqlQuery': 'SELECT 1', 'Columns': []}}},
+            'OutputColumns': [{'Name': f'column_{i}', 'Type': 'STRING'} for i in range(50)],
+        }}
+
+    fake = FakeAws(qs.client, {
+        'ListDashboards': list_dashboards,
+        'DescribeDashboard': describe_dashboard,
+        'DescribeDataSet': describe_data_set,
+    })
+    return qs, fake
+
+
+def cur_columns(tags: int=0) -> list:
+    columns = CUR.cur_minimal_required_columns + ['line_item_unblended_cost', 'line_item_usage_start_date', 'product_product_name']
+    return [{'Name': name, 'Type': 'string'} for name in columns] + [
+        {'Name': f'resource_tags_user_tag_{i}', 'Type': 'string'} for i in range(tags)
+    ]
+
+
+def get_cur_athena() -> tuple:
+    session = boto3.session.Session(region_name='us-east-1', aws_access_key_id='test', aws_secret_access_key='test')
+    athena = Athena(session)
+    athena._awsIdentity = {'Account': '123456789012'}
+    athena._client = session.client('athena', region_name='us-east-1')
+    athena._CatalogName = 'AwsDataCatalog'
+    athena._DatabaseName = 'cid'
+    athena._WorkGroup = 'CID'
+    tables = {}
+    for database_index in range(DATABASES):
+        database = f'database_{database_index}'
+        tables[database] = [
+            {'Name': f'table_{i}', 'TableType': 'EXTERNAL_TABLE', 'Columns': [{'Name': f'column_{c}', 'Type': 'string'} for c in range(30)]}
+            for i in range(TABLES // DATABASES)
+        ]
+    tables['database_7'][42] = {'Name': 'cur', 'TableType': 'EXTERNAL_TABLE', 'Columns': cur_columns(CUR_TAGS)}
+
+    def list_databases(CatalogName, NextToken=None, **kwargs):
+        return paginate([{'Name': name} for name in tables], 'DatabaseList', 50, NextToken)
+
+    def list_table_metadata(CatalogName, DatabaseName, NextToken=None, **kwargs):
+        return paginate(tables[DatabaseName], 'TableMetadataList', 50, NextToken)
+
+    def get_table_metadata(CatalogName, DatabaseName, TableName):
+        table = next((table for table in tables.get(DatabaseName, []) if table['Name'] == TableName), None)
+        if not table:
+            return {'Error': {'Code': 'MetadataException', 'Message': f'{TableName} not found'}}
+        return {'TableMetadata': table}
+
+    def search_tables(CatalogId, SearchText, Filters, NextToken=None, **kwargs):
+        database = next(item['Value'] for item in Filters if item['Key'] == 'DatabaseName')
+        column = SearchText.strip('"')
+        found = [
+            {'Name': table['Name'], 'DatabaseName': database, 'TableType': table['TableType'], 'StorageDescriptor': {'Columns': table['Columns']}}
+            for table in tables[database] if any(item['Name'] == column for item in table['Columns'])
+        ]
+        return paginate(found, 'TableList', 100, NextToken)
+
+    athena._glue = Glue(session)
+    athena._glue.awsIdentity = {'Account': '123456789012'}
+    fakes = {
+        'athena': FakeAws(athena.client, {
+            'ListDatabases': list_databases,
+            'ListTableMetadata': list_table_metadata,
+            'GetTableMetadata': get_table_metadata,
+        }),
+        'glue': FakeAws(athena.glue.client, {
+            'SearchTables': search_tables,
+        }),
+    }
+    return athena, fakes
+
+
+def test_benchmark_discover_dashboards(monkeypatch):
+    """ list 500 dashboards and describe the supported ones """
+    qs, fake = get_quicksight(monkeypatch)
+    start = time.perf_counter()
+    qs.discover_dashboards()
+    assert_budget('discover_dashboards', time.perf_counter() - start, 5)
+    assert len(qs.dashboards) == DASHBOARDS
+    assert fake.calls['DescribeDashboard'] == DASHBOARDS
+
+
+def test_benchmark_hydrate_datasets(monkeypatch):
+    """ describe 500 datasets """
+    qs, fake = get_quicksight(monkeypatch)
+    start = time.perf_counter()
+    datasets = qs.hydrate_datasets([f'dataset-{i}' for i in range(DATASETS)])
+    assert_budget('hydrate_datasets', time.perf_counter() - start, 10)
+    assert len(datasets) == DATASETS
+    assert fake.calls['DescribeDataSet'] == DATASETS
+
+
+@pytest.mark.parametrize('discovery', ['glue', 'athena'])
+def test_benchmark_find_cur(discovery):
+    """ find the only CUR among 3000 tables in 10 databases """
+    athena, fakes = get_cur_athena()
+    set_parameters({'cur-table-name-and-db': 'database_7.cur', 'table-discovery': discovery})
+    cur = CUR(athena, glue=None)
+    start = time.perf_counter()
+    database, metadata = cur.find_cur()
+    assert_budget(f'find_cur ({discovery})', time.perf_counter() - start, 10)
+    assert (database, metadata['Name']) == ('database_7', 'cur')
+    if discovery == 'glue':
+        assert fakes['glue'].calls['SearchTables'] == DATABASES
+        assert fakes['athena'].calls['ListTableMetadata'] == 0
+    else:
+        assert fakes['athena'].calls['ListTableMetadata'] == TABLES // 50
+
+
+def test_benchmark_proxy_view():
+    """ generate a CUR2 proxy over a CUR1 with 2000 tag columns """
+    cur = CUR(athena=None, glue=None)
+    cur._database = 'cid_cur'
+    cur._metadata = {'Name': 'cur', 'Columns': cur_columns(CUR_TAGS), 'PartitionKeys': []}
+    queries = []
+    cur.athena = type('FakeAthena', (), {
+        'DatabaseName': 'cid',
+        'query': lambda self, sql, **kwargs: [],
+        'get_view_parameters': lambda self, name: {},
+        'create_or_update_view': lambda self, name, sql, parameters=None: queries.append(sql),
+    })()
+    start = time.perf_counter()
+    proxy = ProxyView(cur, '2')
+    proxy.create_or_update_view()
+    assert_budget('proxy_view', time.perf_counter() - start, 2)
+    assert len(queries) == 1
+    assert "'user_tag_1999'" in queries[0]
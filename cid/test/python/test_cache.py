@@ -0,0 +1,75 @@
+import datetime
+
+from cid.common import Cid
+from cid.helpers.cache import DiskCache
+from cid.helpers.athena import DDL_REGEX
+from cid.utils import set_parameters
+
+
+def test_disk_cache(tmp_path, monkeypatch):
+    """ make sure values survive between instances and can be invalidated
+    """
+    monkeypatch.setenv('CID_CACHE_DIR', str(tmp_path))
+    created = datetime.datetime(2024, 1, 2, 3, 4, 5)
+    DiskCache('test').set('bucket', 'table', {'Name': 'table', 'CreateTime': created})
+    DiskCache('test').set('bucket', '*', ['table'])
+
+    cache = DiskCache('test')
+    assert cache.get('bucket', 'table') == {'Name': 'table', 'CreateTime': created}
+    cache.invalidate('bucket', ['table'])
+    assert cache.get('bucket', 'table') is None
+    assert DiskCache('test').get('bucket', '*') == ['table']
+    assert DiskCache('test', ttl=-1).get('bucket', '*') is None
+
+
+def test_no_cache(tmp_path, monkeypatch):
+    """ make sure --no-cache bypasses cache
+    """
+    monkeypatch.setenv('CID_CACHE_DIR', str(tmp_path))
+    DiskCache('test').set('bucket', 'key', 'value')
+    set_parameters({'no-cache': True})
+    try:
+        assert DiskCache('test').get('bucket', 'key') is None
+    finally:
+        set_parameters({'no-cache': False})
+
+
+def test_ddl_regex():
+    """ make sure we detect tables changed by DDL
+    """
+    assert DDL_REGEX.match('CREATE OR REPLACE VIEW "db"."summary_view" AS SELECT 1').group(1) == '"db"."summary_view"'
+    assert DDL_REGEX.match('-- comment\n  CREATE EXTERNAL TABLE IF NOT EXISTS cur (a string)').group(1) == 'cur'
+    assert DDL_REGEX.match('DROP VIEW IF EXISTS cid_tmp_deleteme;').group(1) == 'cid_tmp_deleteme'
+    assert DDL_REGEX.match('ALTER TABLE cur ADD COLUMNS (a string)').group(1) == 'cur'
+    assert not DDL_REGEX.match('SELECT * FROM cur')
+
+
+def test_compiled_resources(tmp_path, monkeypatch):
+    """ make sure parsed yaml files are reused until the file changes
+    """
+    monkeypatch.setenv('CID_CACHE_DIR', str(tmp_path / 'cache'))
+    source = tmp_path / 'resources.yaml'
+    source.write_text('dashboards:\n  test:\n    name: Test\n    date: 2024-01-02\n')
+    cid = Cid()
+    data = cid.load_yaml_file(str(source), str(tmp_path))
+    assert data == {'dashboards': {'test': {'name': 'Test', 'date': datetime.date(2024, 1, 2)}}}
+
+    def _fail(_):
+        raise AssertionError('must not parse')
+    monkeypatch.setattr('cid.common.yaml_load', _fail)
+    data['dashboards']['test']['name'] = 'Changed' # must not affect the cache
+    assert cid.load_yaml_file(str(source), str(tmp_path)) == {'dashboards': {'test': {'name': 'Test', 'date': datetime.date(2024, 1, 2)}}}
+
+    monkeypatch.undo()
+    monkeypatch.setenv('CID_CACHE_DIR', str(tmp_path / 'cache'))
+    source.write_text('dashboards: {}\n')
+    assert cid.load_yaml_file(str(source), str(tmp_path)) == {'dashboards': {}}
+
+
+def test_cache_ttl_parameter(tmp_path, monkeypatch):
+    """ make sure --cache-ttl does not override caches with an explicit ttl
+    """
+    monkeypatch.setenv('CID_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr('cid.utils.params', {'cache-ttl': '60'})
+    assert DiskCache('test').ttl == 60
+    assert DiskCache('test', ttl=3600).ttl == 3600
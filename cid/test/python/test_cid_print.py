@@ -0,0 +1,12 @@
+import logging
+
+from cid.utils import cid_print
+
+
+def test_cid_print(capsys, caplog):
+    """ make sure colors are printed and stripped from the log of the caller module
+    """
+    with caplog.at_level(logging.DEBUG):
+        cid_print('roses are <BOLD><RED>red<END>, <NOTACOLOR>')
+    assert capsys.readouterr().out == 'roses are \033[1m\033[91mred\033[0m, <NOTACOLOR>\n'
+    assert [(record.name, record.getMessage()) for record in caplog.records] == [(__name__, 'roses are red, <NOTACOLOR>')]
@@ -0,0 +1,90 @@
+from cid.helpers.cur import CUR
+
+
+def get_cur(columns, partitions=None):
+    """ returns CUR helper with given metadata
+    """
+    cur = CUR(athena=None, glue=None)
+    cur._database = 'cid_cur'
+    cur._metadata = {
+        'Name': 'cur_table',
+        'Columns': [{'Name': name, 'Type': 'string'} for name in columns],
+        'PartitionKeys': [{'Name': name, 'Type': 'string'} for name in (partitions or [])],
+    }
+    return cur
+
+
+def test_column_index():
+    """ make sure the column index is case insensitive and follows changes of metadata
+    """
+    cur = get_cur(['line_item_usage_account_id', 'resource_tags_user_Name', 'cost_category_team'], partitions=['year'])
+    assert cur.column_exists('LINE_ITEM_USAGE_ACCOUNT_ID')
+    assert cur.column_index['year']['partition']
+    assert cur.version == '1'
+    assert cur.tag_and_cost_category_fields == ['resource_tags_user_Name', 'cost_category_team']
+    assert not cur.column_exists('bill_payer_account_name')
+
+    cur._metadata['Columns'].append({'Name': 'bill_payer_account_name', 'Type': 'string'})
+    assert cur.column_exists('bill_payer_account_name')
+    assert cur.version == '2'
+    assert cur.fields[-2:] == ['bill_payer_account_name', 'year']
+
+
+def test_get_type_of_column():
+    """ make sure types of missing columns are guessed from names
+    """
+    cur = get_cur(['line_item_usage_account_id'])
+    assert cur.get_type_of_column('resource_tags_user_cost') == 'STRING'
+    assert cur.get_type_of_column('line_item_unblended_cost') == 'DOUBLE'
+    assert cur.get_type_of_column('line_item_usage_start_date') == 'TIMESTAMP'
+    assert cur.get_type_of_column('savings_plan_total_commitment_to_date') == 'DOUBLE'
+    assert cur.get_type_of_column('line_item_usage_start_time', version='2') == 'STRING'
+    assert cur.get_type_of_column('product') == 'MAP'
+
+
+def test_get_type_of_existing_column():
+    """ make sure types of existing columns come from metadata
+    """
+    cur = get_cur(['line_item_usage_account_id', 'line_item_blended_rate', 'line_item_usage_amount'])
+    cur._metadata['Columns'][1]['Type'] = 'double'
+    assert cur.get_type_of_column('line_item_blended_rate') == 'DOUBLE'
+    assert cur.get_type_of_column('line_item_usage_amount') == 'STRING' # not a guess by name
+    assert cur.get_type_of_column('missing_usage_amount') == 'DOUBLE'
+    assert cur.get_type_of_column('LINE_ITEM_USAGE_ACCOUNT_ID') == 'STRING'
+
+
+class FakeAthena():
+    """ Athena helper with CUR tables in some databases """
+    client = type('Client', (), {'exceptions': type('Exceptions', (), {'ClientError': Exception})})()
+
+    def __init__(self, tables: dict) -> None:
+        self.tables = tables
+        self.scanned = []
+
+    def list_databases(self):
+        return list(self.tables)
+
+    def find_tables_with_columns(self, columns, database_name):
+        self.scanned.append(database_name)
+        return [{'Name': name} for name in self.tables[database_name]]
+
+    def get_table_metadata(self, table_name, database_name):
+        return {'Name': table_name, 'Columns': []}
+
+
+def test_find_cur_scans_likely_databases_first(monkeypatch):
+    """ make sure unattended discovery stops at a single CUR in a likely database
+    """
+    monkeypatch.setattr('cid.utils.params', {})
+    monkeypatch.setattr('cid.helpers.cur.isatty', lambda: False)
+    athena = FakeAthena({'analytics': [], 'security': [], 'cid_data_export': ['cur2'], 'other': ['cur_copy']})
+    database, metadata = CUR(athena=athena, glue=None).find_cur()
+    assert (database, metadata['Name']) == ('cid_data_export', 'cur2')
+    assert athena.scanned == ['cid_data_export']
+
+    monkeypatch.setattr('cid.utils.params', {'cur-table-name-and-db': 'other.cur_copy'})
+    monkeypatch.setattr('cid.helpers.cur.isatty', lambda: True)
+    athena.scanned = []
+    database, metadata = CUR(athena=athena, glue=None).find_cur()
+    assert (database, metadata['Name']) == ('other', 'cur_copy')
+    assert sorted(athena.scanned) == ['analytics', 'cid_data_export', 'other', 'security']
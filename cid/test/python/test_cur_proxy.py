@@ -0,0 +1,97 @@
+import logging
+
+from cid.logger import add_logging_level
+from cid.helpers.cur import CUR
+from cid.helpers.cur_proxy import ProxyView, parse_view_maps
+
+add_logging_level('TRACE', logging.DEBUG - 5) # proxy view uses logger.trace
+
+
+class FakeAthena():
+    """ Athena helper that keeps views and their parameters in memory """
+    DatabaseName = 'cid'
+
+    def __init__(self) -> None:
+        self.queries = []
+        self.parameters = {}
+
+    def query(self, sql, **kwargs):
+        raise AssertionError(f'proxy state must be read from view parameters: {sql}')
+
+    def get_view_parameters(self, view_name):
+        return self.parameters.get(view_name, {})
+
+    def create_or_update_view(self, view_name, view_query, parameters=None):
+        self.queries.append(view_query)
+        self.parameters[view_name] = parameters
+
+
+def get_cur(athena, tags):
+    cur = CUR(athena=athena, glue=None)
+    cur._database = 'cid_cur'
+    cur._metadata = {
+        'Name': 'cur',
+        'Columns': [{'Name': name, 'Type': 'string'} for name in CUR.cur_minimal_required_columns + [f'resource_tags_user_{tag}' for tag in tags]],
+        'PartitionKeys': [],
+    }
+    return cur
+
+
+def test_proxy_is_updated_only_with_new_fields():
+    """ make sure the proxy view is not regenerated when it already exposes requested fields
+    """
+    athena = FakeAthena()
+    athena.parameters['cur2_proxy'] = {} # existing view without a state is read from athena
+    athena.query = lambda sql, **kwargs: []
+    ProxyView(get_cur(athena, ['app']), '2').create_or_update_view()
+    assert len(athena.queries) == 1
+    del athena.query
+
+    proxy = ProxyView(get_cur(athena, ['app']), '2') # next run
+    proxy.create_or_update_view()
+    assert len(athena.queries) == 1
+    assert proxy.column_surely_exist("resource_tags['user_app']")
+
+    proxy.fields_to_expose.append('product_sku') # a field missing in source is exposed as null
+    proxy.create_or_update_view()
+    assert len(athena.queries) == 2
+    assert 'cast(null as varchar) product_sku' in athena.queries[-1]
+
+    proxy = ProxyView(get_cur(athena, ['app', 'team']), '2') # new tag in source
+    proxy.create_or_update_view()
+    assert len(athena.queries) == 3
+    assert "'user_team'" in athena.queries[-1]
+
+
+def test_parse_view_maps():
+    """ make sure maps are read from the view sql with keys that contain commas, quotes or unicode
+    """
+    sql = """
+        CREATE VIEW "cid"."cur2_proxy" SECURITY DEFINER AS
+        SELECT
+          split_part("billing_period", '-', 1) year
+        , MAP(concat(ARRAY['user_a,b', 'user_it''s'], ARRAY['user_ключ']), concat(ARRAY["resource_tags_user_a,b", coalesce(x, 'a,b')], ARRAY["resource_tags_user_ключ"])) resource_tags
+        , MAP(ARRAY['sku'] || ARRAY['name'], ARRAY[product_sku] || ARRAY[CAST(null AS varchar)]) "product"
+        , cast(NULL AS MAP<VARCHAR, VARCHAR>) cost_category
+        FROM
+          "cid_cur"."cur"
+    """
+    assert parse_view_maps(sql) == {
+        'resource_tags': {
+            'user_a,b': '"resource_tags_user_a,b"',
+            "user_it's": "coalesce(x, 'a,b')",
+            'user_ключ': '"resource_tags_user_ключ"',
+        },
+        'product': {'sku': 'product_sku', 'name': 'CAST(null AS varchar)'},
+    }
+
+
+def test_proxy_reads_generated_maps():
+    """ make sure keys written by the proxy are read back from the view sql
+    """
+    athena = FakeAthena()
+    athena.query = lambda sql, **kwargs: []
+    proxy = ProxyView(get_cur(athena, ['a,b', 'ключ', 'plain']), '2')
+    proxy.create_or_update_view()
+    assert set(parse_view_maps(athena.queries[0])['resource_tags']) == {'user_a,b', 'user_ключ', 'user_plain'}
+    assert '"resource_tags_user_a,b"' in athena.queries[0]
@@ -0,0 +1,48 @@
+import json
+import datetime
+
+from cid.helpers.quicksight import QuickSight
+from cid.helpers.quicksight.dashboard import Dashboard
+from cid.helpers.quicksight.version import CidVersion
+
+
+class FakeQuickSight():
+    """ QuickSight helper answering only calls needed for the status """
+    format_ingestion = staticmethod(QuickSight.format_ingestion)
+
+    def get_dashboard_permissions(self, dashboard_id):
+        return [
+            {'Principal': 'arn:aws:quicksight:us-east-1:123456789012:user/default/admin', 'Actions': ['quicksight:UpdateDashboardPermissions']},
+            {'Principal': 'arn:aws:quicksight:us-east-1:123456789012:user/default/reader', 'Actions': ['quicksight:DescribeDashboard']},
+        ]
+
+    def get_dataset_last_ingestion_info(self, dataset_id):
+        return {'status': 'COMPLETED', 'created': datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc), 'rows': 10, 'duration_s': 120, 'error': None}
+
+    def describe_dataset(self, dataset_id):
+        return None
+
+
+def get_dashboard():
+    dashboard = Dashboard({'DashboardId': 'cudos', 'Name': 'CUDOS', 'Version': {'Status': 'CREATION_SUCCESSFUL'}}, qs=FakeQuickSight())
+    dashboard._status = 'up to date'
+    dashboard._cid_version = CidVersion('v1.2.3')
+    dashboard._definition = {'version': 'v1.2.3'}
+    dashboard._datasets = {'summary_view': 'ds-summary', 'compute': 'ds-compute'}
+    return dashboard
+
+
+def test_status_snapshot(capsys):
+    """ make sure the snapshot has owners and last ingestions and can be rendered as json and as text
+    """
+    dashboard = get_dashboard()
+    snapshot = dashboard.get_status_snapshot()
+    assert snapshot['latest'] is True
+    assert snapshot['owners'] == ['admin']
+    assert [dataset['name'] for dataset in snapshot['datasets']] == ['compute', 'summary_view']
+    assert json.loads(json.dumps(snapshot, default=str))['cid_version'] == 'v1.2.3'
+
+    dashboard.display_status(snapshot)
+    output = capsys.readouterr().out
+    assert 'admin' in output and 'reader' not in output
+    assert '2 mins, 10 rows' in output
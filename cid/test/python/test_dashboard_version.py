@@ -0,0 +1,64 @@
+from cid.helpers.cache import DiskCache
+from cid.helpers.quicksight import QuickSight
+from cid.helpers.quicksight.dashboard import Dashboard
+from cid.helpers.quicksight.version import CidVersion
+
+
+class FakeQuickSight():
+    """ QuickSight helper that counts describes of templates """
+    cidAccountId = '223485597511'
+    get_template_version = QuickSight.get_template_version
+
+    def __init__(self, tags=None) -> None:
+        self._versions = DiskCache('test-versions', ttl=3600)
+        self.tags = tags or {}
+        self.described = []
+
+    def get_tags(self, arn):
+        return self.tags
+
+    def set_tags(self, arn, **tags):
+        self.tags.update(tags)
+
+    def describe_template(self, template_id, version_number=None, account_id=None, region='us-east-1'):
+        self.described.append((template_id, version_number))
+        return type('Template', (), {'cid_version': CidVersion(f'v1.0.{version_number or 9}')})()
+
+
+def get_dashboard(qs):
+    arn = 'arn:aws:quicksight:us-east-1:123456789012'
+    dashboard = Dashboard({
+        'DashboardId': 'cudos',
+        'Arn': f'{arn}:dashboard/cudos',
+        'Version': {'Status': 'CREATION_SUCCESSFUL', 'VersionNumber': 3, 'SourceEntityArn': f'arn:aws:quicksight:us-east-1:223485597511:template/cudos/version/5'},
+    }, qs=qs)
+    dashboard._definition = {'templateId': 'cudos', 'sourceAccountId': '223485597511'}
+    return dashboard
+
+
+def test_version_from_tag_needs_no_describe(tmp_path, monkeypatch):
+    """ make sure a tagged dashboard is checked without describing templates or definitions
+    """
+    monkeypatch.setenv('CID_CACHE_DIR', str(tmp_path))
+    qs = FakeQuickSight(tags={'cid_version_tag': 'v1.0.5'})
+    dashboard = get_dashboard(qs)
+    assert str(dashboard.deployed_cid_version) == 'v1.0.5'
+    assert dashboard.status == 'update available v1.0.5->v1.0.9'
+    assert qs.described == [('cudos', None)] # only the latest source template
+
+
+def test_template_versions_are_cached(tmp_path, monkeypatch):
+    """ make sure versions of templates are resolved once and shared between runs
+    """
+    monkeypatch.setenv('CID_CACHE_DIR', str(tmp_path))
+    qs = FakeQuickSight()
+    dashboard = get_dashboard(qs)
+    assert str(dashboard.deployed_cid_version) == 'v1.0.5'
+    assert str(dashboard.latest_available_cid_version) == 'v1.0.9'
+    assert qs.tags == {'cid_version_tag': CidVersion('v1.0.5')}
+
+    qs = FakeQuickSight() # next run
+    dashboard = get_dashboard(qs)
+    assert str(dashboard.deployed_cid_version) == 'v1.0.5'
+    assert str(dashboard.latest_available_cid_version) == 'v1.0.9'
+    assert qs.described == []
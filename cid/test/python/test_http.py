@@ -0,0 +1,54 @@
+import threading
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from functools import partial
+
+import pytest
+
+from cid.helpers.http import HttpClient
+from cid.exceptions import CidCritical
+from cid.utils import set_parameters
+
+
+@pytest.fixture
+def server(tmp_path):
+    """ a local http server that serves tmp_path and counts full responses
+    """
+    (tmp_path / 'www').mkdir()
+    counter = {'200': 0, '304': 0}
+    class Handler(SimpleHTTPRequestHandler):
+        def send_response(self, code, message=None):
+            counter[str(code)] = counter.get(str(code), 0) + 1
+            super().send_response(code, message)
+        def log_message(self, *args):
+            pass
+    httpd = HTTPServer(('127.0.0.1', 0), partial(Handler, directory=str(tmp_path / 'www')))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_port}', tmp_path / 'www', counter
+    httpd.shutdown()
+
+
+def test_http_cache(server, tmp_path, monkeypatch):
+    """ make sure files are revalidated with conditional requests and served from cache offline
+    """
+    monkeypatch.setenv('CID_CACHE_DIR', str(tmp_path / 'cache'))
+    url, www, counter = server
+    (www / 'catalog.yaml').write_text('Resources: []')
+    (www / 'other.yaml').write_text('dashboards: {}')
+
+    assert HttpClient().get_text(f'{url}/catalog.yaml') == 'Resources: []'
+    assert HttpClient().get_text(f'{url}/catalog.yaml') == 'Resources: []'
+    assert counter == {'200': 1, '304': 1}
+
+    assert HttpClient().prefetch([f'{url}/catalog.yaml', f'{url}/other.yaml', f'{url}/missing.yaml']) == {
+        f'{url}/catalog.yaml': 'Resources: []',
+        f'{url}/other.yaml': 'dashboards: {}',
+    }
+
+    set_parameters({'offline': True})
+    try:
+        assert HttpClient().get_text(f'{url}/other.yaml') == 'dashboards: {}'
+        with pytest.raises(CidCritical):
+            HttpClient().get_text(f'{url}/missing.yaml')
+    finally:
+        set_parameters({'offline': False})
@@ -0,0 +1,27 @@
+import boto3
+from botocore.stub import Stubber
+
+from cid.profiler import Profiler
+
+
+def test_profiler():
+    """ make sure api calls of clients of a registered session are measured
+    """
+    profiler = Profiler()
+    session = boto3.session.Session(region_name='us-east-1', aws_access_key_id='test', aws_secret_access_key='test')
+    profiler.register(session)
+    client = session.client('athena')
+    with Stubber(client) as stubber:
+        stubber.add_response('list_work_groups', {'WorkGroups': []})
+        stubber.add_response('list_work_groups', {'WorkGroups': []})
+        client.list_work_groups()
+        client.list_work_groups()
+    profiler.record_athena_query({
+        'QueryExecutionId': 'q1',
+        'Status': {'State': 'SUCCEEDED'},
+        'Statistics': {'QueryQueueTimeInMillis': 100, 'EngineExecutionTimeInMillis': 900, 'TotalExecutionTimeInMillis': 1000},
+    })
+    report = profiler.report()
+    assert report['api_calls']['athena.ListWorkGroups']['count'] == 2
+    assert report['athena']['queries'] == 1
+    assert report['athena']['queue_ms'] == 100
@@ -0,0 +1,95 @@
+import boto3
+from botocore.stub import Stubber
+
+from cid.helpers.quicksight import QuickSight
+from cid.helpers.quicksight.dataset import Dataset
+
+
+def get_quicksight(monkeypatch):
+    """ returns QuickSight helper with stubbed client
+    """
+    monkeypatch.setattr(QuickSight, '_awsIdentity', {'Account': '123456789012'})
+    monkeypatch.setattr(QuickSight, '_identityRegion', 'us-east-1')
+    session = boto3.session.Session(region_name='us-east-1', aws_access_key_id='test', aws_secret_access_key='test')
+    qs = QuickSight(session)
+    return qs, Stubber(qs.client)
+
+
+def raw_dataset(dataset_id):
+    return {
+        'DataSetId': dataset_id,
+        'Name': dataset_id,
+        'PhysicalTableMap': {},
+        'OutputColumns': [{'Name': 'a', 'Type': 'STRING'}],
+    }
+
+
+def test_hydrate_datasets(monkeypatch):
+    """ make sure only summaries are described, with retry on throttling and skipping missing ones
+    """
+    monkeypatch.setattr('time.sleep', lambda _: None)
+    monkeypatch.setattr('cid.helpers.quicksight.get_max_workers', lambda: 1)
+    qs, stubber = get_quicksight(monkeypatch)
+    qs._datasets = {
+        'ds1': Dataset({'DataSetId': 'ds1', 'Name': 'ds1'}, qs=qs),
+        'ds2': Dataset(raw_dataset('ds2'), qs=qs),
+    }
+    stubber.add_client_error('describe_data_set', 'ThrottlingException')
+    stubber.add_response('describe_data_set', {'DataSet': raw_dataset('ds1')})
+    stubber.add_client_error('describe_data_set', 'ResourceNotFoundException')
+    with stubber:
+        datasets = qs.hydrate_datasets(['ds1', 'ds2', 'ds3'])
+    stubber.assert_no_pending_responses()
+    assert list(datasets) == ['ds1', 'ds2']
+    assert datasets['ds1'].described
+    assert datasets['ds1'].columns == [{'Name': 'a', 'Type': 'STRING'}]
+
+
+def test_refresh_datasets(monkeypatch):
+    """ make sure shared datasets are refreshed once, the ingestion limit is respected and ingestions are monitored
+    """
+    monkeypatch.setattr('time.sleep', lambda _: None)
+    qs, _ = get_quicksight(monkeypatch)
+    monkeypatch.setattr(qs, 'hydrate_datasets', lambda ids: {})
+    started = []
+    polls = {}
+    limited = []
+
+    def start_ingestion(dataset_id):
+        if dataset_id == 'ds3' and not limited: # account limit is reached once
+            limited.append(dataset_id)
+            raise qs.client.exceptions.LimitExceededException({'Error': {'Code': 'LimitExceededException'}}, 'CreateIngestion')
+        started.append(dataset_id)
+        return {'dataset_id': dataset_id, 'mode': 'SPICE', 'ingestion_id': f'i-{dataset_id}', 'status': 'INITIALIZED'}
+
+    def describe_ingestion(dataset_id, ingestion_id):
+        polls[dataset_id] = polls.get(dataset_id, 0) + 1
+        if polls[dataset_id] < 2:
+            return {'IngestionStatus': 'RUNNING'}
+        return {'IngestionStatus': 'COMPLETED', 'RowInfo': {'RowsIngested': 1000}, 'IngestionTimeInSeconds': 10}
+
+    monkeypatch.setattr(qs, 'start_ingestion', start_ingestion)
+    monkeypatch.setattr(qs, 'describe_ingestion', describe_ingestion)
+    results = qs.refresh_datasets(['ds1', 'ds2', 'ds1', 'ds3'], wait=True, max_ingestions=2)
+    assert started == ['ds1', 'ds2', 'ds3']
+    assert list(results) == ['ds1', 'ds2', 'ds3']
+    assert all(result['status'] == 'COMPLETED' for result in results.values())
+    assert results['ds3']['rows_per_s'] == 100
+
+
+def test_refresh_datasets_gives_up_on_limit(monkeypatch):
+    """ make sure refresh does not hang when SPICE ingestion slots are busy with other ingestions
+    """
+    monkeypatch.setattr('time.sleep', lambda _: None)
+    qs, _ = get_quicksight(monkeypatch)
+    monkeypatch.setattr(qs, 'hydrate_datasets', lambda ids: {})
+
+    def start_ingestion(dataset_id):
+        raise qs.client.exceptions.LimitExceededException({'Error': {'Code': 'LimitExceededException'}}, 'CreateIngestion')
+
+    monkeypatch.setattr(qs, 'start_ingestion', start_ingestion)
+    results = qs.refresh_datasets(['ds1', 'ds2'], max_limit_retries=3)
+    assert results == {
+        'ds1': {'dataset_id': 'ds1', 'status': 'FAILED', 'error': 'limit exceeded'},
+        'ds2': {'dataset_id': 'ds2', 'status': 'FAILED', 'error': 'limit exceeded'},
+    }
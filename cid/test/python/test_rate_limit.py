@@ -0,0 +1,67 @@
+import pytest
+
+from cid.utils import set_parameters, unset_parameter
+from cid.exceptions import CidCritical
+from cid.helpers.quicksight.rate_limit import api_family, get_rates, TokenBucket, RateLimiter
+
+
+def test_api_family():
+    """ make sure operations are grouped in families
+    """
+    assert api_family('DescribeDataSet') == 'describe'
+    assert api_family('ListDashboards') == 'list'
+    assert api_family('UpdateDataSetPermissions') == 'write'
+    assert api_family('GenerateEmbedUrlForRegisteredUser') == 'other'
+
+
+def test_get_rates():
+    """ make sure rates can be overridden with a parameter
+    """
+    set_parameters({'quicksight-tps': 'describe=3, write=0'})
+    try:
+        rates = get_rates()
+        assert rates['describe'] == 3 and rates['write'] == 0 and rates['list'] == 5
+        set_parameters({'quicksight-tps': 'read=3'})
+        with pytest.raises(CidCritical):
+            get_rates()
+    finally:
+        unset_parameter('quicksight-tps')
+
+
+def test_token_bucket(monkeypatch):
+    """ make sure the bucket waits when empty and adapts the rate on throttling
+    """
+    sleeps = []
+    monkeypatch.setattr('time.sleep', sleeps.append)
+    clock = [100.0]
+    monkeypatch.setattr('time.monotonic', lambda: clock[0])
+    bucket = TokenBucket(rate=4, burst=1)
+    assert bucket.acquire() == 0
+    clock[0] += 0.25
+    assert bucket.acquire() == 0
+
+    bucket.throttled()
+    assert bucket.rate == 2
+    def sleep(delay):
+        sleeps.append(delay)
+        clock[0] += delay
+    monkeypatch.setattr('time.sleep', sleep)
+    assert bucket.acquire() >= 0.5
+
+    for _ in range(100):
+        bucket.succeeded()
+    assert bucket.rate == 4
+    assert TokenBucket(rate=0).acquire() == 0
+
+
+def test_rate_limiter_counts_throttling():
+    """ make sure throttling is counted per family and slows the family down
+    """
+    limiter = RateLimiter()
+    limiter.buckets = {'describe': TokenBucket(10), 'list': TokenBucket(5)}
+    limiter._needs_retry('needs-retry.quicksight.DescribeDataSet', response=(None, {'Error': {'Code': 'ThrottlingException'}}))
+    limiter._needs_retry('needs-retry.quicksight.ListDashboards', response=(None, {}))
+    report = limiter.report()
+    assert report['describe']['throttled'] == 1
+    assert report['describe']['rate'] == 5
+    assert report['list'] == {'throttled': 0, 'waited_s': 0, 'rate': 5}
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from cid.helpers.scheduler import DependencyGraph
+from cid.exceptions import CidCritical
+
+
+def test_topological_order():
+    """ make sure dependencies go first and independent nodes keep the order
+    """
+    graph = DependencyGraph()
+    graph.add(('view', 'summary'), depends_on=[('view', 'account_map'), ('cur', '1')])
+    graph.add(('view', 'account_map'))
+    graph.add(('cur', '1'))
+    graph.add(('view', 'ec2'), depends_on=[('cur', '1')])
+    order = [node.key for node in graph.topological_order()]
+    assert order == [('view', 'account_map'), ('cur', '1'), ('view', 'summary'), ('view', 'ec2')]
+
+
+def test_circular_dependency():
+    """ make sure cycles are reported
+    """
+    graph = DependencyGraph()
+    graph.add('a', depends_on=['b'])
+    graph.add('b', depends_on=['a'])
+    with pytest.raises(CidCritical):
+        graph.topological_order()
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_run(max_workers):
+    """ make sure all nodes are executed after their dependencies
+    """
+    lock = threading.Lock()
+    executed = []
+    def _step(name):
+        with lock:
+            executed.append(name)
+        return name
+
+    graph = DependencyGraph()
+    graph.add('c', func=lambda: _step('c'), depends_on=['a', 'b'])
+    graph.add('a', func=lambda: _step('a'))
+    graph.add('b', func=lambda: _step('b'), depends_on=['a'])
+    graph.add('d', func=lambda: _step('d'))
+    results = graph.run(max_workers=max_workers)
+    assert results == {'a': 'a', 'b': 'b', 'c': 'c', 'd': 'd'}
+    assert executed.index('a') < executed.index('b') < executed.index('c')
+    assert all(node.duration is not None for node in graph.nodes.values())
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_failure_isolation(max_workers):
+    """ make sure a failure skips only dependents
+    """
+    def _fail():
+        raise CidCritical('failed')
+
+    graph = DependencyGraph()
+    graph.add('a', func=_fail)
+    graph.add('b', func=lambda: 'b', depends_on=['a'])
+    graph.add('c', func=lambda: 'c')
+    with pytest.raises(CidCritical):
+        graph.run(max_workers=max_workers)
+    assert graph.nodes['a'].status == 'failed'
+    assert graph.nodes['b'].status == 'skipped'
+    assert graph.nodes['c'].status == 'done'
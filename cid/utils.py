@@ -1,12 +1,14 @@
 import os
+import re
 import sys
 import csv
 import copy
 import math
-import inspect
 import logging
 import platform
 import datetime
+import functools
+import threading
 from typing import Any, Dict
 from functools import lru_cache as cache
 from collections.abc import Iterable
@@ -28,6 +30,7 @@ logger = logging.getLogger(__name__)
 defaults = {} # params from parameter storage
 params = {} # parameters from command line
 _all_yes = False # parameters from command line
+_prompt_lock = threading.RLock() # only one question to user at a time
 
 PYPI_URL = "https://pypi.org/pypi/cid-cmd/json"
 
@@ -150,40 +153,52 @@ def get_boto_client(service_name, **kwargs):
         raise
 
 
-def cid_print(value, **kwargs) -> None:
+COLORS = {
+    'PURPLE': '\033[95m',
+    'CYAN': '\033[96m',
+    'GREY': '\033[90m',
+    'DARKCYAN': '\033[36m',
+    'BLUE': '\033[94m',
+    'GREEN': '\033[92m',
+    'YELLOW': '\033[93m',
+    'RED': '\033[91m',
+    'BOLD': '\033[1m',
+    'UNDERLINE': '\033[4m',
+    'END': '\033[0m',
+}
+COLORS_REGEX = re.compile('<(' + '|'.join(COLORS) + ')>')
+
+def cid_print(value, log: logging.Logger=None, **kwargs) -> None:
     ''' Print AND log
     ex:
         violets, roses = 'violets', 'roses'
         cid_print(f'{roses} are <BOLD><RED>red<END>, {violets} are <BLUE><UNDERLINE>blue<END>')
 
+    log: logger to use. By default the logger of the caller module.
     '''
-    colors = {
-        'PURPLE': '\033[95m',
-        'CYAN': '\033[96m',
-        'GREY': '\033[90m',
-        'DARKCYAN': '\033[36m',
-        'BLUE': '\033[94m',
-        'GREEN': '\033[92m',
-        'YELLOW': '\033[93m',
-        'RED': '\033[91m',
-        'BOLD': '\033[1m',
-        'UNDERLINE': '\033[4m',
-        'END': '\033[0m',
-    }
-
     msg = str(value)
-    log_msg = str(msg)
-    for col, val in colors.items():
-        msg = msg.replace(f'<{col}>', val)
-        log_msg = log_msg.replace(f'<{col}>', '')
-    try:
-        mod = inspect.getmodule(inspect.stack()[1][0])
-        name = mod.__name__ if mod else __name__
-        logging.getLogger(name).debug(log_msg)
-    except Exception as exc:
-        logger.debug('cid_print: {exc}')
+    log_msg = msg
+    if '<' in msg:
+        log_msg = COLORS_REGEX.sub('', msg)
+        msg = COLORS_REGEX.sub(lambda match: COLORS[match.group(1)], msg)
+    if log is None:
+        try:
+            log = logging.getLogger(sys._getframe(1).f_globals.get('__name__', __name__)) # pylint: disable=protected-access
+        except ValueError:
+            log = logger
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(log_msg)
     print(msg, **kwargs)
 
+def buffer_output() -> None:
+    ''' Switch stdout to block buffering (--buffer-output). Faster for large outputs redirected to a file,
+    but progress is shown only when the buffer is full or at exit.
+    '''
+    try:
+        sys.stdout.reconfigure(line_buffering=False, write_through=False)
+    except (AttributeError, ValueError) as exc: # stdout can be replaced
+        logger.debug(f'Cannot buffer stdout: {exc}')
+
 def set_defaults(data: dict) -> None:
     global defaults
     logger.debug(f'setting defaults to: {data}')
@@ -207,6 +222,33 @@ def get_parameters():
     global params
     return dict(params)
 
+def one_prompt_at_a_time(func):
+    ''' a decorator that makes sure concurrent workers do not ask user at the same time
+    '''
+    @functools.wraps(func)
+    def wrap(*args, **kwargs):
+        with _prompt_lock:
+            return func(*args, **kwargs)
+    return wrap
+
+def backoff(initial: float=0.1, factor: float=2, maximum: float=1):
+    ''' yields growing delays: fast first polls, then longer ones up to maximum
+    '''
+    delay = initial
+    while True:
+        yield delay
+        delay = min(delay * factor, maximum)
+
+def get_max_workers(default: int=4) -> int:
+    ''' returns a number of concurrent workers (--max-workers parameter)
+    '''
+    value = get_parameters().get('max-workers') or default
+    try:
+        return max(1, int(value))
+    except ValueError as exc:
+        raise CidCritical(f'max-workers must be a number, got: {value}') from exc
+
+@one_prompt_at_a_time
 def get_yesno_parameter(param_name: str, message: str, default: str=None, break_on_ctrl_c=True):
     logger.debug(f'getting param {param_name}')
     param_name = param_name.replace('_', '-')
@@ -229,6 +271,7 @@ def get_yesno_parameter(param_name: str, message: str, default: str=None, break_
     return params[param_name]
 
 
+@one_prompt_at_a_time
 def get_parameter(param_name, message, choices=None, default=None, none_as_disabled=False, template_variables={}, break_on_ctrl_c=True, fuzzy=True, multi=False, order=False, yes_choice='yes'):
     """
     Check if parameters are provided in the command line and if not, ask user
@@ -358,6 +401,11 @@ class IsolatedParameters:
         global params
         params = self.backup
 
+def yaml_load(stream):
+    """ yaml.safe_load using libyaml (CSafeLoader) when available, which is much faster on large files
+    """
+    return yaml.load(stream, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
 def merge_objects(obj1, obj2, depth=2):
     """ merging objects with a depth
 